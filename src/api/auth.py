@@ -2,35 +2,62 @@
 # -*- coding: utf-8 -*-
 """
 B站扫码登录实现
-支持自动刷新 Cookie
+支持自动刷新 Cookie，并可在后台线程中于 Cookie 过期前主动刷新
 https://github.com/linzeliang1222/bilibili_autoreply
 """
 
 import binascii
 import requests
-import qrcode
 import time
 import json
 import os
-from lxml import etree
+import threading
+from urllib.parse import unquote
 from datetime import datetime
-from Crypto.Cipher import PKCS1_OAEP
-from Crypto.Hash import SHA256
-from Crypto.PublicKey import RSA
+from transport import mount
 
-key = RSA.importKey('''\
+# qrcode、lxml 与 pycryptodome 只在扫码登录或刷新 Cookie 时才需要，按需导入，本地 Cookie 有效时启动更快
+PUBLIC_KEY = '''\
 -----BEGIN PUBLIC KEY-----
 MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDLgd2OAkcGVtoE3ThUREbio0Eg
 Uc/prcajMKXvkCKFCWhJYJcLkcM2DKKcSeFpD/j6Boy538YXnR6VhcuUJOhH2x71
 nzPjfdTcqMz7djHum0qSZA0AyCBDABUqCrfNgCiJ00Ra7GmRj+YCK1NJEuewlb40
 JNrRuoEUXpabUzGB8QIDAQAB
------END PUBLIC KEY-----''')
+-----END PUBLIC KEY-----'''
 
 class Auth:
-    def __init__(self):
-        self.userdata_file = '.userdata'
-        self.refresh_token_file = '.refresh_token'
+    # 接口地址（可指向本地测试服务）
+    www_url = "https://www.bilibili.com"
+    passport_url = "https://passport.bilibili.com"
+    api_url = "https://api.bilibili.com"
+    # 后台检查 Cookie 的间隔（单位：秒）
+    refresh_check_interval = 3600
+    # SESSDATA 距离过期不足该时长（单位：秒）时主动刷新
+    refresh_margin = 2 * 86400
+    # 请求的 (连接超时, 读取超时)（单位：秒）、每个主机的连接池大小与幂等请求的最多重试次数（参见 transport.py）
+    http_timeout = (5, 15)
+    http_pool_size = 10
+    http_retries = 3
+
+    def __init__(self, userdata_file='.userdata', refresh_token_file='.refresh_token', read_only=False):
+        self.userdata_file = userdata_file
+        self.refresh_token_file = refresh_token_file
+        # 只读模式：只使用本地已有的登录数据，不刷新 Cookie、不扫码登录，也不改写或删除本地文件，
+        # 供与常规轮询进程共用登录数据的进程（如历史评论补扫）使用，避免两个进程同时刷新、改写同一份 Cookie
+        self.read_only = read_only
+        # 缓存的登录用户信息（uname、mid），与登录数据放在同一目录
+        self.identity_file = os.path.join(os.path.dirname(userdata_file), '.identity')
+        # 本地文件的内存缓存：文件路径 -> (修改时间, 内容)，文件修改时间变化时重新读取
+        self.file_cache = {}
+        # 当前登录用户信息（/x/web-interface/nav），登录期间不变，只请求一次
+        self.nav_data = None
+        # 后台刷新线程与刷新成功后的回调（参数为新的用户数据）
+        self.refresher = None
+        self.on_refresh = None
+        self.refresh_lock = threading.Lock()
+        self.stop_event = threading.Event()
         self.session = requests.Session()
+        mount(self.session, timeout=self.http_timeout, retries=self.http_retries, pool_maxsize=self.http_pool_size)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Referer': 'https://www.bilibili.com/'
@@ -53,10 +80,69 @@ class Auth:
             print(f"❌ 本地用户数据加载失败：{e}")
             return False
 
+    def read_cached(self, path, parse):
+        """读取本地文件，文件修改时间未变化时直接返回内存中的缓存"""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.file_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            value = parse(f)
+        self.file_cache[path] = (mtime, value)
+        return value
+
+    def write_atomic(self, path, text):
+        """先写入临时文件再替换，进程中断或并发读取时不会得到写了一半的文件"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.file_cache.pop(path, None)
+
+    def get_sessdata_expires(self):
+        """从 SESSDATA 中解析过期时间（秒级时间戳），格式为 "<令牌>,<过期时间>,<校验>"，解析失败返回 None"""
+        try:
+            return int(unquote(self.session.cookies.get("SESSDATA") or "").split(',')[1])
+        except (IndexError, ValueError):
+            return None
+
+    def start_refresher(self, on_refresh=None):
+        """
+        启动后台线程定期检查 Cookie，SESSDATA 即将过期或服务端要求刷新时自动刷新，
+        刷新过程持有 refresh_lock，不阻塞回复主循环
+        """
+        self.on_refresh = on_refresh
+        if self.refresher is None:
+            self.refresher = threading.Thread(target=self.refresh_loop, daemon=True, name='cookie-refresher')
+            self.refresher.start()
+        return self.refresher
+
+    def stop_refresher(self):
+        self.stop_event.set()
+
+    def refresh_loop(self):
+        while not self.stop_event.wait(self.refresh_check_interval):
+            try:
+                expires = self.get_sessdata_expires()
+                if expires is not None and expires - time.time() < self.refresh_margin:
+                    print(f"⏰ Cookie 将于 {datetime.fromtimestamp(expires)} 过期，提前刷新")
+                    self.auto_refresh_cookie()
+                else:
+                    self.check_cookie()
+            except Exception as e:
+                print(f"❌ 后台检查 Cookie 失败：{e}")
+
     def auto_refresh_cookie(self):
+        with self.refresh_lock:
+            return self._auto_refresh_cookie()
+
+    def _auto_refresh_cookie(self):
+        from lxml import etree
         print("🚧 正在自动刷新 Cookie...")
         hash_value = self.get_correspond_path()
-        url = "https://www.bilibili.com/correspond/1/" + hash_value
+        url = self.www_url + "/correspond/1/" + hash_value
         response = self.session.get(url)
         tree = etree.HTML(response.text)
         result = tree.xpath("//div[@id='1-name']/text()")
@@ -74,7 +160,7 @@ class Auth:
             return False
 
     def refresh_cookie(self, refresh_csrf):
-        url = "https://passport.bilibili.com/x/passport-login/web/cookie/refresh"
+        url = self.passport_url + "/x/passport-login/web/cookie/refresh"
         data = {
             "csrf": self.get_userdata()['bili_jct'],
             "refresh_csrf": refresh_csrf,
@@ -90,13 +176,15 @@ class Auth:
             self.load_userdata()
             # 确认刷新，使原 Cookie 失效
             self.confirm_refresh(refresh_token_old)
+            if self.on_refresh:
+                self.on_refresh(self.get_userdata())
             return True
         else:
             raise Exception(f'❌ 刷新 Cookie 失败：{data}')
 
     def confirm_refresh(self, refresh_token_old):
         """确认刷新 Cookie"""
-        url = "https://passport.bilibili.com/x/passport-login/web/confirm/refresh"
+        url = self.passport_url + "/x/passport-login/web/confirm/refresh"
         data = {
             "csrf": self.get_userdata()['bili_jct'], 
             "refresh_token": refresh_token_old
@@ -107,25 +195,25 @@ class Auth:
             raise Exception(f'❌ 确认刷新 Cookie 失败：{data}')
 
     def get_correspond_path(self):
+        from Crypto.Cipher import PKCS1_OAEP
+        from Crypto.Hash import SHA256
+        from Crypto.PublicKey import RSA
         ts = round(time.time() * 1000)
-        cipher = PKCS1_OAEP.new(key, SHA256)
+        cipher = PKCS1_OAEP.new(RSA.importKey(PUBLIC_KEY), SHA256)
         encrypted = cipher.encrypt(f'refresh_{ts}'.encode())
         return binascii.b2a_hex(encrypted).decode()
 
     def save_refresh_token(self, refresh_token):
         """保存刷新令牌"""
         try:
-            with open(self.refresh_token_file, 'w', encoding='utf-8') as f:
-                f.write(refresh_token)
+            self.write_atomic(self.refresh_token_file, refresh_token)
         except Exception as e:
             raise Exception(f"❌ 保存 refresh_token 失败：{e}")
 
     def get_refresh_token(self):
         """获取刷新令牌"""
         try:
-            with open(self.refresh_token_file, 'r', encoding='utf-8') as f:
-                refresh_token = f.read().strip()
-            return refresh_token
+            return self.read_cached(self.refresh_token_file, lambda f: f.read().strip())
         except Exception as e:
             print(f"❌ 获取 refresh_token 失败：{e}")
             return None
@@ -134,8 +222,7 @@ class Auth:
         """获取用户数据"""
         try:
             if os.path.exists(self.userdata_file):
-                with open(self.userdata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return self.read_cached(self.userdata_file, json.load)
         except Exception as e:
             print(f"❌ 获取用户数据失败：{e}")
             return None
@@ -155,15 +242,14 @@ class Auth:
                 "DedeUserID__ckMd5": ck_md5,
                 "sid": sid,
             }
-            with open(self.userdata_file, 'w', encoding='utf-8') as f:
-                json.dump(userdata, f, indent=2, ensure_ascii=False)
+            self.write_atomic(self.userdata_file, json.dumps(userdata, indent=2, ensure_ascii=False))
         except Exception as e:
             raise Exception(f"❌ 保存用户数据失败：：{e}")
     
     def get_qrcode(self):
         """获取登录二维码"""
         try:
-            url = "https://passport.bilibili.com/x/passport-login/web/qrcode/generate"
+            url = self.passport_url + "/x/passport-login/web/qrcode/generate"
             response = self.session.get(url)
             data = response.json()
             if data['code'] == 0:
@@ -180,6 +266,7 @@ class Auth:
     
     def show_qrcode(self, qr_url):
         """在终端显示二维码"""
+        import qrcode
         qr = qrcode.QRCode(version=1, box_size=1, border=1)
         qr.add_data(qr_url)
         qr.make(fit=True)
@@ -189,7 +276,7 @@ class Auth:
     
     def check_qrcode_status(self, qrcode_key):
         """检查二维码登录状态"""
-        url = "https://passport.bilibili.com/x/passport-login/web/qrcode/poll"
+        url = self.passport_url + "/x/passport-login/web/qrcode/poll"
         params = {'qrcode_key': qrcode_key}
         response = self.session.get(url, params=params)
         return response
@@ -210,6 +297,7 @@ class Auth:
                 message = data['data'].get('message', '')
                 if code == 0:
                     print("🎉 登录成功！")
+                    self.nav_data = None
                     self.save_userdata()
                     self.save_refresh_token(data['data']['refresh_token'])
                     return True
@@ -229,14 +317,49 @@ class Auth:
                 print(f"❌ 解析登录状态时发生错误：{e}")
                 return False
     
+    def get_nav(self):
+        """
+        获取当前登录用户信息，成功后缓存在内存与本地文件中；
+        本地缓存的用户与当前 Cookie 中的 DedeUserID 一致时直接使用，不再请求接口；未登录时返回 None
+        """
+        if self.nav_data is not None:
+            return self.nav_data
+        identity = self.load_identity()
+        if identity is not None:
+            self.nav_data = identity
+            return self.nav_data
+        url = self.api_url + "/x/web-interface/nav"
+        response = self.session.get(url)
+        data = response.json()
+        if data['code'] == 0 and data['data']['isLogin']:
+            self.nav_data = data['data']
+            self.save_identity()
+            return self.nav_data
+        return None
+
+    def load_identity(self):
+        try:
+            identity = self.read_cached(self.identity_file, json.load)
+        except (OSError, ValueError):
+            return None
+        if str(identity.get('mid')) != str(self.session.cookies.get("DedeUserID")):
+            return None
+        return identity
+
+    def save_identity(self):
+        if self.read_only:
+            return
+        try:
+            identity = {'uname': self.nav_data.get('uname'), 'mid': self.nav_data.get('mid')}
+            self.write_atomic(self.identity_file, json.dumps(identity, ensure_ascii=False))
+        except Exception as e:
+            print(f"❗ 保存用户信息失败：{e}")
+
     def print_user_info(self):
         """打印用户信息"""
         try:
-            url = "https://api.bilibili.com/x/web-interface/nav"
-            response = self.session.get(url)
-            data = response.json()
-            if data['code'] == 0 and data['data']['isLogin']:
-                user_data = data['data']
+            user_data = self.get_nav()
+            if user_data:
                 print(f"👤 当前登录用户：{user_data.get('uname')}({user_data.get('mid')})")
                 return True
             else:
@@ -249,11 +372,8 @@ class Auth:
     def get_user_info(self):
         """获取用户信息"""
         try:
-            url = "https://api.bilibili.com/x/web-interface/nav"
-            response = self.session.get(url)
-            data = response.json()
-            if data['code'] == 0 and data['data']['isLogin']:
-                user_data = data['data']
+            user_data = self.get_nav()
+            if user_data:
                 return user_data.get('uname'), user_data.get('mid')
             else:
                 print("❌ 未登录或登录已过期！")
@@ -265,7 +385,7 @@ class Auth:
     def check_cookie(self):
         """检查 Cookie，过期自动刷新"""
         print("🚀 开始检查 Cookie 是否有效...")
-        url = "https://passport.bilibili.com/x/passport-login/web/cookie/info"
+        url = self.passport_url + "/x/passport-login/web/cookie/info"
         params = {'csrf': self.get_userdata()['bili_jct']}
         response = self.session.get(url, params=params)
         data = response.json()
@@ -284,10 +404,18 @@ class Auth:
         print("-" * 27)
         print("🔒 哔哩哔哩用户认证模块 ")
         print("-" * 27)
+        if self.read_only:
+            if self.load_userdata() and self.print_user_info():
+                return True
+            print("❌ 本地登录数据无效，请先运行 autoreply.py 登录或刷新 Cookie")
+            return False
         if self.load_userdata():
             if self.check_cookie() == False:
                 os.remove(self.userdata_file)
                 os.remove(self.refresh_token_file)
+                if os.path.exists(self.identity_file):
+                    os.remove(self.identity_file)
+                self.nav_data = None
                 print("🤯 准备重新登录...")
             elif self.print_user_info():
                 return True
@@ -1,331 +1,450 @@
+import argparse
 import os
+import sys
 import time
-import json
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
 from auth import Auth
-
-# 回复频率（单位：分钟）
+from store import ReplyStore
+from cursor import Cursor
+from scheduler import AdaptiveScheduler
+from client import CommentClient
+from dispatcher import ReplyDispatcher
+from rules import RuleEngine
+from workers import WorkerPool
+from metrics import Counter, Gauge, Histogram, process_tree_rss, process_uptime, start_http_server
+from config import ConfigFile, non_empty_text, optional_text, positive_number
+
+# 回复频率（单位：分钟），作为自适应轮询间隔的上限
 frequency = 3
+# 轮询间隔下限（单位：秒），有新评论时最快按此间隔检测
+min_frequency_seconds = 20
 
-# 回复话术
+# 回复话术（没有回复规则命中时使用）
 follow_user_reply_template = "发过去了！"
 not_follow_user_reply_template = "麻烦关注一下哈，不然收不到消息～"
-
-# 认证
-userdata = None
-username = None
-auth_client = Auth()
-if auth_client.login():
-    userdata = auth_client.get_userdata()
-    username = auth_client.get_user_info()[0]
-else:
-    raise Exception("💔 未登录成功！")
-
-# 脚本开始
-input_time_str = input("请输入开始扫描的时间，默认使用当前时间(yyyy-MM-dd HH:mm:ss): ").strip()
-if input_time_str:
-    try:
-        # 如果用户只输入了 "YYYY-MM-DD HH:MM:SS"，则自动添加当前的微秒部分
-        if len(input_time_str) == 19:  # "YYYY-MM-DD HH:MM:SS" 长度为 19
-            now_micro = datetime.now().microsecond
-            input_time_str = input_time_str + f".{now_micro:06d}"
-        last_seen_timestamp = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S.%f")
-        print(f"使用输入的时间：{last_seen_timestamp}")
-    except Exception as e:
-        print(f"解析时间失败，使用当前时间，错误信息：{e}")
-        last_seen_timestamp = datetime.now()
-else:
-    last_seen_timestamp = datetime.now()
-
-# 存储已回复过的评论（采用“用户mid-评论时间”的组合作为标识，同一用户多次评论也会分别记录）
-replied_comments = set()
-# 排除回复的用户名，默认不回复自己
-exclude_username = username
-
-# Chrome 配置
-chrome_options = Options()
-user_data_dir = os.path.join(os.getcwd(), "chrome_user_data", "session_" + str(os.getpid()))
-chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-chrome_options.add_argument("--headless")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--ignore-certificate-errors")
-chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-chrome_options.add_argument("--disable-extensions")
-chrome_options.add_argument("--disable-popup-blocking")
-chrome_options.add_argument("--disable-default-apps")
-chrome_options.add_argument("--window-size=1920,1080")
-chrome_options.add_argument("--lang=zh-CN")
-
-# 启动 Chrome 浏览器
-print("正在启动 Chrome，请稍后...")
-driver = webdriver.Chrome(options=chrome_options)
-
-# 加载 Cookie
-driver.get("https://www.bilibili.com")
-for name, value in userdata.items():
-    cookie = {
-        'name': name,
-        'value': value,
-        'domain': '.bilibili.com',
-        'path': '/'
-    }
-    driver.add_cookie(cookie)
-driver.refresh()
-print("Cookie 加载完成")
-
-# 打开评论页面
-print("正在打开评论页面...")
-driver.get("https://member.bilibili.com/platform/comment/article")
-
-def parse_comment_time(time_str):
+# 回复规则文件（按评论内容中的关键词或正则选择话术，参见 rules.py），修改后下一轮会话自动生效
+rules_file = 'rules.json'
+# 配置文件（参见 config.py）：回复频率、话术与排除回复的用户名可在文件中修改，下一轮会话开始前生效，无需重启
+config_file = 'config.json'
+
+# 接口地址（可指向本地桩服务进行测试）
+api_base_url = "https://api.bilibili.com"
+# 每页拉取的评论数量
+page_size = 20
+# 扫描的评论内容类型（1：视频，12：专栏，17：动态），每种类型单独记录扫描游标
+comment_types = [1]
+# 同时在途的回复请求数量上限
+max_in_flight = 5
+# 回复工作进程数量：大于 0 时扫描与回复分离，回复按评论用户 mid 分片交给多个工作进程并行提交（参见 workers.py）
+worker_processes = 0
+# 已回复评论与扫描进度的持久化文件
+store_file = '.replied.db'
+# 指标端点端口（http://127.0.0.1:<端口>/metrics），为 None 时不启动
+metrics_port = 9108
+
+# 没有保存的扫描进度时开始扫描的时间（yyyy-MM-dd HH:mm:ss），依次取命令行参数 --start-time 与该环境变量
+start_time_arg = None
+start_time_env = 'AUTOREPLY_START_TIME'
+
+# 自适应轮询调度器
+scheduler = None
+# 配置文件
+config = None
+
+# 运行指标
+PAGE_LOAD = Histogram('autoreply_page_load_seconds', '拉取一页评论的耗时（秒）', ['account'])
+SESSION_DURATION = Histogram('autoreply_session_duration_seconds', '一轮会话扫描的耗时（秒）', ['account'])
+COMMENT_DECISION = Histogram('autoreply_comment_decision_seconds', '单条评论判断是否回复的耗时（秒）', ['account'],
+                             buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1))
+REPLY_SUBMIT = Histogram('autoreply_reply_submit_seconds', '提交一条回复的耗时（秒）', ['account'])
+COMMENTS_SEEN = Counter('autoreply_comments_seen_total', '扫描到的新评论数', ['account'])
+COMMENTS_REPLIED = Counter('autoreply_comments_replied_total', '成功回复的评论数', ['account'])
+COMMENTS_SKIPPED = Counter('autoreply_comments_skipped_total', '跳过回复的新评论数', ['account', 'reason'])
+COMMENTS_FAILED = Counter('autoreply_comments_failed_total', '回复失败的评论数', ['account'])
+PAGE_FAILURES = Counter('autoreply_page_failures_total', '拉取评论列表失败次数', ['account'])
+BACKLOG = Gauge('autoreply_backlog', '等待提交的回复数', ['account'])
+WATERMARK_LAG = Gauge('autoreply_watermark_lag_seconds', '扫描游标落后当前时间的秒数', ['account', 'type'])
+PROCESS_RSS = Gauge('autoreply_process_rss_bytes', '进程常驻内存（字节）')
+STARTUP = Gauge('autoreply_startup_seconds', '进程启动到开始首次扫描的耗时（秒）')
+
+
+# 可在配置文件中修改的配置项 -> (校验函数, 期望值说明)；exclude_username 应用到每个账号，为 null 时各账号不回复自己
+CONFIG_SCHEMA = {
+    'frequency': (positive_number, "正数（分钟）"),
+    'min_frequency_seconds': (positive_number, "正数（秒）"),
+    'follow_user_reply_template': (non_empty_text, "非空字符串"),
+    'not_follow_user_reply_template': (non_empty_text, "非空字符串"),
+    'exclude_username': (optional_text, "字符串或 null"),
+}
+
+
+def reload_config(bots=()):
     """
-    将评论时间字符串解析为 datetime 对象。
-    示例格式：'2025-03-25 21:27:38'
+    配置文件修改时间变化时重新加载，校验通过后一次性应用到运行中的程序与各账号，返回发生变化的配置项；
+    在两轮会话之间调用，登录状态不受影响
     """
-    try:
-        return datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-    except Exception as e:
-        print(f"解析时间失败: '{time_str}' -> {e}")
-        return None
+    global config
+    if config is None:
+        defaults = {key: globals()[key] for key in CONFIG_SCHEMA if key != 'exclude_username'}
+        config = ConfigFile(config_file, CONFIG_SCHEMA, dict(defaults, exclude_username=None))
+    values = config.reload_if_changed()
+    if values is None:
+        return {}
+    exclude_username = values.pop('exclude_username')
+    changed = {key: value for key, value in values.items() if globals()[key] != value}
+    globals().update(changed)
+    for bot in bots:
+        bot.apply_exclude_username(exclude_username)
+    if scheduler is not None:
+        scheduler.min_interval = min_frequency_seconds
+        scheduler.max_interval = frequency * 60
+    for key, value in changed.items():
+        print(f"⚙️ 配置 {key} 更新为：{value}")
+    return changed
+
+
+def read_start_time():
+    """
+    读取开始扫描的时间，仅在没有保存的扫描进度时使用：
+    依次取命令行参数 --start-time 与环境变量 AUTOREPLY_START_TIME，均未指定时在终端中询问，
+    非交互运行（如 systemd 托管）时直接使用当前时间，不会阻塞在输入上
+    """
+    input_time_str = (start_time_arg or os.environ.get(start_time_env, '')).strip()
+    if not input_time_str and sys.stdin.isatty():
+        input_time_str = input("请输入开始扫描的时间，默认使用当前时间(yyyy-MM-dd HH:mm:ss): ").strip()
+    if input_time_str:
+        try:
+            start_time = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S")
+            print(f"使用输入的时间：{start_time}")
+        except Exception as e:
+            print(f"解析时间失败，使用当前时间，错误信息：{e}")
+            start_time = datetime.now()
+    else:
+        start_time = datetime.now()
+    return start_time
 
-def get_comment_identifier(comment):
+
+def parse_comment_time(ctime):
     """
-    获取评论标识，采用用户头像的 mid 与评论时间组合，保证同一用户多次评论也能分别回复。
+    将评论的 ctime（秒级时间戳）解析为 datetime 对象。
     """
     try:
-        avatar = comment.find_element(By.XPATH, ".//a[contains(@class, 'user-avatar')]")
-        mid = avatar.get_attribute("mid")
-        time_element = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-action')]//span[@class='date']")
-        time_str = time_element.text.strip()
-        return f"{mid}-{time_str}"
-    except Exception:
+        return datetime.fromtimestamp(ctime)
+    except Exception as e:
+        print(f"解析时间失败: '{ctime}' -> {e}")
         return None
 
-def is_comment_replied(comment):
+def get_comment_identifier(comment):
     """
-    判断此评论是否已回复过。
+    获取评论标识，接口直接返回评论 rpid，无需再拼接 mid 与时间。
     """
-    cid = get_comment_identifier(comment)
-    return cid in replied_comments if cid else False
+    return str(comment['rpid'])
 
 def get_follow_status(comment):
     """
-    从评论中查找关注状态，查找 ci-title 中的 relation-label，
-    如果有显示（style 中不包含 "display: none"）且有文本，则返回该文本，否则返回空字符串。
+    返回评论用户的关注标签（"已关注"/"粉丝"），无关系时返回空字符串。
     """
-    try:
-        ci_title = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-title')]")
-        labels = ci_title.find_elements(By.XPATH, ".//span[contains(@class, 'relation-label')]")
-        for label in labels:
-            style = label.get_attribute("style") or ""
-            text = label.text.strip()
-            if "display: none" not in style and text:
-                return text
-        return ""
-    except Exception:
-        return ""
+    return comment['relation']
 
 def has_reply_tag(comment):
     """
-    判断评论的标题区域是否包含回复标签，
-    检查是否有 <span class="ci-title-split">回复</span>，
-    如果存在则说明该评论已为回复，不需要再次回复。
+    判断评论是否为楼中楼回复（parent 不为 0），楼中楼回复不需要再次回复。
     """
-    try:
-        ci_title = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-title')]")
-        reply_tags = ci_title.find_elements(By.XPATH, ".//span[contains(@class, 'ci-title-split')]")
-        for tag in reply_tags:
-            if tag.text.strip() == "回复":
-                return True
-        return False
-    except Exception:
-        return False
+    return comment['parent'] != 0
+
 
-def reply_to_comment(comment):
+class AutoReply:
     """
-    执行回复操作：
-      - 如果评论的用户名等于排除用户名，则跳过回复；
-      - 根据关注状态决定回复内容：
-           如果 follow_status 在 ["已关注", "粉丝"] 中，则回复 "发你啦！"，否则回复 "关注一下哈，不然发不过去"；
-      - 点击回复链接、输入回复内容、点击提交成功后，将该评论标识记录到 replied_comments 中。
+    单个账号的扫描与回复状态：评论接口客户端、回复分发、已回复索引与扫描进度
     """
-    try:
-        user_avatar = comment.find_element(By.XPATH, ".//a[contains(@class, 'user-avatar')]")
-        username = user_avatar.get_attribute("card") or user_avatar.text.strip()
-    except Exception:
-        username = "未知用户"
-
-    if exclude_username and username == exclude_username:
-        print(f"跳过用户 {username}（排除回复）")
-        return False
-
-    # 已经回复过的评论跳过
-    if is_comment_replied(comment):
-        print(f"评论 {username} 已回复，跳过")
-        return False
-
-    follow_status = get_follow_status(comment)
-    if follow_status in ["已关注", "粉丝"]:
-        reply_content = follow_user_reply_template
-    else:
-        reply_content = not_follow_user_reply_template
-
-    print(f"准备回复用户：{username}，回复内容：{reply_content}")
-
-    try:
-        # 点击回复链接，查找包含文字 "回复" 的链接元素
-        reply_link = comment.find_element(By.XPATH, ".//span[contains(@class, 'reply action')]/a[text()='回复']")
-        reply_link.click()
-        time.sleep(1)  # 等待回复框出现
-    except Exception as e:
-        print(f"点击回复按钮失败：{e}")
-        return False
-
-    try:
-        # 找到回复输入框（textarea），清空后输入回复内容
-        reply_box = comment.find_element(By.XPATH, ".//div[contains(@class, 'reply-wrap')]//textarea")
-        reply_box.clear()
-        reply_box.send_keys(reply_content)
-    except Exception as e:
-        print(f"无法找到回复输入框：{e}")
+    # 主进程负责在后台刷新 Cookie，并在配置了 worker_processes 时启动回复工作进程池；补扫等辅助进程不做这两件事
+    primary = True
+
+    def __init__(self, client, replied_comments, exclude_username=None, name=None, worker_pool=None):
+        self.name = name
+        # 指标中的账号标签
+        self.account = name or 'default'
+        self.rule_engine = RuleEngine(rules_file)
+        self.client = client
+        self.dispatcher = ReplyDispatcher(client, max_in_flight=max_in_flight)
+        # 回复工作进程池，为 None 时在本进程内并发提交
+        self.worker_pool = worker_pool
+        # 存储已回复过的评论（采用评论 rpid 作为标识，同一用户多次评论也会分别记录）
+        self.replied_comments = replied_comments
+        # 排除回复的用户名，默认不回复自己（当前登录的用户名）
+        self.username = exclude_username
+        self.exclude_username = exclude_username
+        # 每种内容类型的扫描游标
+        self.cursors = self.load_cursors()
+
+    def load_cursors(self):
+        """读取每种内容类型保存的扫描游标，没有保存的进度时询问开始扫描的时间"""
+        cursors = {}
+        start_time = None
+        for comment_type in comment_types:
+            cursor = self.replied_comments.get_cursor(comment_type)
+            if cursor is not None:
+                self.log(f"类型 {comment_type} 从上次保存的游标继续扫描：{cursor}")
+            else:
+                if start_time is None:
+                    start_time = read_start_time()
+                cursor = Cursor(start_time)
+            cursors[comment_type] = cursor
+        return cursors
+
+    @classmethod
+    def from_auth(cls, auth_client, store_file=store_file, name=None):
+        """登录账号并创建对应的评论接口客户端与已回复索引"""
+        if not auth_client.login():
+            raise Exception(f"💔 {name or ''}未登录成功！")
+        userdata = auth_client.get_userdata()
+        client = CommentClient(auth_client.session, userdata['bili_jct'], base_url=api_base_url)
+        if cls.primary:
+            # 后台刷新 Cookie 后 bili_jct 会变化，同步更新回复接口使用的 csrf
+            auth_client.start_refresher(on_refresh=lambda userdata: setattr(client, 'csrf', userdata['bili_jct']))
+        worker_pool = None
+        if worker_processes > 0 and cls.primary:
+            worker_pool = WorkerPool(worker_processes, auth_client.userdata_file, auth_client.refresh_token_file,
+                                     store_file, api_base_url)
+        return cls(client, ReplyStore(store_file), exclude_username=auth_client.get_user_info()[0], name=name,
+                   worker_pool=worker_pool)
+
+    def apply_exclude_username(self, exclude_username):
+        """应用配置文件中排除回复的用户名，为 None 时不回复自己"""
+        exclude_username = exclude_username or self.username
+        if exclude_username != self.exclude_username:
+            self.exclude_username = exclude_username
+            self.log(f"⚙️ 排除回复的用户名更新为：{exclude_username}")
+
+    def log(self, *args):
+        """多账号运行时在输出前加上账号名"""
+        if self.name:
+            print(f"[{self.name}]", *args)
+        else:
+            print(*args)
+
+    def is_comment_replied(self, comment):
+        """
+        判断此评论是否已回复过。
+        """
+        return get_comment_identifier(comment) in self.replied_comments
+
+    def prepare_reply(self, comment):
+        """
+        判断是否需要回复该评论，需要时返回回复内容，否则返回 None：
+          - 如果评论的用户名等于排除用户名，则跳过回复；
+          - 优先使用命中的回复规则，否则根据关注状态决定回复内容。
+        """
+        username = comment['username'] or "未知用户"
+
+        if self.exclude_username and username == self.exclude_username:
+            self.log(f"跳过用户 {username}（排除回复）")
+            return None
+
+        # 已经回复过的评论跳过
+        if self.is_comment_replied(comment):
+            self.log(f"评论 {username} 已回复，跳过")
+            return None
+
+        follow_status = get_follow_status(comment)
+        reply_content = self.rule_engine.choose_reply(comment['message'], follow_status)
+        if reply_content is not None:
+            return reply_content
+        if follow_status in ["已关注", "粉丝"]:
+            return follow_user_reply_template
+        return not_follow_user_reply_template
+
+    def dispatch_replies(self, jobs):
+        """
+        并发提交一批回复，返回成功回复的数量
+        """
+        if self.worker_pool is not None:
+            # 交给工作进程后立即返回，继续扫描，结果在之后的 collect_replies 中统计
+            for comment, message in jobs:
+                self.worker_pool.submit(get_comment_identifier(comment), comment, message)
+            self.collect_replies()
+            return len(jobs)
+        return sum(self.record_reply_result(result) for result in self.dispatcher.dispatch(jobs))
+
+    def collect_replies(self, timeout=0):
+        """取回工作进程已完成的回复结果，返回成功回复的数量"""
+        if self.worker_pool is None:
+            return 0
+        replied_count = sum(self.record_reply_result(result) for result in self.worker_pool.collect(timeout))
+        BACKLOG.set(self.worker_pool.pending, account=self.account)
+        return replied_count
+
+    def record_reply_result(self, result):
+        """记录一条回复结果的日志与指标，回复成功返回 True"""
+        comment = result['comment']
+        username = comment['username'] or "未知用户"
+        if result.get('duplicate'):
+            COMMENTS_SKIPPED.inc(account=self.account, reason="already_replied")
+            self.log(f"评论 {username} 已由其他进程回复，跳过")
+            return False
+        REPLY_SUBMIT.observe(result['latency'], account=self.account)
+        if result['ok']:
+            COMMENTS_REPLIED.inc(account=self.account)
+            self.replied_comments.add(get_comment_identifier(comment))
+            self.log(f"已成功回复 {username}（耗时 {result['latency'] * 1000:.0f} ms）")
+            return True
+        COMMENTS_FAILED.inc(account=self.account)
+        self.log(f"回复 {username} 失败（耗时 {result['latency'] * 1000:.0f} ms）：{result['error']}")
         return False
 
-    try:
-        # 找到提交回复的按钮，查找按钮内包含文字 "发表回复"
-        submit_btn = comment.find_element(By.XPATH, ".//div[contains(@class, 'reply-wrap')]//button[.//span[text()='发表回复']]")
-        submit_btn.click()
-        print(f"已成功回复 {username}")
+    def close(self):
+        if self.worker_pool is not None:
+            self.collect_replies(timeout=None)
+            self.worker_pool.close()
+        # 释放并发回复的线程池（重新加载账号或退出时调用）
+        self.dispatcher.close()
+
+    def decide(self, comment, cursor, next_cursor):
+        """
+        判断单条评论的处理方式，返回 (决定, 回复内容)：
+        决定为 "reply" 时需要回复，否则为跳过原因（seen 表示在游标之前、已扫描过）
+        """
+        comment_time = parse_comment_time(comment['ctime'])
+        if comment_time is None:
+            return "bad_time", None
         cid = get_comment_identifier(comment)
-        if cid:
-            replied_comments.add(cid)
-        time.sleep(1)
-        return True
-    except Exception as e:
-        print(f"点击提交按钮失败：{e}")
-        return False
 
-def process_current_page():
-    """
-    扫描当前页所有评论：
-      - 对每条评论解析时间（格式：YYYY-MM-DD HH:MM:SS）
-      - 如果评论未回复（即不包含回复标签且未记录在 replied_comments 中），则进行回复
-      - 对于时间晚于 last_seen_timestamp 的评论（即本轮内真正新出现的评论），更新页面的最大时间
-      - 返回一个二元组 (page_has_eligible, page_max_time)
-        其中 page_has_eligible 表示本页是否有符合回复条件的评论（即有回复动作），
-        page_max_time 为本页中所有新回复评论的最大时间（不更新全局），旧评论则不参与更新
-    """
-    comment_items = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]")
-    print("当前加载评论数量：", len(comment_items))
-    page_has_eligible = False
-    page_max_time = last_seen_timestamp
-    for comment in comment_items:
-        try:
-            time_element = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-action')]//span[@class='date']")
-            time_str = time_element.text.strip()
+        if cursor.is_seen(comment_time, cid):
+            return "seen", None
+        next_cursor.advance(comment_time, cid)
 
-            if not time_str:
-                print("调试：未获取到时间文本，元素内容：", time_element.get_attribute("outerHTML"))
+        if has_reply_tag(comment):
+            self.log("评论包含回复标签，视为已回复，跳过回复")
+            return "reply_tag", None
+
+        if self.is_comment_replied(comment):
+            return "already_replied", None
+
+        reply_content = self.prepare_reply(comment)
+        if reply_content is None:
+            return "excluded_user", None
+        return "reply", reply_content
+
+    def process_current_page(self, comments, cursor, next_cursor):
+        """
+        处理一页评论记录：
+          - 游标之前的评论均已扫描过，跳过，并标记本页已到达游标
+          - 新评论推进 next_cursor；如果评论未回复（即不是楼中楼回复且未记录在 replied_comments 中），
+            则加入待回复列表，整页判断完成后并发提交
+          - 返回一个三元组 (page_has_eligible, reached_cursor, page_new_count)
+        """
+        self.log("当前加载评论数量：", len(comments))
+        page_has_eligible = False
+        reached_cursor = False
+        page_new_count = 0
+        jobs = []
+        for comment in comments:
+            with COMMENT_DECISION.time(account=self.account):
+                decision, reply_content = self.decide(comment, cursor, next_cursor)
+            if decision == "seen":
+                reached_cursor = True
                 continue
-            comment_time = parse_comment_time(time_str)
-            if comment_time is None:
+            if decision == "bad_time":
                 continue
-        except Exception as e:
-            print("解析评论时间异常：", e)
-            continue
-
-        # 如果评论时间不大于 last_seen_timestamp，则跳过（即只处理之后产生的评论）
-
-        if comment_time <= last_seen_timestamp:
-            continue
-
-        # 如果此评论发布时间晚于上次记录的最新时间，则将其视为新评论，用于更新会话内最大时间
-        if comment_time > last_seen_timestamp and comment_time > page_max_time:
-            page_max_time = comment_time
-
-        if has_reply_tag(comment):
-            print("评论包含回复标签，视为已回复，跳过回复")
-            continue
-
-        if not is_comment_replied(comment):
-            if reply_to_comment(comment):
-                page_has_eligible = True
-
-    return page_has_eligible, page_max_time
-
-def click_next_page():
-    """
-    点击下一页按钮，xpath: //li[contains(@class, 'bcc-pagination-next')]
-    """
-    try:
-        next_page_btn = driver.find_element(By.XPATH, "//li[contains(@class, 'bcc-pagination-next')]")
-        next_page_btn.click()
-        time.sleep(3)  # 等待页面加载
-        return True
-    except Exception as e:
-        print("点击下一页失败：", e)
-        return False
-
-def process_session():
-    """
-    单次扫描会话：
-      - 从当前页面开始，依次扫描所有评论，尝试回复所有未回复的评论
-      - 对每一页，收集新回复评论的最大时间（page_max_time），用于更新全局 last_seen_timestamp
-      - 如果当前页无符合回复条件的评论，则进行一次容错扫描（点击下一页再检测一次）
-      - 当容错页面仍无符合回复条件的评论时结束本轮会话扫描，
-        最后将本会话中新回复的最大评论时间更新到全局 last_seen_timestamp（旧未回复评论将会在下次会话中继续处理）
-    """
-    global last_seen_timestamp
-    session_max_time = last_seen_timestamp
-    print("当前 last_seen_timestamp：", last_seen_timestamp)
-    while True:
-        page_replied, page_max_time = process_current_page()
-
-        if page_max_time > session_max_time:
-            session_max_time = page_max_time
-
-        if page_replied:
-            # 当前页有符合条件回复的评论，直接点击下一页继续扫描
-            if not click_next_page():
-                print("下一页按钮不存在，结束本轮会话扫描")
-                break
-        else:
-            # 当前页无符合条件评论，进行一次容错扫描：点击下一页再检测一次
-            print("当前页面无符合回复条件的评论，进行容错扫描下一页")
-            if not click_next_page():
-                print("下一页按钮不存在，结束本轮会话扫描")
-                break
-            fault_page_replied, fault_page_max_time = process_current_page()
-            if fault_page_max_time > session_max_time:
-                session_max_time = fault_page_max_time
-            if fault_page_replied:
-                if not click_next_page():
-                    print("无法点击下一页，结束本轮会话扫描")
+            page_new_count += 1
+            COMMENTS_SEEN.inc(account=self.account)
+            if decision != "reply":
+                COMMENTS_SKIPPED.inc(account=self.account, reason=decision)
+                continue
+            self.log(f"准备回复用户：{comment['username'] or '未知用户'}，回复内容：{reply_content}")
+            jobs.append((comment, reply_content))
+
+        BACKLOG.set(len(jobs) + (self.worker_pool.pending if self.worker_pool else 0), account=self.account)
+        if jobs and self.dispatch_replies(jobs) > 0:
+            page_has_eligible = True
+        BACKLOG.set(self.worker_pool.pending if self.worker_pool else 0, account=self.account)
+
+        return page_has_eligible, reached_cursor, page_new_count
+
+    def process_type(self, comment_type):
+        """
+        扫描一种内容类型的评论：
+          - 评论列表按时间倒序返回，逐页处理，到达游标所在页（或列表末尾）时结束翻页，
+            与本页是否有回复无关
+          - 完整扫描到游标后才保存新的游标，中途出错时下次从原游标重新扫描（已回复的评论不会重复回复）
+          - 返回新评论数量
+        """
+        cursor = self.cursors[comment_type]
+        next_cursor = cursor.copy()
+        new_count = 0
+        self.log(f"类型 {comment_type} 当前游标：{cursor}")
+        try:
+            page_start = time.perf_counter()
+            for pn, comments in self.client.iter_comments(ps=page_size, type=comment_type):
+                PAGE_LOAD.observe(time.perf_counter() - page_start, account=self.account)
+                _, reached_cursor, page_new_count = self.process_current_page(comments, cursor, next_cursor)
+                new_count += page_new_count
+                if reached_cursor:
+                    self.log(f"第 {pn} 页已到达上次扫描位置，结束翻页")
                     break
-            else:
-                print("容错扫描页面无符合回复条件的评论，本轮会话扫描结束")
-                break
-
-    print("更新 last_seen_timestamp 为：", session_max_time)
-    last_seen_timestamp = session_max_time
-
-def main_loop():
+                page_start = time.perf_counter()
+        except Exception as e:
+            PAGE_FAILURES.inc(account=self.account)
+            self.log("拉取评论列表失败：", e)
+            return new_count
+
+        self.log(f"类型 {comment_type} 更新游标为：{next_cursor}")
+        self.cursors[comment_type] = next_cursor
+        self.replied_comments.set_cursor(comment_type, next_cursor)
+        WATERMARK_LAG.set((datetime.now() - next_cursor.time).total_seconds(), account=self.account, type=comment_type)
+        return new_count
+
+    def process_session(self):
+        """
+        单次扫描会话：依次扫描每种内容类型，返回本轮会话发现的新评论数量
+        """
+        self.rule_engine.reload_if_changed()
+        with SESSION_DURATION.time(account=self.account):
+            new_count = sum(self.process_type(comment_type) for comment_type in comment_types)
+        self.collect_replies()
+        PROCESS_RSS.set(process_tree_rss(os.getpid()))
+        return new_count
+
+
+def report_startup():
+    """记录进程启动到开始首次扫描的耗时"""
+    startup = process_uptime()
+    STARTUP.set(startup)
+    print(f"⚡ 启动耗时 {startup:.2f} 秒")
+
+
+def parse_args():
+    global start_time_arg
+    parser = argparse.ArgumentParser(description="B站评论自动回复")
+    parser.add_argument('--start-time', help="没有保存的扫描进度时开始扫描的时间（yyyy-MM-dd HH:mm:ss），默认当前时间")
+    args = parser.parse_args()
+    start_time_arg = args.start_time
+    return args
+
+
+def main_loop(bot):
     """
-    主循环：每隔 frequency 分钟刷新页面，启动一次新的会话扫描
+    主循环：启动一次新的会话扫描，由自适应调度器决定下一次检测的时间
     """
+    global scheduler
+    if metrics_port:
+        start_http_server(metrics_port)
+    reload_config([bot])
+    scheduler = AdaptiveScheduler(min_interval=min_frequency_seconds, max_interval=frequency * 60)
+    report_startup()
     while True:
-        driver.get("https://member.bilibili.com/platform/comment/article")
-        time.sleep(3)
+        reload_config([bot])
         print(f"----------> [{datetime.now()}] 开始新一轮检测新评论...")
-        process_session()
-        print(f"本轮检测结束，等待 {frequency} 分钟后再次检测。")
-        time.sleep(frequency * 60)
+        new_count = bot.process_session()
+        scheduler.record(new_count)
+        print(f"本轮检测结束，发现 {new_count} 条新评论，{scheduler.describe()}")
+        scheduler.wait()
 
 if __name__ == "__main__":
+    parse_args()
+    bot = AutoReply.from_auth(Auth())
     try:
-        main_loop()
+        main_loop(bot)
     finally:
-        driver.quit()
+        bot.close()
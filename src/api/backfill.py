@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史评论补扫
+按时间范围补扫创作中心的历史评论，与常规轮询（autoreply.py）分开运行，互不干扰：
+  - 进度保存在独立的检查点（backfill:<类型>:<开始时间>-<结束时间>）中，每处理完一页保存一次，
+    中断后重新运行同样的命令即从保存的位置继续；常规轮询的扫描游标不受影响
+  - 恢复时二分查找进度所在的页码，不必从第 1 页重新翻页
+  - 处理当前页的回复时预取下一页，回复按速率上限匀速并发提交，遇到频率限制时暂停后重试
+  - 结束时间默认取常规轮询已保存的扫描游标，补扫范围与常规轮询不重叠；两者共用已回复记录，同一条评论不会回复两次
+  - 补扫进程以只读方式登录，不检查、不刷新 Cookie（由常规轮询进程负责），每页开始前同步本地用户数据文件中的最新登录状态
+
+python src/api/backfill.py --since "2025-01-01 00:00:00" [--until "2025-03-01 00:00:00"] [--type 1] [--restart]
+"""
+
+import argparse
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
+import autoreply
+from auth import Auth
+from autoreply import AutoReply, get_comment_identifier, has_reply_tag, parse_comment_time
+from autoreply import COMMENTS_SEEN, COMMENTS_SKIPPED, PAGE_FAILURES, PAGE_LOAD
+from cursor import Cursor
+from metrics import Gauge, start_http_server
+
+# 补扫回复速率上限（条/分钟）
+replies_per_minute = 20
+# 遇到频率限制时首次暂停的时间（单位：秒），连续触发时加倍
+rate_limit_pause = 60
+# 同一页连续遇到频率限制的最多重试次数，超过后保存进度并退出
+max_rate_limit_retries = 5
+# 表示请求过于频繁或被拦截的接口错误码
+rate_limit_codes = (-412, -509)
+# 指标端点端口，与常规轮询同时运行时需使用不同的端口，为 None 时不启动
+metrics_port = 9109
+
+BACKFILL_PROGRESS = Gauge('autoreply_backfill_progress_ratio', '补扫已完成的时间范围比例', ['account', 'type'])
+
+
+def parse_time(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+
+def is_done(position, comment_time, cid):
+    """补扫从新到旧进行，进度之后（更新）的评论均已处理"""
+    return comment_time > position.time or (comment_time == position.time and cid in position.ids)
+
+
+def retreat(position, comment_time, cid):
+    """将补扫进度推进到更早的评论"""
+    if comment_time < position.time:
+        position.time = comment_time
+        position.ids = {cid}
+    elif comment_time == position.time:
+        position.ids.add(cid)
+
+
+def is_rate_limited(result):
+    """回复结果是否因频率限制失败（按接口错误码判断）"""
+    return result['code'] in rate_limit_codes
+
+
+class Backfill(AutoReply):
+    """
+    补扫一种内容类型在指定时间范围内的评论；回复判断、并发提交与指标沿用 AutoReply，
+    不读取也不保存常规轮询的扫描游标
+    """
+    primary = False
+
+    @classmethod
+    def from_auth(cls, auth_client, store_file=autoreply.store_file, name='backfill'):
+        bot = super().from_auth(auth_client, store_file=store_file, name=name)
+        bot.auth_client = auth_client
+        bot.userdata = auth_client.get_userdata()
+        # 下一批回复最早的提交时间
+        bot.next_reply_at = 0.0
+        return bot
+
+    def load_cursors(self):
+        return {}
+
+    def sync_login(self):
+        """常规轮询进程刷新 Cookie 后会重写用户数据文件，这里据文件修改时间同步新的登录状态"""
+        latest = self.auth_client.get_userdata()
+        if latest is not self.userdata and latest:
+            self.userdata = latest
+            self.auth_client.load_userdata()
+            self.client.csrf = latest['bili_jct']
+
+    @staticmethod
+    def checkpoint_name(comment_type, since, until):
+        return f"backfill:{comment_type}:{since:%Y%m%d%H%M%S}-{until:%Y%m%d%H%M%S}"
+
+    def load_progress(self, name, until, restart=False):
+        """读取保存的补扫进度，没有保存的进度或要求重新补扫时从结束时间开始"""
+        value = None if restart else self.replied_comments.get_checkpoint(name)
+        if value is None:
+            return {'position': Cursor(until, []), 'page': 1, 'scanned': 0, 'replied': 0, 'done': False}
+        progress = json.loads(value)
+        progress['position'] = Cursor.loads(progress['position'])
+        return progress
+
+    def save_progress(self, name, progress):
+        self.replied_comments.set_checkpoint(name, json.dumps(dict(progress, position=progress['position'].dumps())))
+
+    def find_page(self, comment_type, position, ps):
+        """
+        二分查找第一页包含未处理评论的页码：评论按时间倒序排列，某页最后一条评论未处理，则之后各页均未处理
+        """
+        first_page, total = self.client.list_comments(pn=1, ps=ps, type=comment_type)
+        lo, hi = 1, max(math.ceil(total / ps), 1)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # 第 1 页已在取总数时拉取过，不再重复请求
+            comments = first_page if mid == 1 else self.client.list_comments(pn=mid, ps=ps, type=comment_type)[0]
+            if comments and is_done(position, parse_comment_time(comments[-1]['ctime']),
+                                    get_comment_identifier(comments[-1])):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def scan_page(self, comments, since, position):
+        """
+        判断一页评论，返回 (待回复列表, 新的进度, 本页新评论数, 是否已到达开始时间)
+        """
+        jobs = []
+        next_position = position.copy()
+        new_count = 0
+        reached_since = False
+        for comment in comments:
+            comment_time = parse_comment_time(comment['ctime'])
+            if comment_time is None:
+                continue
+            cid = get_comment_identifier(comment)
+            if is_done(position, comment_time, cid):
+                continue
+            if comment_time < since:
+                reached_since = True
+                break
+            retreat(next_position, comment_time, cid)
+            new_count += 1
+            COMMENTS_SEEN.inc(account=self.account)
+            if has_reply_tag(comment):
+                COMMENTS_SKIPPED.inc(account=self.account, reason="reply_tag")
+                continue
+            if self.is_comment_replied(comment):
+                COMMENTS_SKIPPED.inc(account=self.account, reason="already_replied")
+                continue
+            reply_content = self.prepare_reply(comment)
+            if reply_content is None:
+                COMMENTS_SKIPPED.inc(account=self.account, reason="excluded_user")
+                continue
+            jobs.append((comment, reply_content))
+        return jobs, next_position, new_count, reached_since
+
+    def dispatch_paced(self, jobs):
+        """
+        按速率上限分批并发提交回复，返回 (成功回复数, 遇到频率限制的回复)
+        """
+        interval = 60 / replies_per_minute
+        replied_count = 0
+        limited = []
+        for start in range(0, len(jobs), autoreply.max_in_flight):
+            batch = jobs[start:start + autoreply.max_in_flight]
+            delay = self.next_reply_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_reply_at = time.monotonic() + len(batch) * interval
+            for result in self.dispatcher.dispatch(batch):
+                if is_rate_limited(result):
+                    limited.append((result['comment'], result['message']))
+                else:
+                    replied_count += self.record_reply_result(result)
+        return replied_count, limited
+
+    def reply_page(self, jobs):
+        """
+        提交一页的回复，遇到频率限制时暂停并重试；重试次数用尽时抛出异常，本页进度不保存
+        """
+        replied_count, limited = self.dispatch_paced(jobs)
+        for attempt in range(1, max_rate_limit_retries + 1):
+            if not limited:
+                return replied_count
+            pause = rate_limit_pause * 2 ** (attempt - 1)
+            self.log(f"⏳ {len(limited)} 条回复触发频率限制，暂停 {pause} 秒后重试（第 {attempt} 次）")
+            time.sleep(pause)
+            retried_count, limited = self.dispatch_paced(limited)
+            replied_count += retried_count
+        if limited:
+            raise Exception(f"❌ {len(limited)} 条回复持续触发频率限制，补扫暂停，稍后重新运行即可从保存的进度继续")
+        return replied_count
+
+    def run(self, comment_type, since, until, ps, restart=False):
+        """
+        补扫 [since, until] 范围内的评论，每处理完一页保存一次进度，返回最终的进度
+        """
+        name = self.checkpoint_name(comment_type, since, until)
+        progress = self.load_progress(name, until, restart)
+        if progress['done']:
+            self.log(f"类型 {comment_type} {since} ~ {until} 已补扫完成（扫描 {progress['scanned']} 条，"
+                     f"回复 {progress['replied']} 条），如需重新补扫请加 --restart")
+            return progress
+        position = progress['position']
+        pn = self.find_page(comment_type, position, ps)
+        self.log(f"类型 {comment_type} 补扫 {since} ~ {until}，当前进度：{position}，从第 {pn} 页开始")
+        total_seconds = max((until - since).total_seconds(), 1)
+        prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        try:
+            page_start = time.perf_counter()
+            future = prefetcher.submit(self.client.list_comments, pn=pn, ps=ps, type=comment_type)
+            while True:
+                try:
+                    comments, total = future.result()
+                except Exception:
+                    PAGE_FAILURES.inc(account=self.account)
+                    raise
+                PAGE_LOAD.observe(time.perf_counter() - page_start, account=self.account)
+                last_page = not comments or pn * ps >= total
+                if not last_page:
+                    # 处理本页回复的同时拉取下一页
+                    page_start = time.perf_counter()
+                    future = prefetcher.submit(self.client.list_comments, pn=pn + 1, ps=ps, type=comment_type)
+                autoreply.reload_config([self])
+                self.rule_engine.reload_if_changed()
+                self.sync_login()
+                jobs, next_position, new_count, reached_since = self.scan_page(comments, since, position)
+                replied_count = self.reply_page(jobs) if jobs else 0
+
+                position = next_position
+                progress.update(position=position, page=pn, scanned=progress['scanned'] + new_count,
+                                replied=progress['replied'] + replied_count, done=reached_since or last_page)
+                self.save_progress(name, progress)
+                ratio = 1.0 if progress['done'] else min((until - position.time).total_seconds() / total_seconds, 1.0)
+                BACKFILL_PROGRESS.set(ratio, account=self.account, type=comment_type)
+                self.log(f"第 {pn} 页：新评论 {new_count} 条，回复 {replied_count} 条，"
+                         f"进度 {position.time:%Y-%m-%d %H:%M:%S}（{ratio:.1%}）")
+                if progress['done']:
+                    break
+                pn += 1
+        finally:
+            prefetcher.shutdown(wait=False)
+        self.log(f"✅ 类型 {comment_type} 补扫完成：扫描 {progress['scanned']} 条，回复 {progress['replied']} 条")
+        return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="B站历史评论补扫")
+    parser.add_argument('--since', required=True, help="补扫的开始时间（yyyy-MM-dd HH:mm:ss）")
+    parser.add_argument('--until', help="补扫的结束时间（yyyy-MM-dd HH:mm:ss），默认取常规轮询的扫描游标，没有时取当前时间")
+    parser.add_argument('--type', type=int, default=autoreply.comment_types[0], help="评论内容类型（1：视频，12：专栏，17：动态）")
+    parser.add_argument('--page-size', type=int, default=autoreply.page_size, help="每页拉取的评论数量")
+    parser.add_argument('--restart', action='store_true', help="忽略保存的进度，重新补扫该时间范围")
+    args = parser.parse_args()
+
+    bot = Backfill.from_auth(Auth(read_only=True))
+    since = parse_time(args.since)
+    live_cursor = bot.replied_comments.get_cursor(args.type)
+    if args.until:
+        until = parse_time(args.until)
+        if live_cursor is not None and until > live_cursor.time:
+            print(f"❗ 结束时间晚于常规轮询的扫描游标（{live_cursor.time}），重叠部分由两者共用的已回复记录去重")
+    else:
+        until = min(live_cursor.time, datetime.now()) if live_cursor is not None else datetime.now()
+    until = until.replace(microsecond=0)
+    if since >= until:
+        raise Exception(f"❌ 开始时间 {since} 不早于结束时间 {until}")
+    if metrics_port:
+        start_http_server(metrics_port)
+    try:
+        bot.run(args.type, since, until, args.page_size, restart=args.restart)
+    finally:
+        bot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+B站创作中心评论接口（纯 HTTP 实现，无需浏览器）
+复用 Auth 中已登录的 requests.Session，通过 JSON 接口拉取评论列表并发表回复
+"""
+
+from datetime import datetime
+
+# 评论列表接口返回的 relation 字段 -> 创作中心页面上显示的关注标签
+RELATION_LABELS = {
+    1: "粉丝",
+    2: "已关注",
+    3: "已关注",
+}
+
+
+class CommentApiError(Exception):
+    """评论接口返回非 0 错误码，code 为接口错误码（如 -412 请求被拦截、-509 请求过于频繁）"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class CommentClient:
+    def __init__(self, session, csrf, base_url="https://api.bilibili.com"):
+        self.session = session
+        self.csrf = csrf
+        self.base_url = base_url.rstrip('/')
+
+    def list_comments(self, pn=1, ps=20, type=1):
+        """
+        获取创作中心评论列表（按时间倒序），返回 (评论列表, 评论总数)
+        """
+        url = f"{self.base_url}/x/v2/reply/up/fulllist"
+        params = {
+            'order': 1,
+            'filter': -1,
+            'type': type,
+            'bvid': '',
+            'pn': pn,
+            'ps': ps,
+            'charge_plus_filter': 'false',
+        }
+        response = self.session.get(url, params=params)
+        data = response.json()
+        if data['code'] != 0:
+            raise CommentApiError(f"❌ 获取评论列表失败：{data}", data['code'])
+        page = data['data'].get('page') or {}
+        items = data['data'].get('list') or []
+        return [self.parse_comment(item) for item in items], page.get('total', 0)
+
+    def iter_comments(self, ps=20, type=1, max_pages=None):
+        """
+        逐页遍历评论列表，调用方可随时 break 结束翻页
+        """
+        pn = 1
+        while max_pages is None or pn <= max_pages:
+            comments, total = self.list_comments(pn=pn, ps=ps, type=type)
+            if not comments:
+                return
+            yield pn, comments
+            if pn * ps >= total:
+                return
+            pn += 1
+
+    def reply(self, comment, message):
+        """
+        回复指定评论，成功返回新回复的 rpid
+        """
+        url = f"{self.base_url}/x/v2/reply/add"
+        data = {
+            'oid': comment['oid'],
+            'type': comment['type'],
+            # 回复根评论时 root 与 parent 都为该评论 rpid，回复楼中楼时 root 为所在楼层
+            'root': comment['root'] or comment['rpid'],
+            'parent': comment['rpid'],
+            'message': message,
+            'plat': 1,
+            'csrf': self.csrf,
+        }
+        response = self.session.post(url, data=data)
+        data = response.json()
+        if data['code'] != 0:
+            raise CommentApiError(f"❌ 回复评论失败：{data.get('message')} (code: {data['code']})", data['code'])
+        return (data.get('data') or {}).get('rpid')
+
+    @staticmethod
+    def parse_comment(item):
+        """将接口返回的评论条目转换为扁平的评论记录"""
+        content = item.get('content') or {}
+        return {
+            'rpid': item['id'],
+            'oid': item['oid'],
+            'type': item.get('type', 1),
+            'root': item.get('root', 0),
+            'parent': item.get('parent', 0),
+            'mid': item.get('mid'),
+            'username': item.get('replier', ''),
+            'message': content.get('message', ''),
+            'ctime': item.get('ctime', 0),
+            'date': datetime.fromtimestamp(item.get('ctime', 0)).strftime("%Y-%m-%d %H:%M:%S"),
+            'relation': RELATION_LABELS.get(item.get('relation'), ''),
+        }
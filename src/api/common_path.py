@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共用模块路径
+两个版本共用的模块（配置、游标、指标、规则、调度与存储）位于 src/common/，
+本目录中用到共用模块的模块先导入本模块，直接运行脚本或在本目录中单独导入任一模块时都能找到共用模块
+"""
+
+import os
+import sys
+
+COMMON_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+if COMMON_DIR not in sys.path:
+    sys.path.insert(0, COMMON_DIR)
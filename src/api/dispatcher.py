@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 asyncio 的并发回复分发
+在限定的同时在途数量内并发调用回复接口，并统计每条回复的耗时
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ReplyDispatcher:
+    def __init__(self, client, max_in_flight=5):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        # requests 为同步接口，放到线程池中执行，由 asyncio 控制并发数量
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='reply')
+
+    async def _submit(self, semaphore, comment, message):
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            result = {'comment': comment, 'message': message, 'ok': False, 'rpid': None, 'error': None, 'code': None}
+            try:
+                result['rpid'] = await loop.run_in_executor(self.executor, self.client.reply, comment, message)
+                result['ok'] = True
+            except Exception as e:
+                result['error'] = e
+                # 接口错误码（CommentApiError），网络错误等没有错误码时为 None
+                result['code'] = getattr(e, 'code', None)
+            result['latency'] = time.perf_counter() - start
+            return result
+
+    async def _dispatch(self, jobs):
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [self._submit(semaphore, comment, message) for comment, message in jobs]
+        return await asyncio.gather(*tasks)
+
+    def dispatch(self, jobs):
+        """
+        并发提交回复，jobs 为 (评论记录, 回复内容) 列表，
+        按提交顺序返回结果列表，每项包含 ok、rpid、error、code（接口错误码）与 latency（秒）
+        """
+        if not jobs:
+            return []
+        return asyncio.run(self._dispatch(jobs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
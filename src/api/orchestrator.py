@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多账号编排
+在同一进程内为多个账号并行执行扫描与回复，每个账号独立的 HTTP Session，共用一个轮询调度器
+
+账号目录结构（每个子目录为一个账号，目录名作为账号名）：
+accounts/
+├── account_a/
+│   ├── .userdata         # 用户数据缓存（自动生成）
+│   ├── .refresh_token    # 刷新令牌（自动生成）
+│   └── .replied.db       # 已回复评论与扫描进度（自动生成）
+└── account_b/
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
+import autoreply
+from auth import Auth
+from autoreply import AutoReply
+from scheduler import AdaptiveScheduler
+from metrics import start_http_server
+
+# 账号目录
+accounts_dir = 'accounts'
+
+
+def load_accounts(accounts_dir=accounts_dir):
+    """
+    逐个登录账号目录下的所有账号，登录失败的账号跳过
+    """
+    bots = []
+    for name in sorted(os.listdir(accounts_dir)):
+        account_dir = os.path.join(accounts_dir, name)
+        if not os.path.isdir(account_dir):
+            continue
+        auth_client = Auth(
+            userdata_file=os.path.join(account_dir, '.userdata'),
+            refresh_token_file=os.path.join(account_dir, '.refresh_token'),
+        )
+        try:
+            bots.append(AutoReply.from_auth(auth_client, store_file=os.path.join(account_dir, '.replied.db'), name=name))
+        except Exception as e:
+            print(f"❌ 账号 {name} 加载失败：{e}")
+    return bots
+
+
+def run_session(bot):
+    try:
+        return bot.process_session()
+    except Exception as e:
+        bot.log("本轮会话扫描异常：", e)
+        return 0
+
+
+def main_loop(bots):
+    """
+    主循环：所有账号并行执行一次会话扫描，按所有账号的新评论总数调度下一次检测
+    """
+    if autoreply.metrics_port:
+        start_http_server(autoreply.metrics_port)
+    autoreply.reload_config(bots)
+    # 放在 autoreply.scheduler 中，配置文件修改回复频率时同步更新轮询间隔的上下限
+    scheduler = autoreply.scheduler = AdaptiveScheduler(min_interval=autoreply.min_frequency_seconds,
+                                                        max_interval=autoreply.frequency * 60)
+    autoreply.report_startup()
+    with ThreadPoolExecutor(max_workers=len(bots), thread_name_prefix='account') as executor:
+        while True:
+            autoreply.reload_config(bots)
+            print(f"----------> [{datetime.now()}] {len(bots)} 个账号开始新一轮检测新评论...")
+            new_count = sum(executor.map(run_session, bots))
+            scheduler.record(new_count)
+            print(f"本轮检测结束，共发现 {new_count} 条新评论，{scheduler.describe()}")
+            scheduler.wait()
+
+
+if __name__ == "__main__":
+    autoreply.parse_args()
+    bots = load_accounts()
+    if not bots:
+        raise Exception("💔 没有可用的账号！")
+    try:
+        main_loop(bots)
+    finally:
+        for bot in bots:
+            bot.close()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层
+挂载在 Auth.session 上的适配器，所有经由该会话的请求（登录、Cookie 检查与刷新、评论列表、回复）统一获得：
+  - 连接与读取超时：调用方没有指定 timeout 时使用默认值，TLS 握手或响应卡住时不会永久阻塞
+  - 连接池：每个主机保持的长连接数量与并发回复数量匹配，多账号时每个账号的会话各自一个连接池
+  - 幂等请求（GET 等）遇到连接错误、超时或 429/5xx 时按带抖动的指数退避重试；
+    POST 只在连接建立前超时时重试（请求未发出，不会重复回复）
+  - 按主机熔断：同一主机连续失败达到阈值后在冷却时间内直接失败，冷却后放行一个探测请求，成功即恢复；
+    熔断状态在进程内所有账号间共享
+  - 按接口统计请求耗时、重试次数与熔断状态
+"""
+
+import math
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
+from metrics import Counter, Gauge, Histogram
+
+# 可以安全重试的请求方法
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+# 视为暂时性失败、可以重试的响应状态码
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# 路径中的数字与长十六进制串（如 /correspond/1/<签名>）归并为 {id}，避免指标标签数量无限增长
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{16,})$')
+
+HTTP_REQUEST = Histogram('autoreply_http_request_seconds', '单次 HTTP 请求的耗时（秒）', ['host', 'endpoint', 'status'])
+HTTP_RETRIES = Counter('autoreply_http_retries_total', 'HTTP 请求重试次数', ['host', 'endpoint'])
+CIRCUIT_OPEN = Gauge('autoreply_http_circuit_open', '主机是否处于熔断状态（1 为熔断）', ['host'])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """主机处于熔断状态，请求未发出"""
+
+
+class CircuitBreaker:
+    def __init__(self, host, failure_threshold=5, reset_timeout=30):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        # 熔断后的冷却时间（单位：秒）
+        self.reset_timeout = reset_timeout
+        # closed 正常，open 熔断中，half_open 冷却结束、正在放行一个探测请求
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def before_request(self):
+        """请求前检查熔断状态，熔断中抛出 CircuitOpenError"""
+        with self.lock:
+            if self.state == 'closed':
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining <= 0:
+                # 冷却结束放行一个探测请求；探测请求迟迟没有结果时，再过一个冷却时间放行下一个
+                self.state = 'half_open'
+                self.opened_at = time.monotonic()
+                return
+            raise CircuitOpenError(f"❌ {self.host} 连续请求失败，已熔断，{math.ceil(remaining)} 秒后重试")
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print(f"✅ {self.host} 请求恢复正常，解除熔断")
+                CIRCUIT_OPEN.set(0, host=self.host)
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                print(f"🔌 {self.host} 连续 {self.failures} 次请求失败，熔断 {self.reset_timeout} 秒")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                CIRCUIT_OPEN.set(1, host=self.host)
+
+
+# 主机 -> 熔断器，进程内所有会话共享
+breakers = {}
+breakers_lock = threading.Lock()
+
+
+def get_breaker(host):
+    with breakers_lock:
+        if host not in breakers:
+            breakers[host] = CircuitBreaker(host)
+        return breakers[host]
+
+
+def endpoint_of(url):
+    path = urlparse(url).path or '/'
+    return '/'.join('{id}' if ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+class ResilientAdapter(HTTPAdapter):
+    def __init__(self, timeout=(5, 15), retries=3, backoff=0.5, max_backoff=8, pool_connections=4, pool_maxsize=10):
+        # 重试由 send 自行处理，不使用 urllib3 的重试
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        # (连接超时, 读取超时)，单位：秒
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def backoff_delay(self, attempt):
+        """带完全抖动的指数退避：在 [0, backoff * 2^attempt] 内随机取值，多个账号不会同时重试"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        host = urlparse(request.url).hostname
+        endpoint = endpoint_of(request.url)
+        breaker = get_breaker(host)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            breaker.before_request()
+            start = time.perf_counter()
+            try:
+                response = super().send(request, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                HTTP_REQUEST.observe(time.perf_counter() - start, host=host, endpoint=endpoint, status='error')
+                breaker.record_failure()
+                # 连接建立前超时，请求一定没有发出，POST 也可以重试
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.retries:
+                    raise
+            else:
+                HTTP_REQUEST.observe(time.perf_counter() - start, host=host, endpoint=endpoint,
+                                     status=str(response.status_code))
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if not idempotent or attempt >= self.retries:
+                    return response
+                response.close()
+            attempt += 1
+            HTTP_RETRIES.inc(host=host, endpoint=endpoint)
+            time.sleep(self.backoff_delay(attempt))
+
+
+def mount(session, **kwargs):
+    """为会话的 http 与 https 请求挂载 ResilientAdapter，返回该适配器"""
+    adapter = ResilientAdapter(**kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程回复工作池
+扫描进程只负责拉取评论与判断，需要回复的评论按评论用户 mid 分片放入各工作进程的队列：
+  - 每个工作进程使用独立的 HTTP 会话（从本地用户数据加载登录状态）提交回复
+  - 同一用户的评论总是进入同一个工作进程，保持回复顺序
+  - 已回复记录共用同一个 SQLite（WAL 模式）文件，工作进程提交前再次检查，同一条评论不会回复两次
+回复结果通过结果队列返回扫描进程，用于日志与指标统计；
+工作进程以 spawn 方式启动：创建工作池时扫描进程中已有指标端点、Cookie 刷新等后台线程，
+fork 出的子进程可能继承这些线程持有的锁而死锁
+"""
+
+import multiprocessing
+import queue
+import time
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
+from auth import Auth
+from client import CommentClient
+from store import ReplyStore
+
+# 工作进程的启动方式
+mp_context = multiprocessing.get_context('spawn')
+
+
+def worker_main(index, jobs, results, userdata_file, refresh_token_file, store_file, base_url):
+    """工作进程入口：逐个处理本分片的回复任务，收到 None 时退出"""
+    auth_client = Auth(userdata_file=userdata_file, refresh_token_file=refresh_token_file)
+    auth_client.load_userdata()
+    userdata = auth_client.get_userdata()
+    client = CommentClient(auth_client.session, userdata['bili_jct'], base_url=base_url)
+    store = ReplyStore(store_file)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        cid, comment, message = job
+        result = {'worker': index, 'cid': cid, 'comment': comment, 'message': message,
+                  'ok': False, 'duplicate': False, 'rpid': None, 'error': None, 'code': None, 'latency': 0.0}
+        if cid in store:
+            result['duplicate'] = True
+            results.put(result)
+            continue
+        # 扫描进程的后台线程刷新 Cookie 后会重写用户数据文件，这里据文件修改时间同步新的登录状态
+        latest = auth_client.get_userdata()
+        if latest is not userdata and latest:
+            userdata = latest
+            auth_client.load_userdata()
+            client.csrf = userdata['bili_jct']
+        start = time.perf_counter()
+        try:
+            result['rpid'] = client.reply(comment, message)
+            result['ok'] = True
+            store.add(cid)
+        except Exception as e:
+            # 异常对象不一定能跨进程传递，只返回错误信息与接口错误码
+            result['error'] = str(e)
+            result['code'] = getattr(e, 'code', None)
+        result['latency'] = time.perf_counter() - start
+        results.put(result)
+    store.close()
+
+
+class WorkerPool:
+    def __init__(self, processes, userdata_file, refresh_token_file, store_file, base_url):
+        self.processes = processes
+        self.results = mp_context.Queue()
+        self.queues = []
+        self.workers = []
+        # 已提交但尚未返回结果的任务数量
+        self.pending = 0
+        for index in range(processes):
+            jobs = mp_context.Queue()
+            worker = mp_context.Process(
+                target=worker_main,
+                args=(index, jobs, self.results, userdata_file, refresh_token_file, store_file, base_url),
+                name=f'reply-worker-{index}',
+                daemon=True,
+            )
+            worker.start()
+            self.queues.append(jobs)
+            self.workers.append(worker)
+        print(f"👷 已启动 {processes} 个回复工作进程")
+
+    def shard(self, comment):
+        """按评论用户 mid 分片，同一用户的评论总是进入同一个工作进程"""
+        try:
+            return int(comment['mid']) % self.processes
+        except (TypeError, ValueError):
+            return hash(comment['mid']) % self.processes
+
+    def submit(self, cid, comment, message):
+        self.queues[self.shard(comment)].put((cid, comment, message))
+        self.pending += 1
+
+    def collect(self, timeout=0):
+        """
+        取回已完成的回复结果；timeout 为 0 时只取已到达的结果，为 None 时等待全部任务完成
+        """
+        collected = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                result = self.results.get(timeout=remaining) if remaining != 0 else self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            collected.append(result)
+        return collected
+
+    def close(self):
+        for jobs in self.queues:
+            jobs.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
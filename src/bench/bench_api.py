@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+纯 HTTP 版本（src/api）基准测试
+在本地模拟的创作中心上测量 Auth 登录、process_current_page 与 process_session 的吞吐与回复延迟
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import autoreply  # noqa: E402
+from auth import Auth  # noqa: E402
+from autoreply import AutoReply  # noqa: E402
+from client import CommentClient  # noqa: E402
+from store import ReplyStore  # noqa: E402
+from workers import WorkerPool  # noqa: E402
+from fake_server import FakeCreatorCenter, make_comments  # noqa: E402
+from stats import quiet, report, summarize, timer  # noqa: E402
+
+
+def make_bot(center, workdir, name):
+    """创建指向模拟创作中心的 AutoReply，扫描进度设在最早一条评论之前"""
+    store = ReplyStore(os.path.join(workdir, f"{name}.db"))
+    oldest = datetime.fromtimestamp(center.comments[-1]['ctime']) - timedelta(seconds=1)
+    store.set_watermark(oldest)
+    session = Auth().session
+    client = CommentClient(session, 'bench', base_url=center.base_url)
+    with quiet():
+        bot = AutoReply(client, store, exclude_username='bench', name=name)
+    # 记录每条回复的结果，用于统计回复延迟
+    latencies = []
+    dispatch = bot.dispatcher.dispatch
+
+    def recording_dispatch(jobs):
+        results = dispatch(jobs)
+        latencies.extend(result['latency'] for result in results)
+        return results
+    bot.dispatcher.dispatch = recording_dispatch
+    # 统计每次会话请求的评论页数
+    pages = []
+    list_comments = client.list_comments
+
+    def counting_list_comments(*args, **kwargs):
+        pages.append(1)
+        return list_comments(*args, **kwargs)
+    client.list_comments = counting_list_comments
+    return bot, latencies, pages
+
+
+def bench_login(center, workdir, rounds):
+    userdata_file = os.path.join(workdir, '.userdata')
+    refresh_token_file = os.path.join(workdir, '.refresh_token')
+    with open(userdata_file, 'w', encoding='utf-8') as f:
+        json.dump({"SESSDATA": "bench", "DedeUserID": "1", "bili_jct": "bench",
+                   "DedeUserID__ckMd5": "bench", "sid": "bench"}, f)
+    with open(refresh_token_file, 'w', encoding='utf-8') as f:
+        f.write('bench')
+    Auth.www_url = Auth.passport_url = Auth.api_url = center.base_url
+    durations = []
+    for _ in range(rounds):
+        with quiet(), timer(durations):
+            Auth(userdata_file=userdata_file, refresh_token_file=refresh_token_file).login()
+    report("Auth.login（本地 Cookie 有效）", [
+        ("轮数", rounds),
+        ("平均耗时 (ms)", sum(durations) / len(durations) * 1000),
+        ("p90 耗时 (ms)", summarize(durations)['p90']),
+    ])
+
+
+def bench_current_page(center, workdir):
+    center.reset()
+    bot, latencies, _ = make_bot(center, workdir, 'page')
+    comments, _ = bot.client.list_comments(pn=1, ps=center.page_size)
+    durations = []
+    cursor = bot.cursors[autoreply.comment_types[0]]
+    with quiet(), timer(durations):
+        bot.process_current_page(comments, cursor, cursor.copy())
+    latency = summarize(latencies)
+    report("process_current_page", [
+        ("评论数", len(comments)),
+        ("耗时 (ms)", durations[0] * 1000),
+        ("评论扫描速度 (条/秒)", len(comments) / durations[0]),
+        ("回复数", len(latencies)),
+        ("回复延迟 p50 (ms)", latency['p50']),
+        ("回复延迟 p90 (ms)", latency['p90']),
+        ("回复延迟 p99 (ms)", latency['p99']),
+    ])
+
+
+def bench_session(center, workdir):
+    center.reset()
+    bot, latencies, pages = make_bot(center, workdir, 'session')
+    durations = []
+    with quiet(), timer(durations):
+        new_count = bot.process_session()
+    latency = summarize(latencies)
+    report("process_session（首轮，全部为新评论）", [
+        ("新评论数", new_count),
+        ("耗时 (ms)", durations[0] * 1000),
+        ("评论扫描速度 (条/秒)", new_count / durations[0]),
+        ("每轮会话页数", len(pages)),
+        ("回复数", len(center.replies)),
+        ("回复延迟 p50 (ms)", latency['p50']),
+        ("回复延迟 p90 (ms)", latency['p90']),
+        ("回复延迟 p99 (ms)", latency['p99']),
+    ])
+    # 没有新评论时的空闲轮询
+    pages.clear()
+    durations = []
+    with quiet(), timer(durations):
+        bot.process_session()
+    report("process_session（空闲，无新评论）", [
+        ("耗时 (ms)", durations[0] * 1000),
+        ("每轮会话页数", len(pages)),
+    ])
+
+
+def bench_workers(center, workdir, processes):
+    """扫描与回复分离：回复按 mid 分片交给多个工作进程，统计从开始扫描到全部回复完成的耗时"""
+    center.reset()
+    bot, _, pages = make_bot(center, workdir, f'workers-{processes}')
+    with quiet():
+        bot.worker_pool = WorkerPool(processes, os.path.join(workdir, '.userdata'),
+                                     os.path.join(workdir, '.refresh_token'),
+                                     os.path.join(workdir, f'workers-{processes}.db'), center.base_url)
+    try:
+        # 等待工作进程启动并加载登录状态，避免计入启动耗时
+        time.sleep(0.5)
+        scan, total = [], []
+        with quiet(), timer(total):
+            with timer(scan):
+                new_count = bot.process_session()
+            bot.collect_replies(timeout=None)
+        report(f"process_session（{processes} 个回复工作进程）", [
+            ("新评论数", new_count),
+            ("扫描耗时 (ms)", scan[0] * 1000),
+            ("全部回复完成耗时 (ms)", total[0] * 1000),
+            ("回复吞吐 (条/秒)", len(center.replies) / total[0]),
+            ("每轮会话页数", len(pages)),
+            ("回复数", len(center.replies)),
+        ])
+    finally:
+        with quiet():
+            bot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="src/api 基准测试")
+    parser.add_argument('--comments', type=int, default=200, help="模拟评论数量")
+    parser.add_argument('--page-size', type=int, default=20, help="每页评论数量")
+    parser.add_argument('--reply-delay', type=float, default=0.05, help="模拟回复接口耗时（秒）")
+    parser.add_argument('--login-rounds', type=int, default=20, help="登录测试轮数")
+    parser.add_argument('--workers', type=int, default=4, help="回复工作进程数量，为 0 时跳过该项测试")
+    args = parser.parse_args()
+
+    autoreply.page_size = args.page_size
+    center = FakeCreatorCenter(make_comments(args.comments), page_size=args.page_size,
+                               reply_delay=args.reply_delay).start()
+    print(f"🚀 模拟创作中心：{center.base_url}，评论 {args.comments} 条，回复接口耗时 {args.reply_delay * 1000:.0f} ms")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            bench_login(center, workdir, args.login_rounds)
+            bench_current_page(center, workdir)
+            bench_session(center, workdir)
+            if args.workers > 0:
+                bench_workers(center, workdir, args.workers)
+            print(f"\n✅ 基准测试完成，总耗时 {time.perf_counter() - start:.2f} 秒")
+    finally:
+        center.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selenium 版本（src/selenium）基准测试
+在本地模拟的创作中心上测量 Auth 登录、process_current_page 与 process_session 的吞吐、
+回复延迟、每条评论的 WebDriver 调用次数与每轮会话页数，需要本机已安装 Chrome
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'selenium'))
+
+import authreply  # noqa: E402
+from auth import Auth  # noqa: E402
+from capture import NetworkCapture  # noqa: E402
+from cursor import Cursor  # noqa: E402
+from store import ReplyStore  # noqa: E402
+from waits import wait_for_comment_list  # noqa: E402
+from fake_server import FakeCreatorCenter, make_comments  # noqa: E402
+from stats import quiet, report, summarize, timer  # noqa: E402
+
+# 扫描模式：(名称, snapshot_mode, 是否使用网络抓取)
+MODES = [
+    ("逐元素查找", False, False),
+    ("页面快照", True, False),
+    ("网络抓取", True, True),
+]
+
+
+class CommandCounter:
+    """统计 WebDriver 命令次数（包括 WebElement 上的调用）"""
+
+    def __init__(self, driver):
+        self.count = 0
+        execute = driver.execute
+
+        def counting_execute(*args, **kwargs):
+            self.count += 1
+            return execute(*args, **kwargs)
+        driver.execute = counting_execute
+
+
+def record_reply_latency(latencies):
+    """包装 deliver_reply，记录每次回复（点击回复链接到提交完成）的耗时"""
+    deliver_reply = authreply.deliver_reply
+
+    def timed_deliver_reply(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return deliver_reply(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    authreply.deliver_reply = timed_deliver_reply
+    return deliver_reply
+
+
+def bench_login(center, workdir):
+    for name, content in (('.cookie', []), ('.local-storage', {}), ('.session-storage', {})):
+        with open(os.path.join(workdir, name), 'w', encoding='utf-8') as f:
+            json.dump(content, f)
+    start = time.perf_counter()
+    with quiet():
+        auth_client = Auth(user_data_dir=os.path.join(workdir, 'chrome'), enable_network_capture=True)
+    launch = time.perf_counter() - start
+    counter = CommandCounter(auth_client.get_driver())
+    durations = []
+    with quiet(), timer(durations):
+        logged_in = auth_client.login()
+    report("Auth 启动与登录（本地数据有效）", [
+        ("Chrome 启动耗时 (ms)", launch * 1000),
+        ("login 耗时 (ms)", durations[0] * 1000),
+        ("login WebDriver 调用次数", counter.count),
+        ("登录成功", logged_in),
+    ])
+    return auth_client, counter
+
+
+def prepare_mode(center, driver, workdir, name, snapshot, capture):
+    oldest = datetime.fromtimestamp(center.comments[-1]['ctime']) - timedelta(seconds=1)
+    authreply.snapshot_mode = snapshot
+    authreply.network_capture = NetworkCapture(driver) if capture else None
+    authreply.replied_comments = ReplyStore(os.path.join(workdir, f"{name}.db"))
+    authreply.cursor = Cursor(oldest)
+    authreply.next_cursor = authreply.cursor.copy()
+    center.reset()
+    driver.get(authreply.comment_page_url)
+    wait_for_comment_list(driver)
+
+
+def bench_mode(center, driver, counter, workdir, title, snapshot, capture):
+    latencies = []
+    original = record_reply_latency(latencies)
+    try:
+        # 单页扫描
+        prepare_mode(center, driver, workdir, f"{title}-page", snapshot, capture)
+        counter.count = 0
+        durations = []
+        with quiet(), timer(durations):
+            authreply.process_current_page()
+        page_calls = counter.count
+        page_latency = summarize(latencies)
+        report(f"process_current_page（{title}）", [
+            ("评论数", center.page_size),
+            ("耗时 (ms)", durations[0] * 1000),
+            ("评论扫描速度 (条/秒)", center.page_size / durations[0]),
+            ("每条评论 WebDriver 调用", page_calls / center.page_size),
+            ("回复数", len(latencies)),
+            ("回复延迟 p50 (ms)", page_latency['p50']),
+            ("回复延迟 p90 (ms)", page_latency['p90']),
+        ])
+
+        # 完整会话
+        latencies.clear()
+        prepare_mode(center, driver, workdir, f"{title}-session", snapshot, capture)
+        counter.count = 0
+        durations = []
+        with quiet(), timer(durations):
+            new_count = authreply.process_session()
+        pages = center.requests.get('/x/v2/reply/up/fulllist', 0)
+        session_latency = summarize(latencies)
+        report(f"process_session（{title}）", [
+            ("新评论数", new_count),
+            ("耗时 (ms)", durations[0] * 1000),
+            ("评论扫描速度 (条/秒)", new_count / durations[0] if durations[0] else 0.0),
+            ("每条评论 WebDriver 调用", counter.count / max(new_count, 1)),
+            ("每轮会话页数", pages),
+            ("回复数", len(center.replies)),
+            ("回复延迟 p50 (ms)", session_latency['p50']),
+            ("回复延迟 p90 (ms)", session_latency['p90']),
+            ("回复延迟 p99 (ms)", session_latency['p99']),
+        ])
+    finally:
+        authreply.deliver_reply = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="src/selenium 基准测试")
+    parser.add_argument('--comments', type=int, default=60, help="模拟评论数量")
+    parser.add_argument('--page-size', type=int, default=10, help="每页评论数量")
+    parser.add_argument('--reply-delay', type=float, default=0.05, help="模拟回复接口耗时（秒）")
+    args = parser.parse_args()
+
+    center = FakeCreatorCenter(make_comments(args.comments), page_size=args.page_size,
+                               reply_delay=args.reply_delay).start()
+    print(f"🚀 模拟创作中心：{center.base_url}，评论 {args.comments} 条，每页 {args.page_size} 条")
+    Auth.www_url = Auth.passport_url = Auth.api_url = center.base_url
+    authreply.comment_page_url = center.base_url + "/platform/comment/article"
+    authreply.exclude_username = 'bench'
+    cwd = os.getcwd()
+    auth_client = None
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            try:
+                auth_client, counter = bench_login(center, workdir)
+            except Exception as e:
+                print(f"❗ 无法启动 Chrome，跳过 Selenium 基准测试：{e}")
+                return
+            driver = auth_client.get_driver()
+            authreply.driver = driver
+            for title, snapshot, capture in MODES:
+                bench_mode(center, driver, counter, workdir, title, snapshot, capture)
+            print("\n✅ 基准测试完成")
+        finally:
+            if auth_client is not None:
+                auth_client.quit()
+            os.chdir(cwd)
+            center.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟的创作中心
+提供与线上相同结构的评论管理页面（comment-list-item、ci-action、bcc-pagination-next 等），
+以及评论列表、回复、用户信息、Cookie 检查等桩接口，供基准测试离线使用
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+COMMENT_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>评论管理</title></head>
+<body>
+<div class="comment-list" id="comment-list"></div>
+<ul class="bcc-pagination"><li class="bcc-pagination-next"><a>下一页</a></li></ul>
+<script>
+var pn = 1, ps = __PAGE_SIZE__, total = 0;
+function pad(n) { return n < 10 ? '0' + n : '' + n; }
+function formatDate(ts) {
+    var d = new Date(ts * 1000);
+    return d.getFullYear() + '-' + pad(d.getMonth() + 1) + '-' + pad(d.getDate()) + ' ' +
+        pad(d.getHours()) + ':' + pad(d.getMinutes()) + ':' + pad(d.getSeconds());
+}
+var relations = {1: '粉丝', 2: '已关注', 3: '已关注'};
+function render(data) {
+    total = data.data.page.total;
+    var html = '';
+    data.data.list.forEach(function (c) {
+        var relation = relations[c.relation] || '';
+        html += '<div class="comment-list-item" data-rpid="' + c.id + '">' +
+            '<div class="ci-title"><a class="user-avatar" mid="' + c.mid + '" card="' + c.replier + '">' + c.replier + '</a>' +
+            (c.parent ? '<span class="ci-title-split">回复</span>' : '') +
+            '<span class="relation-label"' + (relation ? '' : ' style="display: none;"') + '>' + relation + '</span></div>' +
+            '<div class="ci-content">' + c.content.message + '</div>' +
+            '<div class="ci-action"><span class="date">' + formatDate(c.ctime) + '</span>' +
+            '<span class="reply action"><a>回复</a></span></div>' +
+            '<div class="reply-wrap" style="display: none;" data-oid="' + c.oid + '" data-rpid="' + c.id + '">' +
+            '<textarea></textarea><button type="button"><span>发表回复</span></button></div>' +
+            '</div>';
+    });
+    document.getElementById('comment-list').innerHTML = html;
+    // 与线上分页组件一致：最后一页的下一页按钮处于禁用状态
+    document.querySelector('.bcc-pagination-next').classList.toggle('bcc-pagination-disabled', pn * ps >= total);
+}
+function load(page) {
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/x/v2/reply/up/fulllist?order=1&filter=-1&type=1&pn=' + page + '&ps=' + ps);
+    xhr.onload = function () { pn = page; render(JSON.parse(xhr.responseText)); };
+    xhr.send();
+}
+document.addEventListener('click', function (e) {
+    var target = e.target;
+    if (target.closest('.bcc-pagination-next')) {
+        if (pn * ps < total) { load(pn + 1); }
+        return;
+    }
+    var item = target.closest('.comment-list-item');
+    if (!item) { return; }
+    var wrap = item.querySelector('.reply-wrap');
+    if (target.closest('.reply.action')) {
+        wrap.style.display = 'block';
+    } else if (target.closest('.reply-wrap button')) {
+        var textarea = wrap.querySelector('textarea');
+        var body = 'oid=' + wrap.dataset.oid + '&type=1&root=' + wrap.dataset.rpid + '&parent=' + wrap.dataset.rpid +
+            '&message=' + encodeURIComponent(textarea.value) + '&csrf=bench';
+        var xhr = new XMLHttpRequest();
+        xhr.open('POST', '/x/v2/reply/add');
+        xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+        xhr.onload = function () { textarea.value = ''; wrap.style.display = 'none'; };
+        xhr.send(body);
+    }
+});
+load(1);
+</script>
+</body>
+</html>
+"""
+
+
+def make_comments(count, newest=None, interval=60):
+    """生成按时间倒序排列的评论，每隔 7 条为一条楼中楼回复，关注关系轮流变化"""
+    newest = int(newest if newest is not None else time.time())
+    comments = []
+    for i in range(count):
+        comments.append({
+            'id': 10000 + i,
+            'oid': 1,
+            'type': 1,
+            'root': 10000 if i % 7 == 6 else 0,
+            'parent': 10000 if i % 7 == 6 else 0,
+            'mid': 1000 + i % 50,
+            'replier': f"用户{1000 + i % 50}",
+            'content': {'message': f"第 {i} 条评论"},
+            'ctime': newest - i * interval,
+            'relation': i % 4,
+        })
+    return comments
+
+
+class FakeCreatorCenter:
+    def __init__(self, comments, page_size=10, reply_delay=0.0, host='127.0.0.1', port=0):
+        self.comments = comments
+        self.page_size = page_size
+        self.reply_delay = reply_delay
+        self.replies = []
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        with self.lock:
+            self.replies = []
+            self.requests = {}
+
+    def _count(self, path):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _handler(self):
+        center = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 避免响应头与响应体分包发送时与延迟确认叠加，产生额外的约 40 ms 延迟
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type='application/json; charset=utf-8'):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                center._count(url.path)
+                if url.path == '/platform/comment/article':
+                    page = COMMENT_PAGE.replace('__PAGE_SIZE__', str(center.page_size))
+                    self._send(page.encode('utf-8'), 'text/html; charset=utf-8')
+                elif url.path == '/x/v2/reply/up/fulllist':
+                    pn = int(query.get('pn', ['1'])[0])
+                    ps = int(query.get('ps', [str(center.page_size)])[0])
+                    items = center.comments[(pn - 1) * ps:pn * ps]
+                    self._send({'code': 0, 'data': {
+                        'page': {'num': pn, 'size': ps, 'total': len(center.comments)},
+                        'list': items,
+                    }})
+                elif url.path == '/x/web-interface/nav':
+                    self._send({'code': 0, 'data': {'isLogin': True, 'uname': 'bench', 'mid': 1}})
+                elif url.path == '/x/passport-login/web/cookie/info':
+                    self._send({'code': 0, 'data': {'refresh': False, 'timestamp': int(time.time() * 1000)}})
+                elif url.path in ('/', ''):
+                    self._send(b'<html><body>bench</body></html>', 'text/html; charset=utf-8')
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                center._count(url.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                form = parse_qs(self.rfile.read(length).decode('utf-8'))
+                if url.path == '/x/v2/reply/add':
+                    if center.reply_delay:
+                        time.sleep(center.reply_delay)
+                    with center.lock:
+                        center.replies.append({k: v[0] for k, v in form.items()})
+                        rpid = 90000 + len(center.replies)
+                    self._send({'code': 0, 'data': {'rpid': rpid}})
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    center = FakeCreatorCenter(make_comments(200), port=8848).start()
+    print(f"模拟创作中心已启动：{center.base_url}/platform/comment/article")
+    try:
+        center.thread.join()
+    except KeyboardInterrupt:
+        center.stop()
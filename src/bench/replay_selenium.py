@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selenium 版本（src/selenium）会话回放
+读取 authreply.record_file 录制的会话，用基于 lxml 的回放 driver 代替浏览器，把页面源码与评论接口响应依次交给扫描逻辑，
+不启动 Chrome、不访问线上站点、不提交回复，用于：
+  - 复现线上页面结构变化（找不到 comment-list-item 等）导致的问题
+  - 确定性地分析扫描路径的耗时（--profile）
+  - 用同一份录制对比不同版本的解析速度
+
+python src/bench/replay_selenium.py session.jsonl.gz [--repeat 5] [--profile] [--priority fans_first --queue-size 50]
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from lxml import etree, html as lxml_html
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'selenium'))
+
+import authreply  # noqa: E402
+from capture import parse_comment_records  # noqa: E402
+from cursor import Cursor  # noqa: E402
+from recorder import read_archive  # noqa: E402
+from reply_queue import PRIORITIES, ReplyQueue  # noqa: E402
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+from snapshot import SNAPSHOT_SCRIPT  # noqa: E402
+from store import ReplyStore  # noqa: E402
+from stats import quiet, report, summarize  # noqa: E402
+
+# 录制的页面之后没有更多页面时使用的空白页：带有空的分页组件，扫描逻辑据此判断没有下一页
+END_PAGE = '<html><body><ul class="bcc-pagination"></ul></body></html>'
+
+# 扫描模式：(名称, snapshot_mode, 是否使用网络抓取)
+MODES = [
+    ("逐元素查找", False, False),
+    ("页面快照", True, False),
+    ("网络抓取", True, True),
+]
+
+
+def first(nodes):
+    return nodes[0] if nodes else None
+
+
+def node_text(node):
+    return "".join(node.itertext()).strip() if node is not None else ""
+
+
+def has_class(name):
+    """与 CSS 类选择器（如 span.date）等价的 XPath 条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def python_snapshot(tree):
+    """snapshot.SNAPSHOT_SCRIPT 的 lxml 实现，规则与页面脚本保持一致"""
+    records = []
+    for index, item in enumerate(tree.xpath("//div[contains(@class, 'comment-list-item')]")):
+        avatar = first(item.xpath(".//a[contains(@class, 'user-avatar')]"))
+        date = first(item.xpath(f".//div[contains(@class, 'ci-action')]//span[{has_class('date')}]"))
+        title = first(item.xpath(".//div[contains(@class, 'ci-title')]"))
+        content = first(item.xpath(".//div[contains(@class, 'ci-content')]"))
+        upload = first(item.xpath(".//*[@data-oid]"))
+        reply_tag = False
+        relation = None
+        if title is not None:
+            reply_tag = any(node_text(split) == '回复' for split in title.xpath(".//span[contains(@class, 'ci-title-split')]"))
+            labels = title.xpath(".//span[contains(@class, 'relation-label')]")
+            if labels:
+                relation = ''
+            for label in labels:
+                text = node_text(label)
+                if 'display: none' not in (label.get('style') or '') and text:
+                    relation = text
+                    break
+        records.append({
+            'index': index,
+            'mid': avatar.get('mid') if avatar is not None else None,
+            'username': (avatar.get('card') or node_text(avatar)) if avatar is not None else '',
+            'date': node_text(date),
+            'reply_tag': reply_tag,
+            'relation': relation,
+            'message': node_text(content),
+            'rpid': item.get('data-rpid') or item.get('data-id') or None,
+            'oid': upload.get('data-oid') if upload is not None else None,
+        })
+    return records
+
+
+class ReplayElement:
+    """WebElement 的回放实现，翻页后访问旧页面的元素抛出 StaleElementReferenceException"""
+
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+        self.page_index = driver.page_index
+
+    def _check(self):
+        if self.page_index != self.driver.page_index:
+            raise StaleElementReferenceException("页面已翻页")
+
+    @property
+    def text(self):
+        self._check()
+        return node_text(self.node) if self.is_displayed() else ""
+
+    def get_attribute(self, name):
+        self._check()
+        if name == 'outerHTML':
+            return etree.tostring(self.node, encoding='unicode')
+        if name == 'value':
+            return self.node.text or ""
+        return self.node.get(name)
+
+    def is_displayed(self):
+        self._check()
+        return not any('display: none' in (node.get('style') or '') for node in self.node.iterancestors(tag='*')) \
+            and 'display: none' not in (self.node.get('style') or '')
+
+    def find_elements(self, by, value):
+        self._check()
+        return self.driver.wrap(self.node.xpath(value), by)
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+    def click(self):
+        self._check()
+        classes = " ".join(node.get('class') or '' for node in [self.node, *self.node.iterancestors()])
+        if 'bcc-pagination-next' in classes:
+            self.driver.next_page()
+
+    def clear(self):
+        pass
+
+    def send_keys(self, *values):
+        pass
+
+
+class ReplayDriver:
+    def __init__(self, pages):
+        # 每页为 {'url', 'html', 'responses'}
+        self.pages = pages
+        self.page_index = 0
+        self.trees = {}
+
+    @property
+    def page(self):
+        if self.page_index < len(self.pages):
+            return self.pages[self.page_index]
+        return {'url': '', 'html': END_PAGE, 'responses': []}
+
+    @property
+    def tree(self):
+        if self.page_index not in self.trees:
+            self.trees[self.page_index] = lxml_html.fromstring(self.page['html'])
+        return self.trees[self.page_index]
+
+    @property
+    def page_source(self):
+        return self.page['html']
+
+    @property
+    def current_url(self):
+        return self.page['url']
+
+    def wrap(self, nodes, by):
+        if by != By.XPATH:
+            raise NotImplementedError(f"回放 driver 只支持 XPath 查找：{by}")
+        return [ReplayElement(self, node) for node in nodes if isinstance(node, etree.ElementBase)]
+
+    def find_elements(self, by, value):
+        return self.wrap(self.tree.xpath(value), by)
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+    def execute_script(self, script, *args):
+        if script == SNAPSHOT_SCRIPT:
+            return python_snapshot(self.tree)
+        return None
+
+    def next_page(self):
+        self.page_index = min(self.page_index + 1, len(self.pages))
+
+    def get(self, url):
+        self.page_index = 0
+
+
+class ReplayCapture:
+    """NetworkCapture 的回放实现，返回当前页录制的评论接口响应"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.last_responses = []
+
+    def latest_comments(self):
+        self.last_responses = [(url, payload) for url, payload in self.driver.page['responses']]
+        for url, payload in reversed(self.last_responses):
+            if payload.get('code') == 0:
+                return parse_comment_records(payload)
+        return None
+
+
+def load_sessions(path):
+    """按会话分组录制的页面，评论接口响应归入其前一个页面"""
+    sessions = []
+    pages = None
+    for entry in read_archive(path):
+        if entry['type'] == 'session' or pages is None:
+            pages = []
+            sessions.append(pages)
+        if entry['type'] == 'page':
+            pages.append({'url': entry['url'], 'html': entry['html'], 'responses': []})
+        elif entry['type'] == 'response' and pages:
+            pages[-1]['responses'].append((entry['url'], entry['payload']))
+    return [pages for pages in sessions if pages]
+
+
+def replay_mode(sessions, workdir, title, snapshot, capture, repeat):
+    """按指定扫描模式回放全部会话，统计每页扫描耗时、评论数量与计划回复数量"""
+    page_times = []
+    page_sizes = []
+    planned = []
+    process_current_page = authreply.process_current_page
+    submit_reply = authreply.submit_reply
+
+    def timed_process_current_page():
+        start = time.perf_counter()
+        result = process_current_page()
+        page_times.append(time.perf_counter() - start)
+        page_sizes.append(len(authreply.driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]")))
+        return result
+
+    def planned_reply(comment, reply_content):
+        planned.append(reply_content)
+        return True
+
+    authreply.process_current_page = timed_process_current_page
+    authreply.submit_reply = planned_reply
+    authreply.snapshot_mode = snapshot
+    try:
+        for round_index in range(repeat):
+            for session_index, pages in enumerate(sessions):
+                driver = ReplayDriver(pages)
+                authreply.driver = driver
+                authreply.network_capture = ReplayCapture(driver) if capture else None
+                authreply.replied_comments = ReplyStore(os.path.join(workdir, f"{title}-{round_index}-{session_index}.db"))
+                # 录制中的评论全部视为新评论，覆盖完整的扫描与判断路径
+                authreply.cursor = Cursor(datetime(2000, 1, 1))
+                with quiet():
+                    authreply.process_session()
+    finally:
+        authreply.process_current_page = process_current_page
+        authreply.submit_reply = submit_reply
+    latency = summarize(page_times)
+    report(f"回放（{title}）", [
+        ("会话数 × 轮数", f"{len(sessions)} × {repeat}"),
+        ("页数", len(page_times)),
+        ("评论数", sum(page_sizes)),
+        ("空白页数（未找到评论）", sum(1 for size in page_sizes if size == 0)),
+        ("计划回复数", len(planned)),
+        ("每页扫描耗时 p50 (ms)", latency['p50']),
+        ("每页扫描耗时 p90 (ms)", latency['p90']),
+        ("评论扫描速度 (条/秒)", sum(page_sizes) / sum(page_times) if page_times and sum(page_times) else 0.0),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="src/selenium 会话回放")
+    parser.add_argument('archive', help="录制文件（authreply.record_file）")
+    parser.add_argument('--repeat', type=int, default=1, help="重复回放轮数，用于得到稳定的耗时")
+    parser.add_argument('--profile', action='store_true', help="输出扫描路径中耗时最多的函数")
+    parser.add_argument('--priority', choices=list(PRIORITIES), help="开启回复队列并使用指定的回复优先级，默认逐条立即回复")
+    parser.add_argument('--queue-size', type=int, default=50, help="回复队列上限")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.archive)
+    has_responses = any(page['responses'] for pages in sessions for page in pages)
+    print(f"📼 录制文件：{args.archive}，{len(sessions)} 轮会话，{sum(len(pages) for pages in sessions)} 页")
+    authreply.exclude_username = None
+    authreply.rule_engine = None
+    authreply.relation_resolver = None
+    authreply.recorder = None
+    # 录制中的评论时间都已过去，回放时不限回复期限
+    authreply.reply_queue = ReplyQueue(args.priority, max_size=args.queue_size, deadline=None) if args.priority else None
+    profiler = cProfile.Profile() if args.profile else None
+    with tempfile.TemporaryDirectory() as workdir:
+        for title, snapshot, capture in MODES:
+            if capture and not has_responses:
+                print(f"\n❗ 录制中没有评论接口响应，跳过{title}模式")
+                continue
+            if profiler:
+                profiler.enable()
+            replay_mode(sessions, workdir, title, snapshot, capture, args.repeat)
+            if profiler:
+                profiler.disable()
+    if profiler:
+        print("\n📊 扫描路径耗时最多的函数")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+    print("\n✅ 回放完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试统计与输出
+"""
+
+import io
+import time
+from contextlib import contextmanager, redirect_stdout
+
+
+def percentile(values, p):
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """返回 p50/p90/p99/max（单位：毫秒）"""
+    return {
+        'p50': percentile(values, 50) * 1000,
+        'p90': percentile(values, 90) * 1000,
+        'p99': percentile(values, 99) * 1000,
+        'max': max(values) * 1000 if values else 0.0,
+    }
+
+
+@contextmanager
+def quiet():
+    """屏蔽被测代码的日志输出"""
+    with redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextmanager
+def timer(result):
+    start = time.perf_counter()
+    yield
+    result.append(time.perf_counter() - start)
+
+
+def report(title, rows):
+    """输出一组指标，rows 为 (指标名, 值) 列表"""
+    print(f"\n📊 {title}")
+    for name, value in rows:
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"  {name:<28}{value}")
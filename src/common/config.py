@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置文件热加载
+运行期间可以修改的配置放在 JSON 文件中（config.json），每轮会话开始前检查文件修改时间，
+变化时重新读取并校验，全部通过后在两轮会话之间一次性应用到运行中的程序；
+校验失败时继续使用原有配置，浏览器与登录状态不受影响，无需重启
+
+配置文件示例（未出现在文件中的配置项使用程序中的默认值，删除文件即恢复全部默认值）：
+{
+  "frequency": 3,
+  "min_frequency_seconds": 20,
+  "follow_user_reply_template": "发过去了！",
+  "not_follow_user_reply_template": "麻烦关注一下哈，不然收不到消息～",
+  "exclude_username": null
+}
+exclude_username 为 null 时不回复自己（当前登录的用户）
+"""
+
+import json
+import os
+
+
+def positive_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def non_empty_text(value):
+    return isinstance(value, str) and value.strip() != ""
+
+
+def optional_text(value):
+    return value is None or isinstance(value, str)
+
+
+class ConfigFile:
+    def __init__(self, path, schema, defaults):
+        self.path = path
+        # 配置项 -> (校验函数, 期望值说明)
+        self.schema = schema
+        self.defaults = dict(defaults)
+        self.values = dict(defaults)
+        self.mtime = None
+
+    def validate(self, data):
+        """校验配置文件内容，返回合并默认值后的完整配置，有任何错误时抛出 ValueError"""
+        if not isinstance(data, dict):
+            raise ValueError("配置文件内容必须是 JSON 对象")
+        errors = []
+        for key, value in data.items():
+            if key not in self.schema:
+                errors.append(f"未知的配置项 {key}")
+                continue
+            check, expected = self.schema[key]
+            if not check(value):
+                errors.append(f"{key} 应为{expected}，实际为 {value!r}")
+        if errors:
+            raise ValueError("；".join(errors))
+        return dict(self.defaults, **data)
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.values = self.validate(data)
+        print(f"⚙️ 已加载配置文件：{self.path}")
+
+    def reload_if_changed(self):
+        """
+        配置文件修改时间变化时重新加载，返回新的完整配置；文件未变化或加载失败（保留原有配置）时返回 None
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self.mtime is None:
+                return None
+            print(f"❗ 配置文件 {self.path} 不存在，恢复默认配置")
+            self.mtime = None
+            self.values = dict(self.defaults)
+            return dict(self.values)
+        if mtime == self.mtime:
+            return None
+        try:
+            self.load()
+        except Exception as e:
+            print(f"❌ 加载配置文件失败，继续使用原有配置：{e}")
+            return None
+        finally:
+            self.mtime = mtime
+        return dict(self.values)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论扫描游标
+记录最新已扫描评论的时间（精确到秒）以及该时间点上已扫描的评论标识；
+评论列表按时间倒序排列，翻页遇到游标之前的评论即可确定后面都是旧评论，停止翻页
+"""
+
+import json
+from datetime import datetime, timedelta
+
+
+class Cursor:
+    def __init__(self, time, ids=None):
+        self.time = time.replace(microsecond=0)
+        # 与 time 同一秒内已扫描的评论标识；为 None 时表示该秒内的评论全部视为已扫描
+        self.ids = set(ids) if ids is not None else None
+
+    def is_seen(self, comment_time, cid):
+        """评论是否在游标之前（已扫描过）"""
+        if comment_time < self.time:
+            return True
+        if comment_time == self.time:
+            return self.ids is None or cid in self.ids
+        return False
+
+    def advance(self, comment_time, cid):
+        """将游标推进到更新的评论"""
+        if comment_time > self.time:
+            self.time = comment_time
+            self.ids = {cid}
+        elif comment_time == self.time and self.ids is not None:
+            self.ids.add(cid)
+
+    def rewind(self, comment_time):
+        """将游标退回到评论之前，使该评论在下一轮扫描中重新视为新评论"""
+        if comment_time <= self.time:
+            self.time = comment_time.replace(microsecond=0) - timedelta(seconds=1)
+            self.ids = None
+
+    def copy(self):
+        return Cursor(self.time, self.ids)
+
+    def dumps(self):
+        return json.dumps({
+            'time': self.time.strftime("%Y-%m-%d %H:%M:%S"),
+            'ids': sorted(self.ids) if self.ids is not None else None,
+        })
+
+    @classmethod
+    def loads(cls, text):
+        data = json.loads(text)
+        return cls(datetime.strptime(data['time'], "%Y-%m-%d %H:%M:%S"), data['ids'])
+
+    def __str__(self):
+        return f"{self.time:%Y-%m-%d %H:%M:%S}" + (f" {sorted(self.ids)}" if self.ids else "")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus 格式的运行指标
+提供计数器、仪表盘与直方图，并通过本地 HTTP 端点（/metrics）以文本格式输出，无需额外依赖
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 模块导入时间，无法读取进程启动时间时作为近似值
+IMPORTED_AT = time.monotonic()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def samples(self):
+        with self.lock:
+            return [(self.name + self._format_labels(key), value) for key, value in sorted(self.values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name} {value:g}" for name, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """统计代码块耗时（单位：秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, state['counts']):
+                    samples.append((self.name + "_bucket" + self._format_labels(key, ("le", f"{bound:g}")), count))
+                samples.append((self.name + "_bucket" + self._format_labels(key, ("le", "+Inf")), state['count']))
+                samples.append((self.name + "_sum" + self._format_labels(key), state['sum']))
+                samples.append((self.name + "_count" + self._format_labels(key), state['count']))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """
+    在后台线程中启动 /metrics 端点，返回服务对象；端口已被占用（如两个版本或多个进程同时运行）时
+    只输出警告并返回 None，程序不启动指标端点继续运行
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"❗ 指标端点启动失败（端口 {port}：{e}），继续运行但不导出指标，可修改 metrics_port 使用其他端口")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics').start()
+    print(f"📈 指标端点已启动：http://{host}:{port}/metrics")
+    return server
+
+
+def process_uptime():
+    """
+    当前进程自启动以来经过的秒数（包括解释器启动与模块导入），依赖 /proc，
+    非 Linux 系统退回为自本模块导入以来的秒数
+    """
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            stat = f.read()
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        start_ticks = int(stat[stat.rfind(')') + 2:].split()[19])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - IMPORTED_AT
+
+
+def process_tree(pid):
+    """
+    返回进程及其所有子进程的 pid 与常驻内存页数，依赖 /proc，非 Linux 系统返回空字典
+    """
+    if not os.path.isdir('/proc'):
+        return {}
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格，从最后一个右括号之后解析
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+    tree = {}
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        if current in rss_pages:
+            tree[current] = rss_pages[current]
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def process_tree_rss(pid):
+    """
+    统计进程及其所有子进程的常驻内存（单位：字节），用于统计 Chrome 的内存占用；
+    依赖 /proc，非 Linux 系统返回 0
+    """
+    tree = process_tree(pid)
+    return sum(tree.values()) * os.sysconf('SC_PAGE_SIZE') if tree else 0
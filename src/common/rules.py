@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回复规则引擎
+根据评论内容中的关键词或正则选择回复话术，所有规则在加载时一次性编译：
+  - 关键词规则编译为一个 Aho–Corasick 自动机，匹配一条评论只需对文本线性扫描一遍，与规则数量无关
+  - 正则规则按优先级合并为一个正则，每个位置只尝试一次
+规则文件修改后，下一轮会话开始时自动重新加载，无需重启程序（或浏览器）
+
+规则文件示例（rules.json，按 priority 从高到低匹配，同优先级按文件中的顺序）：
+[
+  {"name": "校招", "keywords": ["校招", "内推"], "priority": 10,
+   "reply": "校招信息已私信～", "replies": {"粉丝": "校招信息发过去了！"}},
+  {"name": "链接", "regex": "链接|网盘|资料", "priority": 5, "reply": "链接已私信，注意查收～"}
+]
+regex 中不能使用命名分组；replies 按关注状态（"已关注"、"粉丝"，无关系为 ""）覆盖 reply；没有规则命中时返回 None，由调用方使用默认话术
+"""
+
+import json
+import os
+import re
+from collections import deque
+
+
+class Rule:
+    def __init__(self, name, priority=0, keywords=(), regex=None, reply=None, replies=None, order=0):
+        self.name = name
+        self.priority = priority
+        self.keywords = [keyword.lower() for keyword in keywords if keyword]
+        self.regex = regex
+        self.reply = reply
+        self.replies = replies or {}
+        # 文件中的顺序，同优先级时靠前的规则优先
+        self.order = order
+
+    @classmethod
+    def from_dict(cls, data, order=0):
+        if not data.get('keywords') and not data.get('regex'):
+            raise ValueError(f"规则 {data.get('name')} 没有配置 keywords 或 regex")
+        return cls(
+            name=data.get('name', f"rule-{order}"),
+            priority=data.get('priority', 0),
+            keywords=data.get('keywords', ()),
+            regex=data.get('regex'),
+            reply=data.get('reply'),
+            replies=data.get('replies'),
+            order=order,
+        )
+
+    def rank(self):
+        """排序键，越小越优先"""
+        return (-self.priority, self.order)
+
+    def choose_reply(self, relation):
+        return self.replies.get(relation or "", self.reply)
+
+
+class KeywordAutomaton:
+    """Aho–Corasick 自动机，输出文本中出现的所有关键词对应的值"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+    def add(self, keyword, value):
+        state = 0
+        for char in keyword:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(value)
+
+    def build(self):
+        """广度优先计算失败指针，并把失败链上的输出合并到每个状态"""
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                # 根节点的子节点失败指针为根节点，其余节点沿父节点的失败链查找
+                self.fail[child] = self.goto[fail].get(char, 0) if state else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+        return self
+
+    def search(self, text):
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                yield from self.output[state]
+
+
+class RuleEngine:
+    def __init__(self, path='rules.json'):
+        self.path = path
+        self.mtime = None
+        self.rules = []
+        self.automaton = KeywordAutomaton().build()
+        self.pattern = None
+        # 合并正则中的分组序号 -> 规则序号
+        self.group_rules = {}
+        self.reload_if_changed()
+
+    def compile(self, rules):
+        """编译规则：关键词进入同一个自动机，正则按优先级合并为一个正则"""
+        automaton = KeywordAutomaton()
+        for index, rule in enumerate(rules):
+            for keyword in rule.keywords:
+                automaton.add(keyword, index)
+        regex_rules = sorted((index for index, rule in enumerate(rules) if rule.regex), key=lambda i: rules[i].rank())
+        pattern = None
+        group_rules = {}
+        if regex_rules:
+            # 零宽先行断言保证每个位置都会尝试，同一位置按优先级取第一个命中的规则
+            alternatives = "|".join(f"(?P<r{index}>{rules[index].regex})" for index in regex_rules)
+            pattern = re.compile(f"(?=(?:{alternatives}))", re.IGNORECASE | re.DOTALL)
+            group_rules = {pattern.groupindex[f"r{index}"]: index for index in regex_rules}
+        self.rules = rules
+        self.automaton = automaton.build()
+        self.pattern = pattern
+        self.group_rules = group_rules
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rules = [Rule.from_dict(item, order) for order, item in enumerate(data)]
+        self.compile(rules)
+        print(f"📜 已加载 {len(rules)} 条回复规则：{self.path}")
+
+    def reload_if_changed(self):
+        """规则文件修改时间变化时重新加载，加载失败时保留原有规则"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self.rules:
+                print(f"❗ 规则文件 {self.path} 不存在，清空回复规则")
+                self.compile([])
+            self.mtime = None
+            return False
+        if mtime == self.mtime:
+            return False
+        try:
+            self.load()
+        except Exception as e:
+            print(f"❌ 加载回复规则失败，继续使用原有规则：{e}")
+            return False
+        finally:
+            self.mtime = mtime
+        return True
+
+    def match(self, text):
+        """返回命中的优先级最高的规则，未命中返回 None"""
+        if not text or not self.rules:
+            return None
+        best = None
+        for index in self.automaton.search(text.lower()):
+            if best is None or self.rules[index].rank() < self.rules[best].rank():
+                best = index
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                # 规则自身的分组先于外层分组结束，lastindex 总是外层的规则分组
+                index = self.group_rules[match.lastindex]
+                if best is None or self.rules[index].rank() < self.rules[best].rank():
+                    best = index
+        return self.rules[best] if best is not None else None
+
+    def choose_reply(self, text, relation):
+        """根据评论内容与关注状态选择回复话术，未命中任何规则时返回 None"""
+        rule = self.match(text)
+        return rule.choose_reply(relation) if rule is not None else None
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应轮询调度
+有新评论时立即回到最短轮询间隔，没有新评论时指数退避，间隔始终限定在上下限之间；
+新评论到达速率的 EWMA 估计只用于日志输出
+"""
+
+import time
+from datetime import datetime
+
+
+class AdaptiveScheduler:
+    def __init__(self, min_interval=20, max_interval=180, alpha=0.3, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.backoff = backoff
+        # 新评论到达速率（条/秒）的 EWMA 估计
+        self.rate = 0.0
+        self.interval = min_interval
+        self.next_poll_at = None
+        self.last_poll_at = None
+
+    def record(self, new_count):
+        """
+        记录一次轮询发现的新评论数量，并据此计算下一次轮询间隔
+        """
+        now = time.time()
+        if self.last_poll_at is not None:
+            elapsed = max(now - self.last_poll_at, 1e-3)
+            self.rate = self.alpha * (new_count / elapsed) + (1 - self.alpha) * self.rate
+        self.last_poll_at = now
+
+        if new_count > 0:
+            # 刚有新评论：评论往往连续到达，立即按最短间隔轮询
+            interval = self.min_interval
+        else:
+            interval = self.interval * self.backoff
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.next_poll_at = now + self.interval
+        return self.interval
+
+    def next_poll_time(self):
+        """预计下一次轮询的时间"""
+        if self.next_poll_at is None:
+            return datetime.now()
+        return datetime.fromtimestamp(self.next_poll_at)
+
+    def describe(self):
+        return (f"当前轮询间隔 {self.interval:.0f} 秒，新评论速率 {self.rate * 60:.2f} 条/分钟，"
+                f"下次检测时间 {self.next_poll_time():%Y-%m-%d %H:%M:%S}")
+
+    def wait(self):
+        """等待到下一次轮询时间"""
+        if self.next_poll_at is None:
+            return
+        delay = self.next_poll_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已回复评论索引与扫描进度持久化
+基于 SQLite（WAL 模式）存储，内存中只保留有限数量、按时间淘汰的热点集合
+"""
+
+import sqlite3
+import time
+from collections import OrderedDict
+from datetime import datetime
+from cursor import Cursor
+
+
+class ReplyStore:
+    def __init__(self, path='.replied.db', hot_size=10000, hot_ttl=24 * 3600):
+        self.path = path
+        self.hot_size = hot_size
+        self.hot_ttl = hot_ttl
+        # 评论标识 -> 进入热点集合的时间，按插入顺序排列，便于从头部淘汰
+        self.hot = OrderedDict()
+        # 多账号编排时由线程池中的不同线程轮流使用，同一时刻只有一个线程访问
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS replied ("
+            "cid TEXT PRIMARY KEY, replied_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            "name TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def __contains__(self, cid):
+        if cid is None:
+            return False
+        if cid in self.hot:
+            return True
+        row = self.conn.execute("SELECT 1 FROM replied WHERE cid = ?", (cid,)).fetchone()
+        if row:
+            self._remember(cid)
+            return True
+        return False
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM replied").fetchone()[0]
+
+    def add(self, cid):
+        """记录已回复的评论"""
+        if cid is None:
+            return
+        self.conn.execute(
+            "INSERT OR IGNORE INTO replied (cid, replied_at) VALUES (?, ?)",
+            (cid, time.time()),
+        )
+        self._remember(cid)
+
+    def _remember(self, cid):
+        """放入热点集合，并淘汰超出数量或过期的条目"""
+        now = time.monotonic()
+        self.hot[cid] = now
+        self.hot.move_to_end(cid)
+        while self.hot:
+            _, added_at = next(iter(self.hot.items()))
+            if len(self.hot) > self.hot_size or now - added_at > self.hot_ttl:
+                self.hot.popitem(last=False)
+            else:
+                break
+
+    def get_watermark(self, name='default'):
+        """读取扫描进度，不存在时返回 None"""
+        row = self.conn.execute("SELECT value FROM checkpoint WHERE name = ?", (name,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_watermark(self, value, name='default'):
+        """原子地保存扫描进度"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checkpoint (name, value, updated_at) VALUES (?, ?, ?)",
+            (name, value.isoformat(), time.time()),
+        )
+
+    def get_checkpoint(self, name):
+        """读取保存的进度文本，不存在时返回 None"""
+        row = self.conn.execute("SELECT value FROM checkpoint WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_checkpoint(self, name, value):
+        """原子地保存进度文本"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checkpoint (name, value, updated_at) VALUES (?, ?, ?)",
+            (name, value, time.time()),
+        )
+
+    def get_cursor(self, name):
+        """
+        读取扫描游标，不存在时退回旧版本保存的时间进度，均不存在时返回 None
+        """
+        value = self.get_checkpoint(f"cursor:{name}")
+        if value is not None:
+            return Cursor.loads(value)
+        watermark = self.get_watermark()
+        return Cursor(watermark) if watermark else None
+
+    def set_cursor(self, name, cursor):
+        """原子地保存扫描游标"""
+        self.set_checkpoint(f"cursor:{name}", cursor.dumps())
+
+    def close(self):
+        self.conn.close()
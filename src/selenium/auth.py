@@ -4,18 +4,32 @@
 B站扫码登录实现
 """
 
-import qrcode
 import time
 import json
 import os
+import shutil
+import requests
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from urllib.parse import urlparse, parse_qs
+from waits import wait_for_element
+from capture import enable_capture
 
 class Auth:
-    def __init__(self):
+    # 接口地址（可指向本地测试服务）
+    www_url = "https://www.bilibili.com"
+    passport_url = "https://passport.bilibili.com"
+    api_url = "https://api.bilibili.com"
+
+    def __init__(self, debugger_address=None, remote_debugging_port=None, user_data_dir=None, enable_network_capture=False):
+        """
+        debugger_address：已在运行的浏览器守护进程地址（如 "127.0.0.1:9222"），指定时直接连接，不再启动新的 Chrome
+        remote_debugging_port：启动 Chrome 时开放的远程调试端口，供其他进程连接
+        user_data_dir：Chrome 用户数据目录，不指定时为每个进程创建临时目录，退出时删除
+        enable_network_capture：开启 performance 日志，供 capture.NetworkCapture 读取评论接口响应
+        """
         print("-" * 27)
         print("🔒 哔哩哔哩用户认证模块 ")
         print("-" * 27)
@@ -24,9 +38,24 @@ class Auth:
         self.session_storage_file = '.session-storage'
         self.user_name = None
         self.user_id = None
+        self.debugger_address = debugger_address
+        self.temp_user_data_dir = None
+        self.user_data_dir = None
         chrome_options = Options()
-        user_data_dir = os.path.join(os.getcwd(), "chrome_user_data", "session_" + str(os.getpid()))
+        if enable_network_capture:
+            enable_capture(chrome_options)
+        self.chrome_options = chrome_options
+        if debugger_address:
+            chrome_options.debugger_address = debugger_address
+            self.driver = self.start_browser()
+            return
+        if user_data_dir is None:
+            user_data_dir = os.path.join(os.getcwd(), "chrome_user_data", "session_" + str(os.getpid()))
+            self.temp_user_data_dir = user_data_dir
+        self.user_data_dir = user_data_dir
         chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+        if remote_debugging_port:
+            chrome_options.add_argument(f"--remote-debugging-port={remote_debugging_port}")
         chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
@@ -46,14 +75,63 @@ class Auth:
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option("useAutomationExtension", False)
-        print("🚀 正在启动 Chrome，请稍后...")
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.implicitly_wait(10)
-        print("✅ Chrome 启动成功！")
+        self.driver = self.start_browser()
+
+    def start_browser(self):
+        """启动 Chrome（或连接浏览器守护进程），返回新的 driver"""
+        if self.debugger_address:
+            print(f"🔗 正在连接浏览器守护进程 {self.debugger_address}...")
+        else:
+            print("🚀 正在启动 Chrome，请稍后...")
+            # 上一个 Chrome 被强制结束时可能残留单实例锁，导致新的 Chrome 无法使用该用户数据目录
+            for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+                path = os.path.join(self.user_data_dir, name)
+                if os.path.lexists(path):
+                    os.remove(path)
+        driver = webdriver.Chrome(options=self.chrome_options)
+        # 不使用隐式等待：可选元素立即返回，必需元素通过 waits 中的显式条件等待
+        driver.implicitly_wait(0)
+        print("✅ 浏览器守护进程连接成功！" if self.debugger_address else "✅ Chrome 启动成功！")
+        return driver
+
+    def restart(self):
+        """
+        重新启动浏览器（连接守护进程时重新连接），并重新注入已保存的 Cookie 与 Storage，
+        调用前应先结束原有的浏览器进程
+        """
+        self.driver = self.start_browser()
+        if self.debugger_address:
+            return self.check_status()
+        return self.load_user_data()
 
     def get_driver(self):
         return self.driver
 
+    def quit(self):
+        """
+        退出浏览器并清理临时用户数据目录；
+        连接守护进程时只断开连接，不关闭守护进程中的浏览器
+        """
+        if self.debugger_address:
+            self.driver.service.stop()
+            return
+        self.driver.quit()
+        if self.temp_user_data_dir:
+            shutil.rmtree(self.temp_user_data_dir, ignore_errors=True)
+
+    def get_session(self):
+        """
+        创建带有浏览器当前登录 Cookie 的 requests 会话，用于直接调用接口
+        """
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': self.driver.execute_script("return navigator.userAgent"),
+            'Referer': self.www_url + '/'
+        })
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        return session
+
     def get_user_name(self):
         return self.user_name
 
@@ -137,7 +215,7 @@ class Auth:
         """加载用户数据"""
         try:
             print("🚀 正在加载用户数据，请稍后...")
-            self.driver.get("https://www.bilibili.com")
+            self.driver.get(self.www_url)
             self.load_cookies()
             self.driver.refresh()
             self.load_local_storage()
@@ -154,8 +232,8 @@ class Auth:
     def get_qrcode_info(self):
         """获取登录二维码"""
         try:
-            self.driver.get("https://passport.bilibili.com/login")
-            qrcode_element = self.driver.find_element(By.XPATH, '//*[@id="app-main"]/div/div[2]/div[1]/div[2]/div[1]/div')
+            self.driver.get(self.passport_url + "/login")
+            qrcode_element = wait_for_element(self.driver, By.XPATH, '//*[@id="app-main"]/div/div[2]/div[1]/div[2]/div[1]/div')
             qrcdoe_url = qrcode_element.get_attribute("title")
             if qrcdoe_url:
                 parsed_url = urlparse(qrcdoe_url)
@@ -170,6 +248,8 @@ class Auth:
     
     def show_qrcode(self, qr_url):
         """在终端显示二维码"""
+        # 只有扫码登录时才需要，按需导入
+        import qrcode
         qr = qrcode.QRCode(version=1, box_size=1, border=1)
         qr.add_data(qr_url)
         qr.make(fit=True)
@@ -179,8 +259,8 @@ class Auth:
     
     def check_qrcode_status(self, qrcode_key):
         """检查二维码登录状态"""
-        self.driver.get("https://passport.bilibili.com/x/passport-login/web/qrcode/poll?qrcode_key=" + qrcode_key)
-        json_text = self.driver.find_element("tag name", "pre").text
+        self.driver.get(self.passport_url + "/x/passport-login/web/qrcode/poll?qrcode_key=" + qrcode_key)
+        json_text = wait_for_element(self.driver, By.TAG_NAME, "pre").text
         return json.loads(json_text)
     
     def qrcode_login(self):
@@ -216,8 +296,8 @@ class Auth:
     def check_status(self):
         """检查用户是否登录成功"""
         print("🔍 检查用户是否登录成功...")
-        self.driver.get("https://api.bilibili.com/x/web-interface/nav")
-        json_text = self.driver.find_element("tag name", "pre").text
+        self.driver.get(self.api_url + "/x/web-interface/nav")
+        json_text = wait_for_element(self.driver, By.TAG_NAME, "pre").text
         data = json.loads(json_text)
         if data['code'] == 0:
             user_data = data['data']
@@ -231,6 +311,9 @@ class Auth:
     
     def login(self):
         """主登录方法"""
+        # 连接守护进程时浏览器已处于登录状态，无需重新注入 Cookie
+        if self.debugger_address and self.check_status():
+            return True
         if self.load_user_data():
             return True
         else:
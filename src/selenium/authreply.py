@@ -1,53 +1,268 @@
+import argparse
 import os
+import sys
 import time
-import json
 from datetime import datetime
-from selenium import webdriver
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from auth import Auth
-
-# 回复频率（单位：分钟）
+from store import ReplyStore
+from cursor import Cursor
+from scheduler import AdaptiveScheduler
+from snapshot import take_snapshot, get_record_identifiers
+from capture import NetworkCapture
+from scanner_profile import ScannerProfile
+from rules import RuleEngine
+from relations import RelationResolver
+from supervisor import BrowserSupervisor
+from recorder import SessionRecorder
+from page_fetcher import PageFetcher
+from reply_queue import ReplyItem, ReplyQueue
+from waits import probe, wait_for_comment_list, wait_for_list_rerender, wait_for_visible, wait_for_submitted
+from metrics import Counter, Gauge, Histogram, process_tree_rss, process_uptime, start_http_server
+from config import ConfigFile, non_empty_text, optional_text, positive_number
+
+# 回复频率（单位：分钟），作为自适应轮询间隔的上限
 frequency = 3
+# 轮询间隔下限（单位：秒），有新评论时最快按此间隔检测
+min_frequency_seconds = 20
 
-# 回复话术
+# 回复话术（没有回复规则命中时使用）
 follow_user_reply_template = "发过去了！"
 not_follow_user_reply_template = "麻烦关注一下哈，不然收不到消息～"
-
-# 认证
+# 回复规则文件（按评论内容中的关键词或正则选择话术，参见 rules.py），修改后下一轮会话自动生效，无需重启浏览器
+rules_file = 'rules.json'
+# 配置文件（参见 config.py）：回复频率、话术与排除回复的用户名可在文件中修改，下一轮会话开始前生效，无需重启浏览器
+config_file = 'config.json'
+
+# 快照模式：一次 execute_script 取回整页评论数据，在内存中完成判断
+snapshot_mode = True
+# 网络抓取模式：直接读取评论页自身请求的评论列表 JSON，抓取不到时退回快照模式
+network_capture_mode = False
+# 轻量扫描配置：屏蔽字体、样式、图片、统计与广告等扫描用不到的资源
+scanner_profile_mode = True
+# 批量查询关注关系：整页评论用户的关注状态通过一次接口请求获取（带缓存），逐元素查找模式下已关注的用户不再逐条读取 relation-label；
+# 快照模式下只查询页面上没有关注标签元素的评论
+relation_lookup_mode = True
+# 浏览器监督：内存过高时回收标签页或重启 Chrome，WebDriver 命令卡死时结束浏览器并自动恢复
+supervisor_mode = True
+# 会话录制文件（如 "session.jsonl.gz"），指定时记录每页的页面源码与评论接口响应，供 src/bench/replay_selenium.py 离线回放
+record_file = None
+# 回复队列：扫描时只生成回复内容，待回复的评论排队，扫描结束（或队列已满）时按优先级依次回复
+reply_queue_mode = False
+# 回复优先级（整个队列统一排序）：scan（扫描顺序）、newest（最新评论优先）、fans_first（粉丝与已关注用户优先）、latest_upload（最新稿件的评论优先）
+reply_priority = "fans_first"
+# 回复队列上限，达到上限时扫描器暂停翻页，先处理队列
+reply_queue_size = 50
+# 回复期限（单位：秒，自评论时间起），为 None 时不限
+reply_deadline_seconds = None
+# 超过回复期限的评论使用的简短话术（不再匹配回复规则），为 None 时直接丢弃
+stale_reply_template = "回复晚啦，抱歉～ 还需要的话请再留言一次"
+# 回复前重新定位评论时最多查找的页数（扫描后发出的回复与新评论会让评论向后移动，按评论时间向前或向后查找）
+reply_locate_max_pages = 10
+# 并行扫描的页数：第 1 页之后每批同时拉取多页评论列表接口，追赶积压评论时不再逐页点击下一页；0 为关闭，需要开启回复队列
+parallel_scan_pages = 0
+# 并行扫描请求的评论列表接口与评论类型（与纯 HTTP 版本的 comment_types 相同）
+comment_list_url = "https://api.bilibili.com/x/v2/reply/up/fulllist"
+comment_list_type = 1
+
+# 评论管理页面地址（可指向本地测试服务）
+comment_page_url = "https://member.bilibili.com/platform/comment/article"
+# 评论管理页面对应的内容类型，用作扫描游标的名称
+content_type = "article"
+# 浏览器守护进程地址（如 "127.0.0.1:9222"，参见 daemon.py），为 None 时自行启动 Chrome
+browser_daemon_address = None
+
+auth_client = None
 driver = None
+network_capture = None
+scanner_profile = None
+# 扫描游标：游标之前的评论均已扫描过；next_cursor 为本轮会话扫描中推进的新游标
+cursor = None
+next_cursor = None
+# 已回复评论与扫描进度的持久化文件
+store_file = '.replied.db'
+# 存储已回复过的评论：记录评论的全部标识，即评论 rpid（页面快照带有 rpid、网络抓取或并行扫描时）与“用户mid-评论时间”，
+# 任一标识命中即视为已回复，同一用户多次评论也会分别记录
+replied_comments = None
+# 排除回复的用户名，默认不回复自己
+exclude_username = None
+# 当前登录的用户名
 username = None
-auth_client = Auth()
-if auth_client.login():
-    username = auth_client.get_user_name()
-    driver = auth_client.get_driver()
-else:
-    raise Exception("💔 未登录成功！")
-
-# 脚本开始
-input_time_str = input("请输入开始扫描的时间，默认使用当前时间(yyyy-MM-dd HH:mm:ss): ").strip()
-if input_time_str:
-    try:
-        # 如果用户只输入了 "YYYY-MM-DD HH:MM:SS"，则自动添加当前的微秒部分
-        if len(input_time_str) == 19:  # "YYYY-MM-DD HH:MM:SS" 长度为 19
-            now_micro = datetime.now().microsecond
-            input_time_str = input_time_str + f".{now_micro:06d}"
-        last_seen_timestamp = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S.%f")
-        print(f"使用输入的时间：{last_seen_timestamp}")
-    except Exception as e:
-        print(f"解析时间失败，使用当前时间，错误信息：{e}")
-        last_seen_timestamp = datetime.now()
-else:
-    last_seen_timestamp = datetime.now()
+# 没有保存的扫描进度时开始扫描的时间（yyyy-MM-dd HH:mm:ss），依次取命令行参数 --start-time 与该环境变量
+start_time_arg = None
+start_time_env = 'AUTOREPLY_START_TIME'
+# 自适应轮询调度器
+scheduler = None
+# 回复规则引擎
+rule_engine = None
+# 关注关系查询器，以及当前页评论用户的关注状态（mid -> 关注状态）
+relation_resolver = None
+page_relations = {}
+# 浏览器监督器
+supervisor = None
+# 会话录制器
+recorder = None
+# 配置文件
+config = None
+# 回复队列，当前所在页码（从 1 开始），以及本轮会话已扫描过的评论标识（重新回到已扫描的页面时不重复处理）
+reply_queue = None
+current_page = 1
+session_seen = set()
+# 本进程已发出的回复数（用于估计排队评论在列表中向后移动的条数），每页评论数，以及本轮会话回复前未能重新定位的评论
+replies_posted = 0
+comments_per_page = 0
+unlocated_items = []
+# 并行扫描的评论列表拉取器
+page_fetcher = None
+# 指标端点端口（http://127.0.0.1:<端口>/metrics），为 None 时不启动
+metrics_port = 9108
+# 指标中的账号标签，登录后取当前用户名
+account = "default"
+
+# 运行指标
+PAGE_LOAD = Histogram('autoreply_page_load_seconds', '刷新并加载评论页面的耗时（秒）', ['account'])
+SESSION_DURATION = Histogram('autoreply_session_duration_seconds', '一轮会话扫描的耗时（秒）', ['account'])
+COMMENT_DECISION = Histogram('autoreply_comment_decision_seconds', '单条评论判断是否回复的耗时（秒）', ['account'],
+                             buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1))
+REPLY_SUBMIT = Histogram('autoreply_reply_submit_seconds', '提交一条回复的耗时（秒）', ['account'])
+REPLY_QUEUE_WAIT = Histogram('autoreply_reply_queue_wait_seconds', '待回复评论在回复队列中等待的时间（秒）', ['account'],
+                             buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
+COMMENTS_SEEN = Counter('autoreply_comments_seen_total', '扫描到的新评论数', ['account'])
+COMMENTS_REPLIED = Counter('autoreply_comments_replied_total', '成功回复的评论数', ['account'])
+COMMENTS_SKIPPED = Counter('autoreply_comments_skipped_total', '跳过回复的新评论数', ['account', 'reason'])
+COMMENTS_FAILED = Counter('autoreply_comments_failed_total', '回复失败的评论数', ['account'])
+PAGE_FAILURES = Counter('autoreply_page_failures_total', '加载评论页面或翻页失败次数', ['account'])
+BACKLOG = Gauge('autoreply_backlog', '等待提交的回复数', ['account'])
+WATERMARK_LAG = Gauge('autoreply_watermark_lag_seconds', '扫描游标落后当前时间的秒数', ['account', 'type'])
+PROCESS_RSS = Gauge('autoreply_process_rss_bytes', '脚本进程常驻内存（字节）')
+RELATION_CACHE_HIT_RATIO = Gauge('autoreply_relation_cache_hit_ratio', '关注关系缓存命中率', ['account'])
+STARTUP = Gauge('autoreply_startup_seconds', '进程启动到开始首次扫描的耗时（秒）')
+BROWSER_RSS = Gauge('autoreply_browser_rss_bytes', 'ChromeDriver 及其启动的 Chrome 进程常驻内存（字节），连接守护进程时为 0')
+
+
+# 可在配置文件中修改的配置项 -> (校验函数, 期望值说明)
+CONFIG_SCHEMA = {
+    'frequency': (positive_number, "正数（分钟）"),
+    'min_frequency_seconds': (positive_number, "正数（秒）"),
+    'follow_user_reply_template': (non_empty_text, "非空字符串"),
+    'not_follow_user_reply_template': (non_empty_text, "非空字符串"),
+    'stale_reply_template': (optional_text, "字符串或 null"),
+    'exclude_username': (optional_text, "字符串或 null"),
+}
+
+
+def reload_config():
+    """
+    配置文件修改时间变化时重新加载，校验通过后一次性应用到运行中的程序，返回发生变化的配置项；
+    在两轮会话之间调用，浏览器与登录状态不受影响
+    """
+    global config
+    if config is None:
+        config = ConfigFile(config_file, CONFIG_SCHEMA, {key: globals()[key] for key in CONFIG_SCHEMA})
+    values = config.reload_if_changed()
+    if values is None:
+        return {}
+    # 未指定排除回复的用户名时不回复自己
+    values['exclude_username'] = values['exclude_username'] or username
+    changed = {key: value for key, value in values.items() if globals()[key] != value}
+    globals().update(changed)
+    if scheduler is not None:
+        scheduler.min_interval = min_frequency_seconds
+        scheduler.max_interval = frequency * 60
+    for key, value in changed.items():
+        print(f"⚙️ 配置 {key} 更新为：{value}")
+    return changed
+
+
+def read_start_time():
+    """
+    读取开始扫描的时间，仅在没有保存的扫描进度时使用：
+    依次取命令行参数 --start-time 与环境变量 AUTOREPLY_START_TIME，均未指定时在终端中询问，
+    非交互运行（如 systemd 托管）时直接使用当前时间，不会阻塞在输入上
+    """
+    input_time_str = (start_time_arg or os.environ.get(start_time_env, '')).strip()
+    if not input_time_str and sys.stdin.isatty():
+        input_time_str = input("请输入开始扫描的时间，默认使用当前时间(yyyy-MM-dd HH:mm:ss): ").strip()
+    if input_time_str:
+        try:
+            start_time = datetime.strptime(input_time_str, "%Y-%m-%d %H:%M:%S")
+            print(f"使用输入的时间：{start_time}")
+        except Exception as e:
+            print(f"解析时间失败，使用当前时间，错误信息：{e}")
+            start_time = datetime.now()
+    else:
+        start_time = datetime.now()
+    return start_time
 
-# 存储已回复过的评论（采用“用户mid-评论时间”的组合作为标识，同一用户多次评论也会分别记录）
-replied_comments = set()
-# 排除回复的用户名，默认不回复自己
-exclude_username = username
 
-# 打开评论页面
-print("正在打开评论页面...")
-driver.get("https://member.bilibili.com/platform/comment/article")
+def init():
+    """
+    加载配置文件，登录并打开评论页面，读取开始扫描的时间
+    """
+    global auth_client, driver, network_capture, scanner_profile, cursor, exclude_username, replied_comments, account
+    global username
+    global rule_engine, relation_resolver, supervisor, recorder, reply_queue, page_fetcher
+    reload_config()
+    auth_client = Auth(debugger_address=browser_daemon_address, enable_network_capture=network_capture_mode)
+    if auth_client.login():
+        username = auth_client.get_user_name()
+        exclude_username = exclude_username or username
+        account = username or account
+        driver = auth_client.get_driver()
+    else:
+        raise Exception("💔 未登录成功！")
+
+    replied_comments = ReplyStore(store_file)
+    rule_engine = RuleEngine(rules_file)
+    cursor = replied_comments.get_cursor(content_type)
+    if cursor is not None:
+        print(f"从上次保存的游标继续扫描：{cursor}")
+    else:
+        cursor = Cursor(read_start_time())
+
+    if network_capture_mode:
+        network_capture = NetworkCapture(driver)
+    if relation_lookup_mode:
+        relation_resolver = RelationResolver(auth_client.get_session(), api_url=Auth.api_url)
+    if supervisor_mode:
+        supervisor = BrowserSupervisor(auth_client, on_restart=attach_driver)
+    if record_file:
+        recorder = SessionRecorder(record_file)
+    if reply_queue_mode:
+        reply_queue = ReplyQueue(reply_priority, max_size=reply_queue_size, deadline=reply_deadline_seconds)
+    if parallel_scan_pages:
+        # 并行拉取的页面不在浏览器中显示，回复前需要由回复队列回到所在页重新定位评论
+        if reply_queue is None:
+            raise Exception("❌ 并行扫描（parallel_scan_pages）需要开启回复队列（reply_queue_mode）")
+        page_fetcher = PageFetcher(driver, comment_list_url, type=comment_list_type, concurrency=parallel_scan_pages)
+
+    # 打开评论页面
+    print("正在打开评论页面...")
+    if scanner_profile_mode:
+        scanner_profile = ScannerProfile(driver)
+        scanner_profile.calibrate(comment_page_url, wait=wait_for_comment_list)
+    else:
+        driver.get(comment_page_url)
+
+def attach_driver(new_driver):
+    """
+    浏览器重启或回收标签页后切换到新的 driver，并重建依赖 driver 的网络抓取、资源屏蔽与接口会话；
+    扫描游标不受影响，下一轮会话从已保存的游标继续
+    """
+    global driver, network_capture, scanner_profile
+    driver = new_driver
+    if page_fetcher is not None:
+        page_fetcher.driver = driver
+    if network_capture is not None:
+        network_capture = NetworkCapture(driver)
+    if scanner_profile is not None:
+        baseline = scanner_profile.baseline
+        scanner_profile = ScannerProfile(driver)
+        scanner_profile.baseline = baseline
+        scanner_profile.enable()
+    if relation_resolver is not None:
+        relation_resolver.session = auth_client.get_session()
 
 def parse_comment_time(time_str):
     """
@@ -78,7 +293,13 @@ def is_comment_replied(comment):
     判断此评论是否已回复过。
     """
     cid = get_comment_identifier(comment)
-    return cid in replied_comments if cid else False
+    return is_replied([cid]) if cid else False
+
+def is_replied(identifiers):
+    """
+    评论的任一标识（rpid 或“用户mid-评论时间”）记录在 replied_comments 中即视为已回复
+    """
+    return any(identifier in replied_comments for identifier in identifiers)
 
 def get_follow_status(comment):
     """
@@ -97,6 +318,24 @@ def get_follow_status(comment):
     except Exception:
         return ""
 
+def get_comment_message(comment):
+    """
+    获取评论内容文本（ci-content）
+    """
+    try:
+        return comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-content')]").text.strip()
+    except Exception:
+        return ""
+
+def get_comment_oid(comment):
+    """
+    获取评论所在稿件的 id（带 data-oid 属性的元素）
+    """
+    try:
+        return comment.find_element(By.XPATH, ".//*[@data-oid]").get_attribute("data-oid")
+    except Exception:
+        return None
+
 def has_reply_tag(comment):
     """
     判断评论的标题区域是否包含回复标签，
@@ -113,49 +352,193 @@ def has_reply_tag(comment):
     except Exception:
         return False
 
-def reply_to_comment(comment):
+def prepare_reply(comment, record=None):
     """
-    执行回复操作：
+    判断是否需要回复并生成回复内容（传入快照记录 record 时，用户名、关注状态与标识直接取自记录，不再查询 DOM）：
       - 如果评论的用户名等于排除用户名，则跳过回复；
-      - 根据关注状态决定回复内容：
+      - 优先使用命中的回复规则（rules.py），否则根据关注状态决定回复内容：
            如果 follow_status 在 ["已关注", "粉丝"] 中，则回复 "发你啦！"，否则回复 "关注一下哈，不然发不过去"；
-      - 点击回复链接、输入回复内容、点击提交成功后，将该评论标识记录到 replied_comments 中。
+      - 返回回复信息 {cid, identifiers, username, mid, relation, oid, content}，不需要回复时返回 None
     """
-    try:
-        user_avatar = comment.find_element(By.XPATH, ".//a[contains(@class, 'user-avatar')]")
-        username = user_avatar.get_attribute("card") or user_avatar.text.strip()
-    except Exception:
-        username = "未知用户"
+    mid = None
+    if record is not None:
+        username = record['username'] or "未知用户"
+        mid = record.get('mid')
+        oid = record.get('oid')
+    else:
+        try:
+            user_avatar = comment.find_element(By.XPATH, ".//a[contains(@class, 'user-avatar')]")
+            username = user_avatar.get_attribute("card") or user_avatar.text.strip()
+            mid = user_avatar.get_attribute("mid")
+        except Exception:
+            username = "未知用户"
+        # 稿件 id 只用于回复队列的优先级（latest_upload）
+        oid = get_comment_oid(comment) if reply_queue is not None else None
 
     if exclude_username and username == exclude_username:
         print(f"跳过用户 {username}（排除回复）")
-        return False
+        COMMENTS_SKIPPED.inc(account=account, reason="excluded_user")
+        return None
+
+    if record is not None:
+        identifiers = get_record_identifiers(record)
+    else:
+        identifiers = [cid for cid in [get_comment_identifier(comment)] if cid]
+    cid = identifiers[0] if identifiers else None
 
     # 已经回复过的评论跳过
-    if is_comment_replied(comment):
+    if is_replied(identifiers):
         print(f"评论 {username} 已回复，跳过")
-        return False
+        COMMENTS_SKIPPED.inc(account=account, reason="already_replied")
+        return None
 
-    follow_status = get_follow_status(comment)
-    if follow_status in ["已关注", "粉丝"]:
-        reply_content = follow_user_reply_template
+    if record is not None:
+        follow_status = record['relation'] if record['relation'] is not None else page_relations.get(mid, "")
+    elif page_relations.get(mid):
+        follow_status = page_relations[mid]
     else:
-        reply_content = not_follow_user_reply_template
+        # 批量查询只能判断已关注，未关注（可能是粉丝）或查询失败（或未开启）时读取 relation-label
+        follow_status = get_follow_status(comment)
+    message = record.get('message', '') if record is not None else get_comment_message(comment)
+    reply_content = rule_engine.choose_reply(message, follow_status) if rule_engine is not None else None
+    if reply_content is None:
+        if follow_status in ["已关注", "粉丝"]:
+            reply_content = follow_user_reply_template
+        else:
+            reply_content = not_follow_user_reply_template
+    return {'cid': cid, 'identifiers': identifiers, 'username': username, 'mid': mid, 'relation': follow_status, 'oid': oid, 'content': reply_content}
+
+def deliver_reply(comment, reply):
+    global replies_posted
+    # 排队期间同一条评论可能已以另一种标识（如另一页读到的 rpid）回复过，提交前再检查一次
+    if is_replied(reply['identifiers']):
+        print(f"评论 {reply['username']} 已回复，跳过")
+        COMMENTS_SKIPPED.inc(account=account, reason="already_replied")
+        return False
+    print(f"准备回复用户：{reply['username']}，回复内容：{reply['content']}")
+    start = time.perf_counter()
+    if submit_reply(comment, reply['content']):
+        REPLY_SUBMIT.observe(time.perf_counter() - start, account=account)
+        COMMENTS_REPLIED.inc(account=account)
+        print(f"已成功回复 {reply['username']}")
+        replies_posted += 1
+        for identifier in reply['identifiers']:
+            replied_comments.add(identifier)
+        return True
+    COMMENTS_FAILED.inc(account=account)
+    return False
+
+def handle_reply(comment, reply, comment_time, page=None):
+    """
+    需要回复的新评论（reply 为 prepare_reply 生成的回复信息）：开启回复队列时入队，否则立即回复（点击回复链接、输入回复内容、提交）；
+    入队时不需要评论元素，comment 可以为 None，page 为评论所在页码，默认当前页
+    """
+    if reply_queue is None:
+        return deliver_reply(comment, reply)
+    reply_queue.push(ReplyItem(reply, comment_time, page or current_page, replies_posted))
+    BACKLOG.set(len(reply_queue), account=account)
+    return True
+
+def drain_reply_queue():
+    """
+    按优先级依次处理回复队列：超过回复期限的评论改用简短话术或丢弃，
+    其余评论翻到当前所在页重新定位评论元素后回复，返回成功回复的数量；
+    未能定位的评论记入 unlocated_items，会话结束时游标退回到这些评论之前，下一轮重新扫描
+    """
+    replied = 0
+    if reply_queue:
+        print(f"开始处理回复队列，共 {len(reply_queue)} 条（优先级：{reply_queue.priority}）")
+    while reply_queue:
+        item = reply_queue.pop()
+        BACKLOG.set(len(reply_queue), account=account)
+        wait = item.wait()
+        REPLY_QUEUE_WAIT.observe(wait, account=account)
+        reply = item.reply
+        if reply_queue.is_stale(item):
+            if stale_reply_template is None:
+                print(f"评论 {reply['username']}（{item.comment_time}）已超过回复期限，丢弃")
+                COMMENTS_SKIPPED.inc(account=account, reason="stale")
+                continue
+            reply = dict(reply, content=stale_reply_template)
+        comment = locate_comment(item)
+        if comment is None:
+            print(f"未找到 {reply['username']} 的评论（扫描时在第 {item.page} 页），下一轮会话重新扫描")
+            COMMENTS_FAILED.inc(account=account)
+            unlocated_items.append(item)
+            continue
+        print(f"评论 {reply['username']} 排队 {wait:.1f} 秒")
+        if deliver_reply(comment, reply):
+            replied += 1
+    return replied
 
-    print(f"准备回复用户：{username}，回复内容：{reply_content}")
+def locate_comment(item):
+    """
+    重新取回排队评论的元素：扫描后每发出一条回复，评论在列表中向后移动一条，先按入队后发出的回复数估计所在页；
+    新评论同样会让评论后移，估计不准时按评论时间（列表按时间倒序）向前或向后翻页查找，
+    最多查找 reply_locate_max_pages 页，找不到（如评论已删除）时返回 None
+    """
+    # 标识可能是 rpid（网络抓取或并行扫描）或“用户mid-评论时间”（逐元素查找），页面上的评论元素不一定带 rpid，两种标识都需比较
+    identifiers = set(item.reply['identifiers'])
+    identifiers.add(f"{item.reply['mid']}-{item.comment_time:%Y-%m-%d %H:%M:%S}")
+    shift = (replies_posted - item.posted) // comments_per_page if comments_per_page else 0
+    page = item.page + shift
+    visited = set()
+    while page >= 1 and page not in visited and len(visited) < reply_locate_max_pages:
+        if not goto_page(page):
+            # 估计的页码超出最后一页时，改从最后一页开始查找（翻过最后一页时浏览器停在没有评论的空白页）
+            page = current_page if driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]") else current_page - 1
+            if page < 1 or page in visited or not goto_page(page):
+                return None
+        visited.add(page)
+        records = take_snapshot(driver)
+        times = []
+        for record in records:
+            if identifiers.intersection(get_record_identifiers(record)):
+                comment_items = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]")
+                return comment_items[record['index']] if record['index'] < len(comment_items) else None
+            comment_time = parse_comment_time(record['date']) if record['date'] else None
+            if comment_time is not None:
+                times.append(comment_time)
+        if not times:
+            return None
+        # 同一秒的评论可能跨页，时间与本页第一条（最后一条）相同时也需要查看前一页（后一页）
+        if item.comment_time <= min(times) and page + 1 not in visited:
+            page += 1
+        elif item.comment_time >= max(times):
+            page -= 1
+        else:
+            return None
+    return None
 
+def goto_page(page):
+    """
+    翻到指定页：目标页在当前页之前时重新打开评论页面，再逐页点击下一页
+    """
+    global current_page
+    if page < current_page:
+        driver.get(comment_page_url)
+        wait_for_comment_list(driver)
+        current_page = 1
+    while current_page < page:
+        if not click_next_page():
+            return False
+    return True
+
+def submit_reply(comment, reply_content):
+    """
+    点击回复链接、输入回复内容并提交，返回是否提交成功
+    """
     try:
         # 点击回复链接，查找包含文字 "回复" 的链接元素
         reply_link = comment.find_element(By.XPATH, ".//span[contains(@class, 'reply action')]/a[text()='回复']")
         reply_link.click()
-        time.sleep(1)  # 等待回复框出现
     except Exception as e:
         print(f"点击回复按钮失败：{e}")
         return False
 
     try:
-        # 找到回复输入框（textarea），清空后输入回复内容
-        reply_box = comment.find_element(By.XPATH, ".//div[contains(@class, 'reply-wrap')]//textarea")
+        # 等待回复输入框（textarea）出现，清空后输入回复内容
+        reply_box = wait_for_visible(driver, comment, ".//div[contains(@class, 'reply-wrap')]//textarea")
         reply_box.clear()
         reply_box.send_keys(reply_content)
     except Exception as e:
@@ -166,11 +549,7 @@ def reply_to_comment(comment):
         # 找到提交回复的按钮，查找按钮内包含文字 "发表回复"
         submit_btn = comment.find_element(By.XPATH, ".//div[contains(@class, 'reply-wrap')]//button[.//span[text()='发表回复']]")
         submit_btn.click()
-        print(f"已成功回复 {username}")
-        cid = get_comment_identifier(comment)
-        if cid:
-            replied_comments.add(cid)
-        time.sleep(1)
+        wait_for_submitted(driver, reply_box)
         return True
     except Exception as e:
         print(f"点击提交按钮失败：{e}")
@@ -180,120 +559,430 @@ def process_current_page():
     """
     扫描当前页所有评论：
       - 对每条评论解析时间（格式：YYYY-MM-DD HH:MM:SS）
-      - 如果评论未回复（即不包含回复标签且未记录在 replied_comments 中），则进行回复
-      - 对于时间晚于 last_seen_timestamp 的评论（即本轮内真正新出现的评论），更新页面的最大时间
-      - 返回一个二元组 (page_has_eligible, page_max_time)
+      - 游标之前的评论均已扫描过，跳过，并标记本页已到达游标
+      - 新评论推进 next_cursor；如果评论未回复（即不包含回复标签且未记录在 replied_comments 中），则进行回复
+      - 返回一个三元组 (page_has_eligible, reached_cursor, page_new_count)
         其中 page_has_eligible 表示本页是否有符合回复条件的评论（即有回复动作），
-        page_max_time 为本页中所有新回复评论的最大时间（不更新全局），旧评论则不参与更新
+        reached_cursor 表示本页是否已出现游标之前的评论，之后的页面无需再扫描
     """
+    global comments_per_page
+    if recorder is not None:
+        recorder.record_page(driver)
+    if network_capture is not None:
+        records = network_capture.latest_comments()
+        if recorder is not None:
+            recorder.record_responses(network_capture.last_responses)
+        if records is not None:
+            return process_page_records(records)
+        print("未抓取到评论接口响应，改为读取页面快照")
+        return process_snapshot()
+    if snapshot_mode:
+        return process_snapshot()
     comment_items = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]")
     print("当前加载评论数量：", len(comment_items))
+    comments_per_page = max(comments_per_page, len(comment_items))
+    if not comment_items:
+        warn_empty_page()
+    resolve_page_relations()
     page_has_eligible = False
-    page_max_time = last_seen_timestamp
+    reached_cursor = False
+    page_new_count = 0
     for comment in comment_items:
-        try:
-            time_element = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-action')]//span[@class='date']")
-            time_str = time_element.text.strip()
-
-            if not time_str:
-                print("调试：未获取到时间文本，元素内容：", time_element.get_attribute("outerHTML"))
-                continue
-            comment_time = parse_comment_time(time_str)
-            if comment_time is None:
-                continue
-        except Exception as e:
-            print("解析评论时间异常：", e)
+        with COMMENT_DECISION.time(account=account):
+            decision, comment_time, reply = decide_comment(comment)
+        if decision == "seen":
+            reached_cursor = True
             continue
+        if decision in ("bad_time", "duplicate"):
+            continue
+        page_new_count += 1
+        COMMENTS_SEEN.inc(account=account)
+        if decision != "reply":
+            continue
+        if handle_reply(comment, reply, comment_time):
+            page_has_eligible = True
 
-        # 如果评论时间不大于 last_seen_timestamp，则跳过（即只处理之后产生的评论）
+    return page_has_eligible, reached_cursor, page_new_count
 
-        if comment_time <= last_seen_timestamp:
-            continue
+def decide_comment(comment):
+    """
+    逐元素查找模式下判断单条评论的处理方式，返回 (决定, 评论时间, 回复信息)，与纯 HTTP 版本的 AutoReply.decide 相同：
+    决定为 "reply" 时需要回复，否则为跳过原因（seen 表示在游标之前、已扫描过，duplicate 表示本轮会话已处理过）；
+    新评论推进 next_cursor
+    """
+    try:
+        time_element = comment.find_element(By.XPATH, ".//div[contains(@class, 'ci-action')]//span[@class='date']")
+        time_str = time_element.text.strip()
+
+        if not time_str:
+            print("调试：未获取到时间文本，元素内容：", time_element.get_attribute("outerHTML"))
+            return "bad_time", None, None
+        comment_time = parse_comment_time(time_str)
+        if comment_time is None:
+            return "bad_time", None, None
+    except Exception as e:
+        print("解析评论时间异常：", e)
+        return "bad_time", None, None
 
-        # 如果此评论发布时间晚于上次记录的最新时间，则将其视为新评论，用于更新会话内最大时间
-        if comment_time > last_seen_timestamp and comment_time > page_max_time:
-            page_max_time = comment_time
+    # 游标之前的评论已扫描过，跳过（即只处理之后产生的评论）
+    cid = get_comment_identifier(comment)
+    if cursor.is_seen(comment_time, cid):
+        return "seen", comment_time, None
+    if cid in session_seen:
+        return "duplicate", comment_time, None
+    if cid:
+        session_seen.add(cid)
+    next_cursor.advance(comment_time, cid)
+
+    if has_reply_tag(comment):
+        print("评论包含回复标签，视为已回复，跳过回复")
+        COMMENTS_SKIPPED.inc(account=account, reason="reply_tag")
+        return "reply_tag", comment_time, None
 
-        if has_reply_tag(comment):
-            print("评论包含回复标签，视为已回复，跳过回复")
+    if is_comment_replied(comment):
+        COMMENTS_SKIPPED.inc(account=account, reason="already_replied")
+        return "already_replied", comment_time, None
+    # 排除回复的用户由 prepare_reply 计入跳过指标
+    reply = prepare_reply(comment)
+    if reply is None:
+        return "excluded_user", comment_time, None
+    return "reply", comment_time, reply
+
+def warn_empty_page():
+    print("❗ 当前页没有找到评论（comment-list-item），如果评论管理页确实有评论，页面结构可能已变化，"
+          "可设置 record_file 录制后用 src/bench/replay_selenium.py 离线复现")
+
+def resolve_page_relations():
+    """
+    一次 execute_script 取回当前页所有评论用户的 mid，再批量查询关注状态（优先使用缓存）
+    """
+    global page_relations
+    page_relations = {}
+    if relation_resolver is None:
+        return
+    mids = driver.execute_script(
+        "return Array.from(document.querySelectorAll('div[class*=\"comment-list-item\"] a[class*=\"user-avatar\"]'))"
+        ".map(function (a) { return a.getAttribute('mid'); });"
+    ) or []
+    page_relations = relation_resolver.resolve(mids)
+    RELATION_CACHE_HIT_RATIO.set(relation_resolver.hit_rate(), account=account)
+
+def process_snapshot():
+    records = take_snapshot(driver)
+    resolve_record_relations(records)
+    return process_page_records(records)
+
+def resolve_record_relations(records):
+    """
+    页面快照中没有关注标签元素（relation 为 None）的新评论用户，批量查询关注状态（优先使用缓存），结果放入 page_relations；
+    页面已提供关注状态的评论与游标之前的旧评论不查询
+    """
+    global page_relations
+    page_relations = {}
+    if relation_resolver is None:
+        return
+    cursor_time = f"{cursor.time:%Y-%m-%d %H:%M:%S}"
+    mids = [record['mid'] for record in records
+            if record['relation'] is None and not record['reply_tag'] and record['date'] >= cursor_time]
+    if mids:
+        page_relations = relation_resolver.resolve(mids)
+        RELATION_CACHE_HIT_RATIO.set(relation_resolver.hit_rate(), account=account)
+
+def process_page_records(records, page=None):
+    """
+    基于整页评论记录（页面快照或抓取的评论接口响应）扫描当前页，所有判断均基于内存数据，
+    仅在需要回复时才按 DOM 序号取回对应的评论元素，返回值与 process_current_page 相同；
+    page 为并行扫描拉取的页码（不是浏览器中显示的页面），此时待回复的评论只入队
+    """
+    global comments_per_page
+    print("当前加载评论数量：", len(records))
+    comments_per_page = max(comments_per_page, len(records))
+    if not records:
+        warn_empty_page()
+    page_has_eligible = False
+    reached_cursor = False
+    page_new_count = 0
+    comment_items = None
+    for record in records:
+        with COMMENT_DECISION.time(account=account):
+            decision, comment_time, reply = decide_record(record)
+        if decision == "seen":
+            reached_cursor = True
+            continue
+        if decision in ("bad_time", "duplicate"):
+            continue
+        page_new_count += 1
+        COMMENTS_SEEN.inc(account=account)
+        if decision != "reply":
             continue
 
-        if not is_comment_replied(comment):
-            if reply_to_comment(comment):
-                page_has_eligible = True
+        # 开启回复队列时入队不需要评论元素，回复前再重新定位
+        comment = None
+        if reply_queue is None:
+            if comment_items is None:
+                comment_items = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]")
+            if record['index'] >= len(comment_items):
+                print("评论元素已变化，跳过：", record)
+                continue
+            comment = comment_items[record['index']]
+        if handle_reply(comment, reply, comment_time, page):
+            page_has_eligible = True
 
-    return page_has_eligible, page_max_time
+    return page_has_eligible, reached_cursor, page_new_count
+
+def decide_record(record):
+    """
+    判断一条评论记录的处理方式，返回值与 decide_comment 相同，所有判断均基于内存数据
+    """
+    if not record['date']:
+        print("调试：未获取到时间文本，评论记录：", record)
+        return "bad_time", None, None
+    comment_time = parse_comment_time(record['date'])
+    if comment_time is None:
+        return "bad_time", None, None
+
+    # 游标之前的评论已扫描过，跳过（即只处理之后产生的评论）；
+    # 同一条评论在页面快照与评论接口响应中的标识可能不同（有无 rpid），去重、游标与已回复判断比较全部标识
+    identifiers = get_record_identifiers(record)
+    if any(cursor.is_seen(comment_time, identifier) for identifier in identifiers or [None]):
+        return "seen", comment_time, None
+    if session_seen.intersection(identifiers):
+        return "duplicate", comment_time, None
+    session_seen.update(identifiers)
+    for identifier in identifiers:
+        next_cursor.advance(comment_time, identifier)
+
+    if record['reply_tag']:
+        print("评论包含回复标签，视为已回复，跳过回复")
+        COMMENTS_SKIPPED.inc(account=account, reason="reply_tag")
+        return "reply_tag", comment_time, None
+
+    if is_replied(identifiers):
+        COMMENTS_SKIPPED.inc(account=account, reason="already_replied")
+        return "already_replied", comment_time, None
+    # 排除回复的用户由 prepare_reply 计入跳过指标
+    reply = prepare_reply(None, record)
+    if reply is None:
+        return "excluded_user", comment_time, None
+    return "reply", comment_time, reply
+
+def scan_pages_parallel():
+    """
+    在第 1 页之后并行扫描：每批同时拉取 parallel_scan_pages 页评论列表，按页码顺序合并处理
+    （跨页重复的评论由 session_seen 去重），直到到达游标或最后一页；
+    返回 (reached_cursor, new_count, resume_page)，拉取失败时 resume_page 为需要改为逐页点击扫描的页码，否则为 None
+    """
+    # 与浏览器中显示的每页评论数保持一致，入队的页码才能对应到页面上的分页
+    ps = len(driver.find_elements(By.XPATH, "//div[contains(@class, 'comment-list-item')]"))
+    new_count = 0
+    pn = 2
+    while ps:
+        start = time.perf_counter()
+        results = page_fetcher.fetch(list(range(pn, pn + page_fetcher.concurrency)), ps)
+        print(f"⚡ 并行拉取第 {pn}-{pn + page_fetcher.concurrency - 1} 页评论，耗时 {time.perf_counter() - start:.2f} 秒")
+        for page, records in results:
+            if records is None:
+                return False, new_count, page
+            if not records:
+                return False, new_count, None
+            _, reached_cursor, page_new_count = process_page_records(records, page)
+            new_count += page_new_count
+            if reached_cursor:
+                return True, new_count, None
+            if len(records) < ps:
+                return False, new_count, None
+        pn += page_fetcher.concurrency
+        if reply_queue.full():
+            print(f"⏸️ 回复队列已满（{len(reply_queue)} 条），暂停扫描")
+            drain_reply_queue()
+    return False, new_count, None
 
 def click_next_page():
     """
-    点击下一页按钮，xpath: //li[contains(@class, 'bcc-pagination-next')]
+    点击下一页按钮，xpath: //li[contains(@class, 'bcc-pagination-next')]；
+    最后一页的下一页按钮不存在或处于禁用状态，直接返回 False，不等待翻页、不计为翻页失败
     """
+    global current_page
     try:
-        next_page_btn = driver.find_element(By.XPATH, "//li[contains(@class, 'bcc-pagination-next')]")
+        next_page_btn = probe(driver, By.XPATH, "//li[contains(@class, 'bcc-pagination-next')]")
+        if next_page_btn is None:
+            print("下一页按钮不存在")
+            return False
+        if is_disabled(next_page_btn):
+            print("已是最后一页")
+            return False
+        first_item = probe(driver, By.XPATH, "//div[contains(@class, 'comment-list-item')]")
         next_page_btn.click()
-        time.sleep(3)  # 等待页面加载
-        return True
+        # 等待评论列表重新渲染；翻到没有评论的空白页时浏览器同样已离开当前页
+        rendered = wait_for_list_rerender(driver, first_item)
+        current_page += 1
+        if rendered:
+            return True
+        PAGE_FAILURES.inc(account=account)
+        return False
     except Exception as e:
         print("点击下一页失败：", e)
+        PAGE_FAILURES.inc(account=account)
         return False
 
+def is_disabled(element):
+    """分页按钮是否处于禁用状态（class 中带 disabled 或 aria-disabled="true"）"""
+    return "disabled" in (element.get_attribute("class") or "") or element.get_attribute("aria-disabled") == "true"
+
 def process_session():
     """
     单次扫描会话：
-      - 从当前页面开始，依次扫描所有评论，尝试回复所有未回复的评论
-      - 对每一页，收集新回复评论的最大时间（page_max_time），用于更新全局 last_seen_timestamp
-      - 如果当前页无符合回复条件的评论，则进行一次容错扫描（点击下一页再检测一次）
-      - 当容错页面仍无符合回复条件的评论时结束本轮会话扫描，
-        最后将本会话中新回复的最大评论时间更新到全局 last_seen_timestamp（旧未回复评论将会在下次会话中继续处理）
-    """
-    global last_seen_timestamp
-    session_max_time = last_seen_timestamp
-    print("当前 last_seen_timestamp：", last_seen_timestamp)
+      - 从刚打开的评论页面（第 1 页）开始逐页扫描，尝试回复所有未回复的新评论
+      - 开启回复队列时，待回复的评论先入队，扫描结束后按优先级回复；队列已满时先处理队列再继续翻页
+      - 开启并行扫描时，第 1 页之后的页面通过评论列表接口成批同时拉取，不再逐页点击下一页
+      - 到达游标所在页（或没有下一页）时结束翻页，与本页是否有回复无关
+      - 扫描结束后保存新的游标，下一轮会话只需扫描到该游标为止
+      - 返回本轮会话发现的新评论数量
+    """
+    global cursor, next_cursor, current_page, session_seen, unlocated_items
+    if recorder is not None:
+        recorder.start_session()
+    if rule_engine is not None:
+        rule_engine.reload_if_changed()
+    next_cursor = cursor.copy()
+    current_page = 1
+    session_seen = set()
+    unlocated_items = []
+    if reply_queue is not None:
+        # 上一轮会话异常中断时未回复的评论丢弃，游标未保存，本轮会重新扫描到
+        reply_queue.clear()
+    session_new_count = 0
+    session_start = time.perf_counter()
+    print("当前游标：", cursor)
     while True:
-        page_replied, page_max_time = process_current_page()
-
-        if page_max_time > session_max_time:
-            session_max_time = page_max_time
-
-        if page_replied:
-            # 当前页有符合条件回复的评论，直接点击下一页继续扫描
-            if not click_next_page():
-                print("下一页按钮不存在，结束本轮会话扫描")
+        _, reached_cursor, page_new_count = process_current_page()
+        session_new_count += page_new_count
+        if reached_cursor:
+            print("已到达上次扫描位置，结束本轮会话扫描")
+            break
+        if page_fetcher is not None and current_page == 1:
+            reached_cursor, page_new_count, resume_page = scan_pages_parallel()
+            session_new_count += page_new_count
+            if network_capture is not None:
+                # 丢弃并行拉取产生的评论接口响应，避免被当作浏览器中显示页面的评论
+                network_capture.drain()
+            if reached_cursor:
+                print("已到达上次扫描位置，结束本轮会话扫描")
                 break
-        else:
-            # 当前页无符合条件评论，进行一次容错扫描：点击下一页再检测一次
-            print("当前页面无符合回复条件的评论，进行容错扫描下一页")
-            if not click_next_page():
-                print("下一页按钮不存在，结束本轮会话扫描")
+            if resume_page is None:
+                print("没有下一页，结束本轮会话扫描")
                 break
-            fault_page_replied, fault_page_max_time = process_current_page()
-            if fault_page_max_time > session_max_time:
-                session_max_time = fault_page_max_time
-            if fault_page_replied:
-                if not click_next_page():
-                    print("无法点击下一页，结束本轮会话扫描")
-                    break
-            else:
-                print("容错扫描页面无符合回复条件的评论，本轮会话扫描结束")
+            # 拉取失败时从该页起改为逐页点击扫描
+            print(f"从第 {resume_page} 页起改为逐页扫描")
+            if not goto_page(resume_page):
+                print("翻页失败，结束本轮会话扫描")
                 break
-
-    print("更新 last_seen_timestamp 为：", session_max_time)
-    last_seen_timestamp = session_max_time
+            continue
+        if reply_queue is not None and reply_queue.full():
+            # 背压：先处理队列，再回到扫描到的页面继续翻页
+            print(f"⏸️ 回复队列已满（{len(reply_queue)} 条），暂停扫描")
+            scan_page = current_page
+            drain_reply_queue()
+            if not goto_page(scan_page):
+                print("回到扫描页面失败，结束本轮会话扫描")
+                break
+        if not click_next_page():
+            print("没有下一页，结束本轮会话扫描")
+            break
+    if reply_queue is not None:
+        drain_reply_queue()
+    # 未能定位的评论不能留在游标之前，否则之后的会话不会再扫描到；扫描中途不能退回，之后的评论还会推进游标
+    for item in unlocated_items:
+        next_cursor.rewind(item.comment_time)
+
+    print("更新游标为：", next_cursor)
+    cursor = next_cursor
+    replied_comments.set_cursor(content_type, cursor)
+    SESSION_DURATION.observe(time.perf_counter() - session_start, account=account)
+    WATERMARK_LAG.set((datetime.now() - cursor.time).total_seconds(), account=account, type=content_type)
+    return session_new_count
+
+def record_resource_usage():
+    """
+    记录脚本进程与浏览器进程的常驻内存，连接守护进程时浏览器不是本进程启动的，不统计
+    """
+    total = process_tree_rss(os.getpid())
+    browser = 0
+    if browser_daemon_address is None:
+        browser = process_tree_rss(driver.service.process.pid)
+    PROCESS_RSS.set(total - browser)
+    BROWSER_RSS.set(browser)
+
+def run_session():
+    """
+    刷新评论页面并执行一次会话扫描，返回发现的新评论数量
+    """
+    try:
+        with PAGE_LOAD.time(account=account):
+            driver.get(comment_page_url)
+            wait_for_comment_list(driver)
+    except Exception:
+        PAGE_FAILURES.inc(account=account)
+        raise
+    record_resource_usage()
+    if scanner_profile is not None:
+        scanner_profile.report()
+    print(f"----------> [{datetime.now()}] 开始新一轮检测新评论...")
+    return process_session()
+
+def report_startup():
+    """
+    记录进程启动到开始首次扫描的耗时（包括启动或连接浏览器、恢复登录状态与打开评论页面）
+    """
+    startup = process_uptime()
+    STARTUP.set(startup)
+    print(f"⚡ 启动耗时 {startup:.2f} 秒")
+
+def parse_args():
+    global start_time_arg
+    parser = argparse.ArgumentParser(description="B站评论自动回复（Selenium 版本）")
+    parser.add_argument('--start-time', help="没有保存的扫描进度时开始扫描的时间（yyyy-MM-dd HH:mm:ss），默认当前时间")
+    args = parser.parse_args()
+    start_time_arg = args.start_time
+    return args
 
 def main_loop():
     """
-    主循环：每隔 frequency 分钟刷新页面，启动一次新的会话扫描
+    主循环：刷新页面并启动一次新的会话扫描，由自适应调度器决定下一次检测的时间
     """
+    global scheduler
+    if metrics_port:
+        start_http_server(metrics_port)
+    scheduler = AdaptiveScheduler(min_interval=min_frequency_seconds, max_interval=frequency * 60)
+    report_startup()
     while True:
-        driver.get("https://member.bilibili.com/platform/comment/article")
-        time.sleep(3)
-        print(f"----------> [{datetime.now()}] 开始新一轮检测新评论...")
-        process_session()
-        print(f"本轮检测结束，等待 {frequency} 分钟后再次检测。")
-        time.sleep(frequency * 60)
+        reload_config()
+        if supervisor is not None:
+            supervisor.check()
+        try:
+            new_count = run_session()
+        except Exception as e:
+            # 只有浏览器异常才重启，本轮未保存的游标丢弃，重启后从上次保存的游标重新扫描；
+            # 配置、存储或解析等程序错误重启浏览器也无法恢复，直接抛出，避免无休止地重启浏览器
+            if supervisor is None or not supervisor.should_restart(e):
+                raise
+            print("本轮会话扫描异常：", e)
+            supervisor.restart("error", f"会话扫描异常：{e}")
+            new_count = 0
+        scheduler.record(new_count)
+        print(f"本轮检测结束，发现 {new_count} 条新评论，{scheduler.describe()}")
+        if relation_resolver is not None and relation_resolver.hits + relation_resolver.misses:
+            print(relation_resolver.describe())
+        scheduler.wait()
 
 if __name__ == "__main__":
+    parse_args()
+    init()
     try:
         main_loop()
     finally:
-        driver.quit()
+        if supervisor is not None:
+            supervisor.stop()
+        if recorder is not None:
+            recorder.close()
+        auth_client.quit()
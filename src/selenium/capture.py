@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DevTools 网络抓取
+评论页本身通过 XHR 拉取 JSON 格式的评论列表，开启 performance 日志后直接读取这些响应，
+从结构化数据中取得评论 rpid、mid、时间、回复状态与关注关系，无需解析 DOM
+"""
+
+import json
+from datetime import datetime
+
+# 评论管理页拉取评论列表的接口
+COMMENT_LIST_API = "/x/v2/reply/up/fulllist"
+
+# 评论列表接口返回的 relation 字段 -> 页面上显示的关注标签
+RELATION_LABELS = {
+    1: "粉丝",
+    2: "已关注",
+    3: "已关注",
+}
+
+
+def enable_capture(chrome_options):
+    """启动 Chrome 前调用，开启 performance 日志以便读取网络事件"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def parse_comment_records(payload):
+    """
+    将评论列表接口的响应转换为与 snapshot.take_snapshot 相同结构的评论记录，
+    index 为评论在列表中的序号，与页面上 comment-list-item 的顺序一致
+    """
+    records = []
+    items = (payload.get('data') or {}).get('list') or []
+    for index, item in enumerate(items):
+        records.append({
+            'index': index,
+            'mid': str(item.get('mid')) if item.get('mid') is not None else None,
+            'username': item.get('replier', ''),
+            'date': datetime.fromtimestamp(item.get('ctime', 0)).strftime("%Y-%m-%d %H:%M:%S"),
+            'reply_tag': item.get('parent', 0) != 0,
+            'relation': RELATION_LABELS.get(item.get('relation'), ''),
+            'message': (item.get('content') or {}).get('message', ''),
+            'rpid': str(item['id']) if item.get('id') is not None else None,
+            'oid': str(item['oid']) if item.get('oid') is not None else None,
+        })
+    return records
+
+
+class NetworkCapture:
+    def __init__(self, driver, url_pattern=COMMENT_LIST_API):
+        self.driver = driver
+        self.url_pattern = url_pattern
+        # 已收到响应头、尚未加载完成的请求：requestId -> url
+        self.pending = {}
+        # 最近一次 drain 读取到的响应，供会话录制使用
+        self.last_responses = []
+        self.driver.execute_cdp_cmd("Network.enable", {})
+
+    def drain(self):
+        """
+        读取自上次调用以来的网络事件，返回已加载完成的匹配响应列表 [(url, payload)]
+        """
+        finished = []
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                url = params['response']['url']
+                if self.url_pattern in url:
+                    self.pending[params['requestId']] = url
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self.pending:
+                finished.append(params['requestId'])
+
+        responses = []
+        for request_id in finished:
+            url = self.pending.pop(request_id)
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                responses.append((url, json.loads(body['body'])))
+            except Exception as e:
+                print(f"读取评论接口响应失败：{url} -> {e}")
+        self.last_responses = responses
+        return responses
+
+    def latest_comments(self):
+        """
+        返回最近一次评论列表响应中的评论记录，本次没有抓到新的响应时返回 None
+        """
+        responses = self.drain()
+        for url, payload in reversed(responses):
+            if payload.get('code') == 0:
+                return parse_comment_records(payload)
+        return None
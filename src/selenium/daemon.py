@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器守护进程
+常驻一个已登录的 Chrome，并开放远程调试端口；authreply.py 通过 browser_daemon_address 连接后直接复用，
+重启回复逻辑时无需重新启动浏览器、注入 Cookie 与刷新页面
+"""
+
+import os
+import time
+from auth import Auth
+
+# 远程调试端口
+remote_debugging_port = 9222
+# 守护进程固定使用的 Chrome 用户数据目录，重启守护进程后仍保留登录状态
+user_data_dir = os.path.join(os.getcwd(), "chrome_user_data", "daemon")
+# 定期保存 Cookie 与 Storage 的间隔（单位：分钟）
+save_interval = 30
+
+
+def main():
+    auth_client = Auth(remote_debugging_port=remote_debugging_port, user_data_dir=user_data_dir)
+    try:
+        if not auth_client.login():
+            raise Exception("💔 未登录成功！")
+        print(f"🟢 浏览器守护进程已就绪，连接地址：127.0.0.1:{remote_debugging_port}")
+        print(f"   在 authreply.py 中设置 browser_daemon_address = \"127.0.0.1:{remote_debugging_port}\" 即可连接")
+        while True:
+            time.sleep(save_interval * 60)
+            # 保存最新的登录状态，守护进程重启后可直接恢复
+            auth_client.save_user_data()
+    except KeyboardInterrupt:
+        print("👋 浏览器守护进程退出")
+    finally:
+        auth_client.quit()
+
+
+if __name__ == "__main__":
+    main()
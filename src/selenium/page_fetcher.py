@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行拉取评论列表
+评论管理页只能逐页点击下一页，追赶积压评论时需要几十次串行的页面加载；
+这里在已打开的评论页中用 fetch 同时请求多页评论列表接口（携带浏览器自身的 Cookie），直接跳到指定页码，
+一次 execute_async_script 取回一批页面，转换为与 snapshot.take_snapshot 相同结构的评论记录
+"""
+
+from urllib.parse import urlencode
+from capture import parse_comment_records
+
+# arguments[0] 为各页的接口地址，按顺序返回各页的响应 JSON（请求失败时为 code -1）
+FETCH_PAGES_SCRIPT = """
+var urls = arguments[0];
+var done = arguments[arguments.length - 1];
+Promise.all(urls.map(function (url) {
+    return fetch(url, {credentials: 'include'})
+        .then(function (response) { return response.json(); })
+        .catch(function (e) { return {code: -1, message: String(e)}; });
+})).then(done);
+"""
+
+
+class PageFetcher:
+    def __init__(self, driver, list_url, type=1, concurrency=4):
+        self.driver = driver
+        self.list_url = list_url
+        self.type = type
+        # 同时请求的页数
+        self.concurrency = concurrency
+
+    def page_url(self, pn, ps):
+        params = {
+            'order': 1,
+            'filter': -1,
+            'type': self.type,
+            'bvid': '',
+            'pn': pn,
+            'ps': ps,
+            'charge_plus_filter': 'false',
+        }
+        return f"{self.list_url}?{urlencode(params)}"
+
+    def fetch(self, pages, ps):
+        """
+        同时拉取多页评论，返回 [(页码, 评论记录)]，顺序与 pages 相同；请求失败的页面评论记录为 None
+        """
+        payloads = self.driver.execute_async_script(FETCH_PAGES_SCRIPT, [self.page_url(pn, ps) for pn in pages]) or []
+        results = []
+        for index, pn in enumerate(pages):
+            payload = payloads[index] if index < len(payloads) else None
+            if not payload or payload.get('code') != 0:
+                print(f"❌ 并行拉取第 {pn} 页评论失败：{(payload or {}).get('message')}")
+                results.append((pn, None))
+            else:
+                results.append((pn, parse_comment_records(payload)))
+        return results
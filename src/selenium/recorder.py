@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话录制
+扫描时把每一页的页面源码与抓取到的评论接口响应追加写入 gzip 压缩的 JSON Lines 文件，
+录制文件可由 src/bench/replay_selenium.py 离线回放，用于复现页面结构变化导致的问题、对比不同版本的解析速度
+
+每行一条记录：
+  {"type": "session", "time": ...}                          一轮会话开始
+  {"type": "page", "time": ..., "url": ..., "html": ...}    扫描的一页
+  {"type": "response", "url": ..., "payload": {...}}        该页对应的评论接口响应（网络抓取模式）
+"""
+
+import gzip
+import json
+import time
+
+
+def read_archive(path):
+    """按顺序读取录制文件中的记录"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        # 追加写入：每次打开生成一个新的 gzip 成员，读取时自动连接
+        self.file = gzip.open(path, 'at', encoding='utf-8')
+        self.pages = 0
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def start_session(self):
+        # 上一轮会话的数据落盘，进程中断时最多丢失当前一轮
+        self.file.flush()
+        self.write({'type': 'session', 'time': time.time()})
+
+    def record_page(self, driver):
+        self.write({'type': 'page', 'time': time.time(), 'url': driver.current_url, 'html': driver.page_source})
+        self.pages += 1
+
+    def record_responses(self, responses):
+        for url, payload in responses:
+            self.write({'type': 'response', 'url': url, 'payload': payload})
+
+    def close(self):
+        self.file.close()
+        print(f"📼 已录制 {self.pages} 页：{self.path}")
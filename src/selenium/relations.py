@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量关注关系查询
+一次请求（/x/relation/relations?fids=...，每批最多 batch_size 个用户）查询一组评论用户与自己的关注关系，
+结果放入带过期时间的 LRU 缓存，频繁评论的用户在缓存有效期内不再重复查询；
+该接口只返回自己对用户的关注状态，无法判断单向关注自己的粉丝，粉丝仍以页面上的 relation-label 为准
+"""
+
+import time
+from collections import OrderedDict
+
+# 关系属性（attribute）-> 与 get_follow_status 相同的关注状态文本：2 已关注，6 互相关注，1 悄悄关注
+RELATION_LABELS = {1: "已关注", 2: "已关注", 6: "已关注"}
+
+
+class RelationResolver:
+    def __init__(self, session, api_url="https://api.bilibili.com", max_size=5000, ttl=3600, batch_size=50):
+        self.session = session
+        self.api_url = api_url
+        self.max_size = max_size
+        self.ttl = ttl
+        # 每次请求最多查询的用户数量
+        self.batch_size = batch_size
+        # mid -> (关注状态, 过期时间)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_cached(self, mid, now):
+        entry = self.cache.get(mid)
+        if entry is None or entry[1] <= now:
+            return None
+        self.cache.move_to_end(mid)
+        return entry[0]
+
+    def put(self, mid, label, now):
+        self.cache[mid] = (label, now + self.ttl)
+        self.cache.move_to_end(mid)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def fetch(self, mids):
+        """批量查询关注关系，返回 mid -> 关注状态，未关注的用户不在返回结果中"""
+        url = self.api_url + "/x/relation/relations"
+        response = self.session.get(url, params={'fids': ",".join(mids)}, timeout=10)
+        data = response.json()
+        if data['code'] != 0:
+            raise Exception(f"❌ 查询关注关系失败：{data}")
+        relations = data.get('data') or {}
+        return {str(mid): RELATION_LABELS.get(item.get('attribute'), "") for mid, item in relations.items()}
+
+    def resolve(self, mids):
+        """
+        查询一组用户的关注状态，返回 mid -> 关注状态（"已关注" 或 ""）；
+        只请求缓存中没有或已过期的用户，查询失败的用户不在返回结果中，由调用方自行处理
+        """
+        now = time.monotonic()
+        result = {}
+        missing = []
+        for mid in dict.fromkeys(str(mid) for mid in mids if mid):
+            label = self.get_cached(mid, now)
+            if label is None:
+                missing.append(mid)
+            else:
+                result[mid] = label
+        self.hits += len(result)
+        self.misses += len(missing)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            try:
+                fetched = self.fetch(batch)
+            except Exception as e:
+                print(f"❌ 批量查询关注关系失败：{e}")
+                continue
+            for mid in batch:
+                label = fetched.get(mid, "")
+                self.put(mid, label, now)
+                result[mid] = label
+        return result
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def describe(self):
+        return (f"关注关系缓存命中率 {self.hit_rate():.0%}（命中 {self.hits}，未命中 {self.misses}），"
+                f"缓存 {len(self.cache)}/{self.max_size}")
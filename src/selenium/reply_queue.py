@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回复队列
+扫描时只判断与生成回复内容，待回复的评论放入有界队列，扫描结束（或队列已满）时再依次回复：
+  - 整个队列按优先级出队（不分页）：扫描顺序、最新评论优先、粉丝与已关注用户优先、最新稿件的评论优先，也可传入自定义函数
+  - 每条评论有回复期限（自评论时间起），超过期限的评论改用简短话术回复或直接丢弃
+  - 队列达到上限时扫描器在翻页前暂停，先处理队列中的回复（背压）
+评论元素翻页后即失效，队列中只保存评论所在页码、标识与入队时已发出的回复数，回复前由调用方重新定位评论元素
+（每发出一条回复，列表中的评论都会向后移动一位）
+"""
+
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta
+
+# 视为粉丝的关注状态（与默认话术的判断一致）
+FAN_RELATIONS = ("已关注", "粉丝")
+
+
+def comment_timestamp(item):
+    return item.comment_time.timestamp()
+
+
+def upload_id(item):
+    """稿件 id（oid）随发布时间递增，取不到时视为最旧的稿件"""
+    try:
+        return int(item.reply.get('oid') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+# 优先级名称 -> 排序键（越小越先回复），相同时按扫描顺序
+PRIORITIES = {
+    'scan': lambda item: (),
+    'newest': lambda item: (-comment_timestamp(item),),
+    'fans_first': lambda item: (item.reply.get('relation') not in FAN_RELATIONS, -comment_timestamp(item)),
+    'latest_upload': lambda item: (-upload_id(item), -comment_timestamp(item)),
+}
+
+
+class ReplyItem:
+    def __init__(self, reply, comment_time, page, posted=0):
+        # prepare_reply 返回的回复信息：cid、username、mid、relation、oid、content
+        self.reply = reply
+        self.comment_time = comment_time
+        # 扫描到该评论时所在的页码（从 1 开始）
+        self.page = page
+        # 入队时本进程已发出的回复数，与回复时的数量相减即为评论在列表中向后移动的条数
+        self.posted = posted
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def cid(self):
+        return self.reply['cid']
+
+    def wait(self):
+        """在队列中等待的时间（秒）"""
+        return time.monotonic() - self.enqueued_at
+
+
+class ReplyQueue:
+    def __init__(self, priority='fans_first', max_size=50, deadline=None):
+        if callable(priority):
+            self.key = priority
+        elif priority in PRIORITIES:
+            self.key = PRIORITIES[priority]
+        else:
+            raise Exception(f"❌ 未知的回复优先级：{priority}，可选 {'、'.join(PRIORITIES)}")
+        self.priority = priority
+        self.max_size = max_size
+        # 回复期限（秒），为 None 时不限
+        self.deadline = deadline
+        self.heap = []
+        self.counter = itertools.count()
+
+    def push(self, item):
+        heapq.heappush(self.heap, (self.key(item), next(self.counter), item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[-1]
+
+    def full(self):
+        return len(self.heap) >= self.max_size
+
+    def clear(self):
+        self.heap = []
+
+    def is_stale(self, item, now=None):
+        """评论是否已超过回复期限"""
+        if self.deadline is None:
+            return False
+        return (now or datetime.now()) > item.comment_time + timedelta(seconds=self.deadline)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
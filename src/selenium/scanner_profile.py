@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量扫描配置
+通过 DevTools 的 Network.setBlockedURLs 屏蔽评论扫描用不到的资源（字体、样式、图片、统计上报与广告脚本），
+并统计每次刷新相比未屏蔽时节省的流量与加载时间
+"""
+
+# 扫描评论用不到的资源，只保留评论列表所需的页面脚本与接口
+BLOCKED_URL_PATTERNS = [
+    # 字体
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # 样式（评论的显示状态取自元素的内联 style，不依赖样式表）
+    "*.css",
+    # 图片与头像
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*hdslb.com/bfs/face/*",
+    # 统计上报
+    "*data.bilibili.com*", "*api.bilibili.com/x/click-interface*", "*hm.baidu.com*", "*s1.hdslb.com/bfs/seed/log/*",
+    # 广告
+    "*cm.bilibili.com*", "*api.bilibili.com/x/web-show/*",
+]
+
+# 当前页面加载传输的字节数与加载耗时
+MEASURE_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var bytes = nav ? nav.transferSize : 0;
+var resources = performance.getEntriesByType('resource');
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+var duration = nav && nav.loadEventEnd > 0 ? nav.loadEventEnd : performance.now();
+return {bytes: bytes, duration: duration, resources: resources.length};
+"""
+
+
+class ScannerProfile:
+    def __init__(self, driver, patterns=BLOCKED_URL_PATTERNS):
+        self.driver = driver
+        self.patterns = patterns
+        # 未屏蔽资源时的页面加载数据，作为对比基准
+        self.baseline = None
+        self.driver.execute_cdp_cmd("Network.enable", {})
+
+    def measure(self):
+        return self.driver.execute_script(MEASURE_SCRIPT)
+
+    def enable(self):
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+
+    def disable(self):
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+
+    def calibrate(self, url, wait=None):
+        """
+        不屏蔽资源加载一次页面记录基准，随后开启屏蔽；
+        wait 为页面加载完成的等待函数，参数为 driver
+        """
+        self.disable()
+        self.driver.get(url)
+        if wait:
+            wait(self.driver)
+        self.baseline = self.measure()
+        self.enable()
+        print(f"📐 页面加载基准：{self.baseline['bytes'] / 1024:.0f} KB，{self.baseline['duration']:.0f} ms，"
+              f"{self.baseline['resources']} 个资源")
+
+    def report(self):
+        """输出本次刷新相比基准节省的流量与加载时间"""
+        current = self.measure()
+        if self.baseline:
+            saved_bytes = self.baseline['bytes'] - current['bytes']
+            saved_time = self.baseline['duration'] - current['duration']
+            print(f"🪶 本次加载 {current['bytes'] / 1024:.0f} KB，{current['duration']:.0f} ms，"
+                  f"节省 {saved_bytes / 1024:.0f} KB，{saved_time:.0f} ms")
+        return current
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论页快照提取
+一次 execute_script 调用取回当前页全部评论的纯数据记录，避免逐条评论多次往返 WebDriver
+"""
+
+# 与 authreply.py 中逐条查找使用的 XPath 规则保持一致
+SNAPSHOT_SCRIPT = """
+var items = document.querySelectorAll('div[class*="comment-list-item"]');
+var records = [];
+for (var i = 0; i < items.length; i++) {
+    var item = items[i];
+    var avatar = item.querySelector('a[class*="user-avatar"]');
+    var date = item.querySelector('div[class*="ci-action"] span.date');
+    var title = item.querySelector('div[class*="ci-title"]');
+    var content = item.querySelector('div[class*="ci-content"]');
+    var upload = item.querySelector('[data-oid]');
+    var replyTag = false;
+    // 没有 relation-label 元素时为 null（页面未提供关注状态），标签隐藏或为空时为 ''
+    var relation = null;
+    if (title) {
+        var splits = title.querySelectorAll('span[class*="ci-title-split"]');
+        for (var j = 0; j < splits.length; j++) {
+            if (splits[j].textContent.trim() === '回复') { replyTag = true; break; }
+        }
+        var labels = title.querySelectorAll('span[class*="relation-label"]');
+        if (labels.length) { relation = ''; }
+        for (var k = 0; k < labels.length; k++) {
+            var style = labels[k].getAttribute('style') || '';
+            var text = labels[k].textContent.trim();
+            if (style.indexOf('display: none') === -1 && text) { relation = text; break; }
+        }
+    }
+    records.push({
+        index: i,
+        mid: avatar ? avatar.getAttribute('mid') : null,
+        username: avatar ? (avatar.getAttribute('card') || avatar.textContent.trim()) : '',
+        date: date ? date.textContent.trim() : '',
+        reply_tag: replyTag,
+        relation: relation,
+        message: content ? content.textContent.trim() : '',
+        rpid: item.getAttribute('data-rpid') || item.getAttribute('data-id') || null,
+        oid: upload ? upload.getAttribute('data-oid') : null
+    });
+}
+return records;
+"""
+
+
+def take_snapshot(driver):
+    """
+    返回当前页评论记录列表，每条记录包含：
+    index（DOM 中的序号）、mid、username、date、reply_tag、relation（页面上没有关注标签时为 None）、message、rpid、oid（评论所在稿件 id）
+    """
+    return driver.execute_script(SNAPSHOT_SCRIPT) or []
+
+
+def get_record_identifiers(record):
+    """
+    评论记录的全部标识，rpid 在前：有 rpid 时为 [rpid, 用户mid-评论时间]，否则只有“用户mid-评论时间”；
+    同一条评论在页面快照中可能没有 rpid，在评论接口响应（网络抓取、并行扫描）中则带有 rpid，
+    去重、游标与已回复判断需比较全部标识，回复后也按全部标识记录
+    """
+    identifiers = []
+    if record.get('rpid'):
+        identifiers.append(str(record['rpid']))
+    if record.get('mid') and record.get('date'):
+        identifiers.append(f"{record['mid']}-{record['date']}")
+    return identifiers
+
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器监督
+长时间运行时监控 Chrome 的常驻内存与每条 WebDriver 命令的耗时：
+  - 内存超过 tab_rss 时回收标签页（新开标签页并关闭旧标签页，释放渲染进程内存）
+  - 内存超过 max_rss、连续出现慢命令或命令卡死时重启 Chrome，重新注入保存的 Cookie 与 Storage
+  - 单条命令超过 command_timeout 时由看门狗线程结束浏览器进程，使卡住的命令抛出异常，主循环不会永久阻塞
+重启后通过 on_restart 回调通知调用方更新 driver，扫描从已保存的游标继续
+"""
+
+import os
+import signal
+import threading
+import time
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+import common_path  # noqa: F401  将 src/common/ 加入模块搜索路径
+from metrics import Counter, Histogram, process_tree, process_tree_rss
+
+# 浏览器异常：WebDriver 命令失败（含超时），或与 chromedriver 的连接断开（浏览器崩溃、被看门狗结束），重启浏览器可以恢复
+BROWSER_ERRORS = (WebDriverException, HTTPError, ConnectionError)
+
+WEBDRIVER_COMMAND = Histogram('autoreply_webdriver_command_seconds', '单条 WebDriver 命令的耗时（秒）', ['command'])
+BROWSER_RECYCLES = Counter('autoreply_browser_recycles_total', '浏览器回收次数', ['action', 'reason'])
+
+
+class BrowserSupervisor:
+    def __init__(self, auth_client, on_restart=None, max_rss=1536 * 1024 * 1024, tab_rss=1024 * 1024 * 1024,
+                 command_timeout=120, slow_command_seconds=30, max_slow_commands=3, restart_attempts=3):
+        self.auth_client = auth_client
+        # 重启或回收标签页后的回调，参数为新的 driver
+        self.on_restart = on_restart
+        self.max_rss = max_rss
+        self.tab_rss = tab_rss
+        self.command_timeout = command_timeout
+        self.slow_command_seconds = slow_command_seconds
+        self.max_slow_commands = max_slow_commands
+        self.restart_attempts = restart_attempts
+        # 连续慢命令次数、当前命令的开始时间，以及看门狗是否已结束浏览器
+        self.slow_commands = 0
+        self.command_started = None
+        self.killed = False
+        self.stop_event = threading.Event()
+        self.attach(auth_client.get_driver())
+        threading.Thread(target=self.watchdog, daemon=True, name='browser-watchdog').start()
+
+    def attach(self, driver):
+        """包装 driver.execute 统计命令耗时，并设置页面加载与脚本超时"""
+        self.driver = driver
+        self.slow_commands = 0
+        self.killed = False
+        execute = driver.execute
+
+        def supervised_execute(command, *args, **kwargs):
+            self.command_started = time.monotonic()
+            try:
+                return execute(command, *args, **kwargs)
+            finally:
+                latency = time.monotonic() - self.command_started
+                self.command_started = None
+                WEBDRIVER_COMMAND.observe(latency, command=command)
+                if latency > self.slow_command_seconds:
+                    self.slow_commands += 1
+                    print(f"🐢 WebDriver 命令 {command} 耗时 {latency:.1f} 秒")
+                else:
+                    self.slow_commands = 0
+        driver.execute = supervised_execute
+        driver.set_page_load_timeout(self.command_timeout)
+        driver.set_script_timeout(self.command_timeout)
+
+    def watchdog(self):
+        while not self.stop_event.wait(1):
+            started = self.command_started
+            if started is not None and not self.killed and time.monotonic() - started > self.command_timeout:
+                print(f"⏱️ WebDriver 命令超过 {self.command_timeout} 秒未返回，结束浏览器进程")
+                self.kill_browser()
+
+    def browser_pid(self):
+        """本进程启动的 chromedriver 的 pid，连接守护进程时返回 None（守护进程的浏览器不受本进程管理）"""
+        if self.auth_client.debugger_address:
+            return None
+        process = getattr(self.driver.service, 'process', None)
+        return process.pid if process else None
+
+    def browser_rss(self):
+        pid = self.browser_pid()
+        return process_tree_rss(pid) if pid else 0
+
+    def kill_browser(self):
+        """强制结束 chromedriver 及其启动的 Chrome 进程；连接守护进程时只停止本地的 chromedriver"""
+        self.killed = True
+        pid = self.browser_pid()
+        if pid is None:
+            try:
+                self.driver.service.stop()
+            except Exception:
+                pass
+            return
+        for child in process_tree(pid):
+            try:
+                os.kill(child, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def check(self):
+        """
+        每轮会话开始前检查浏览器状态，需要时回收标签页或重启浏览器，返回执行的动作（无动作返回 None）
+        """
+        if self.killed:
+            return self.restart("timeout", "命令超时")
+        if self.slow_commands >= self.max_slow_commands:
+            return self.restart("slow_commands", f"连续 {self.slow_commands} 条慢命令")
+        rss = self.browser_rss()
+        if rss > self.max_rss:
+            return self.restart("memory", f"内存 {rss / 1024 / 1024:.0f} MB")
+        if rss > self.tab_rss:
+            return self.recycle_tab("memory", f"内存 {rss / 1024 / 1024:.0f} MB")
+        return None
+
+    def recycle_tab(self, reason, detail):
+        """reason 为指标标签（timeout、slow_commands、memory、tab_failed、error），detail 为日志说明"""
+        print(f"♻️ 回收标签页：{detail}")
+        try:
+            old_handle = self.driver.current_window_handle
+            self.driver.switch_to.new_window('tab')
+            new_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(old_handle)
+            self.driver.close()
+            self.driver.switch_to.window(new_handle)
+        except Exception as e:
+            return self.restart("tab_failed", f"回收标签页失败：{e}")
+        BROWSER_RECYCLES.inc(action="tab", reason=reason)
+        if self.on_restart:
+            self.on_restart(self.driver)
+        return "tab"
+
+    def should_restart(self, error):
+        """会话扫描异常是否由浏览器引起（重启浏览器可以恢复），配置、存储或解析等程序错误返回 False"""
+        return self.killed or isinstance(error, BROWSER_ERRORS)
+
+    def restart(self, reason, detail):
+        """保存当前登录状态（浏览器仍可响应时），结束浏览器后重新启动并注入登录状态"""
+        print(f"🔁 重启浏览器：{detail}")
+        if not self.killed:
+            self.auth_client.save_user_data()
+            self.kill_browser()
+        for attempt in range(1, self.restart_attempts + 1):
+            try:
+                if not self.auth_client.restart():
+                    raise Exception("💔 重新注入登录状态后仍未登录！")
+                break
+            except Exception as e:
+                print(f"❌ 第 {attempt} 次重启浏览器失败：{e}")
+                if attempt == self.restart_attempts:
+                    raise
+                try:
+                    self.driver = self.auth_client.get_driver()
+                    self.kill_browser()
+                except Exception:
+                    pass
+                time.sleep(attempt * 10)
+        self.attach(self.auth_client.get_driver())
+        BROWSER_RECYCLES.inc(action="restart", reason=reason)
+        if self.on_restart:
+            self.on_restart(self.driver)
+        return "restart"
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于条件的等待
+驱动不再设置隐式等待：可选元素直接探测、立即返回；必需元素使用显式条件等待，条件满足即继续
+"""
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 必需元素的最长等待时间（单位：秒）
+default_timeout = 10
+# 条件轮询间隔（单位：秒）
+poll_frequency = 0.1
+
+COMMENT_ITEM_XPATH = "//div[contains(@class, 'comment-list-item')]"
+
+
+def wait_for(driver, condition, timeout=default_timeout, message=""):
+    """等待条件成立并返回条件的结果，超时抛出 TimeoutException"""
+    return WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition, message)
+
+
+def probe(context, by, value):
+    """探测可选元素，不存在时立即返回 None"""
+    elements = context.find_elements(by, value)
+    return elements[0] if elements else None
+
+
+def wait_for_element(driver, by, value, timeout=default_timeout):
+    """等待必需元素出现"""
+    return wait_for(driver, EC.presence_of_element_located((by, value)), timeout, f"等待元素超时：{value}")
+
+
+def wait_for_comment_list(driver, timeout=default_timeout):
+    """
+    等待评论列表渲染完成，返回是否有评论；
+    以评论条目或分页组件出现为准，页面确实没有评论时超时返回 False
+    """
+    try:
+        wait_for(driver, lambda d: d.find_elements(By.XPATH, COMMENT_ITEM_XPATH)
+                 or d.find_elements(By.XPATH, "//*[contains(@class, 'bcc-pagination')]"), timeout)
+    except TimeoutException:
+        return False
+    return bool(driver.find_elements(By.XPATH, COMMENT_ITEM_XPATH))
+
+
+def wait_for_list_rerender(driver, old_item, timeout=default_timeout):
+    """
+    翻页后等待评论列表重新渲染：旧的首条评论被移除或内容发生变化（列表节点可能被复用），
+    再等待新的评论列表出现
+    """
+    if old_item is not None:
+        try:
+            old_text = old_item.text
+        except StaleElementReferenceException:
+            # 点击之后、读取旧内容之前列表已经重新渲染
+            old_item = None
+
+    if old_item is not None:
+        def rerendered(_):
+            try:
+                return old_item.text != old_text
+            except StaleElementReferenceException:
+                return True
+        wait_for(driver, rerendered, timeout, "等待评论列表翻页超时")
+    return wait_for_comment_list(driver, timeout)
+
+
+def wait_for_visible(driver, context, xpath, timeout=default_timeout):
+    """在指定评论内等待元素可见并返回该元素"""
+    def visible(_):
+        element = probe(context, By.XPATH, xpath)
+        return element if element is not None and element.is_displayed() else False
+    return wait_for(driver, visible, timeout, f"等待元素可见超时：{xpath}")
+
+
+def wait_for_submitted(driver, reply_box, timeout=default_timeout):
+    """提交回复后，等待输入框被清空、隐藏或移除，视为提交已被页面确认"""
+    def submitted(_):
+        try:
+            return not reply_box.is_displayed() or not reply_box.get_attribute("value")
+        except Exception:
+            return True
+    return wait_for(driver, submitted, timeout, "等待回复提交确认超时")
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+src/ 下的模块按脚本方式组织（各目录内平铺导入），测试时将共用模块、两个版本与基准测试的目录加入模块搜索路径；
+两个版本都有 auth.py，这里以 Selenium 版本在前，api 版本的测试只导入不依赖 auth 的模块
+"""
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+for name in ('api', 'bench', 'selenium', 'common'):
+    sys.path.insert(0, os.path.join(SRC, name))
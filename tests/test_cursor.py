@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from cursor import Cursor
+from store import ReplyStore
+
+T = datetime(2025, 3, 25, 21, 27, 38)
+
+
+def test_is_seen_orders_by_time_then_ids():
+    cursor = Cursor(T, ['a'])
+    assert cursor.is_seen(T - timedelta(seconds=1), 'x')
+    assert cursor.is_seen(T, 'a')
+    assert not cursor.is_seen(T, 'b')
+    assert not cursor.is_seen(T + timedelta(seconds=1), 'a')
+
+
+def test_without_ids_the_whole_second_is_seen():
+    cursor = Cursor(T.replace(microsecond=500))
+    assert cursor.time == T
+    assert cursor.is_seen(T, 'anything')
+
+
+def test_advance_keeps_ids_of_the_newest_second_only():
+    cursor = Cursor(T, ['a'])
+    cursor.advance(T, 'b')
+    assert cursor.ids == {'a', 'b'}
+    cursor.advance(T - timedelta(seconds=5), 'old')
+    assert cursor.ids == {'a', 'b'}
+    cursor.advance(T + timedelta(seconds=1), 'c')
+    assert cursor.time == T + timedelta(seconds=1)
+    assert cursor.ids == {'c'}
+
+
+def test_rewind_makes_comment_new_again():
+    cursor = Cursor(T, ['a'])
+    cursor.rewind(T + timedelta(seconds=5))
+    assert (cursor.time, cursor.ids) == (T, {'a'})
+    cursor.rewind(T - timedelta(seconds=10))
+    assert not cursor.is_seen(T - timedelta(seconds=10), 'x')
+    assert cursor.is_seen(T - timedelta(seconds=11), 'x')
+
+
+def test_copy_is_independent():
+    cursor = Cursor(T, ['a'])
+    copy = cursor.copy()
+    copy.advance(T, 'b')
+    assert cursor.ids == {'a'}
+
+
+def test_dumps_loads_round_trip():
+    for cursor in (Cursor(T, ['b', 'a']), Cursor(T)):
+        loaded = Cursor.loads(cursor.dumps())
+        assert loaded.time == cursor.time
+        assert loaded.ids == cursor.ids
+
+
+def test_store_persists_cursor_and_replied(tmp_path):
+    path = str(tmp_path / 'replied.db')
+    store = ReplyStore(path)
+    store.set_cursor('article', Cursor(T, ['a']))
+    store.add('123')
+    store.close()
+
+    store = ReplyStore(path)
+    cursor = store.get_cursor('article')
+    assert (cursor.time, cursor.ids) == (T, {'a'})
+    assert '123' in store
+    assert '456' not in store
+    assert None not in store
+    store.close()
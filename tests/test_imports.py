@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+src/ 下的脚本在各自目录中直接运行或单独导入时（不经过 conftest 设置模块搜索路径）也能找到 src/common/ 中的共用模块
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+@pytest.mark.parametrize('directory, module', [
+    ('api', 'auth'),
+    ('api', 'transport'),
+    ('api', 'workers'),
+    ('api', 'autoreply'),
+    ('api', 'backfill'),
+    ('api', 'orchestrator'),
+    ('selenium', 'supervisor'),
+    ('selenium', 'authreply'),
+])
+def test_module_imports_from_its_own_directory(directory, module):
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+    result = subprocess.run([sys.executable, '-c', f'import {module}'], cwd=os.path.join(SRC, directory),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
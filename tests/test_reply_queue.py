@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import pytest
+
+from reply_queue import ReplyItem, ReplyQueue
+
+NOW = datetime(2025, 3, 25, 12, 0, 0)
+
+
+def item(cid, page=1, minutes_ago=0, relation="", oid=None):
+    reply = {'cid': cid, 'identifiers': [cid], 'username': cid, 'mid': cid, 'relation': relation, 'oid': oid, 'content': "回复"}
+    return ReplyItem(reply, NOW - timedelta(minutes=minutes_ago), page)
+
+
+def drain(queue):
+    order = []
+    while queue:
+        order.append(queue.pop().cid)
+    return order
+
+
+def test_priority_spans_pages():
+    queue = ReplyQueue('fans_first', max_size=10)
+    queue.push(item('p1-old', page=1, minutes_ago=10))
+    queue.push(item('p5-fan', page=5, minutes_ago=60, relation="粉丝"))
+    queue.push(item('p1-new', page=1, minutes_ago=1))
+    queue.push(item('p3-fan', page=3, minutes_ago=30, relation="已关注"))
+    assert drain(queue) == ['p3-fan', 'p5-fan', 'p1-new', 'p1-old']
+
+
+def test_newest_priority_ignores_page():
+    queue = ReplyQueue('newest', max_size=10)
+    queue.push(item('p1', page=1, minutes_ago=5))
+    queue.push(item('p2', page=2, minutes_ago=1))
+    assert drain(queue) == ['p2', 'p1']
+
+
+def test_scan_priority_keeps_insertion_order():
+    queue = ReplyQueue('scan', max_size=10)
+    for cid in ('a', 'b', 'c'):
+        queue.push(item(cid, minutes_ago=ord(cid)))
+    assert drain(queue) == ['a', 'b', 'c']
+
+
+def test_latest_upload_prefers_larger_oid():
+    queue = ReplyQueue('latest_upload', max_size=10)
+    queue.push(item('old-upload', oid='100'))
+    queue.push(item('no-upload', oid=None))
+    queue.push(item('new-upload', oid='200'))
+    assert drain(queue) == ['new-upload', 'old-upload', 'no-upload']
+
+
+def test_custom_priority_function():
+    queue = ReplyQueue(lambda reply_item: (reply_item.cid,), max_size=10)
+    for cid in ('b', 'c', 'a'):
+        queue.push(item(cid))
+    assert drain(queue) == ['a', 'b', 'c']
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(Exception):
+        ReplyQueue('loudest')
+
+
+def test_full_signals_back_pressure_and_clear_empties():
+    queue = ReplyQueue('scan', max_size=2)
+    queue.push(item('a'))
+    assert not queue.full()
+    queue.push(item('b'))
+    assert queue.full() and len(queue) == 2
+    queue.clear()
+    assert not queue and not queue.full()
+
+
+def test_deadline():
+    assert not ReplyQueue('scan').is_stale(item('a', minutes_ago=10 ** 6), now=NOW)
+    queue = ReplyQueue('scan', deadline=3600)
+    assert not queue.is_stale(item('fresh', minutes_ago=59), now=NOW)
+    assert queue.is_stale(item('stale', minutes_ago=61), now=NOW)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import json
+
+from rules import KeywordAutomaton, RuleEngine
+
+RULES = [
+    {"name": "资料", "keywords": ["资料"], "priority": 1, "reply": "资料"},
+    {"name": "校招", "keywords": ["校招", "内推"], "priority": 10, "reply": "校招", "replies": {"粉丝": "校招-粉丝"}},
+    {"name": "链接", "regex": r"链(接|子)", "priority": 5, "reply": "链接"},
+    {"name": "网盘", "regex": r"网盘", "priority": 5, "reply": "网盘"},
+]
+
+
+def make_engine(tmp_path, rules=RULES):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(rules, ensure_ascii=False), encoding='utf-8')
+    return RuleEngine(str(path))
+
+
+def test_automaton_reports_overlapping_keywords():
+    automaton = KeywordAutomaton()
+    for keyword in ("he", "she", "hers"):
+        automaton.add(keyword, keyword)
+    assert sorted(automaton.build().search("ushers")) == ["he", "hers", "she"]
+
+
+def test_highest_priority_wins_regardless_of_position(tmp_path):
+    engine = make_engine(tmp_path)
+    # 低优先级关键词出现在前，高优先级关键词出现在后
+    assert engine.match("求资料，顺便问下校招").name == "校招"
+    assert engine.match("资料的链接").name == "链接"
+
+
+def test_regex_lookahead_finds_overlapping_higher_priority_match(tmp_path):
+    engine = make_engine(tmp_path, [
+        {"name": "低", "regex": "求链接", "priority": 1, "reply": "低"},
+        {"name": "高", "regex": "链接", "priority": 9, "reply": "高"},
+    ])
+    # 低优先级规则在第 0 个位置命中并覆盖了高优先级规则的匹配范围，零宽先行断言保证之后的位置仍会尝试
+    assert engine.match("求链接").name == "高"
+    assert engine.match("求") is None
+
+
+def test_same_priority_follows_file_order(tmp_path):
+    engine = make_engine(tmp_path)
+    assert engine.match("链接和网盘").name == "链接"
+    assert engine.match("网盘和链接").name == "链接"
+
+
+def test_keywords_are_case_insensitive_and_replies_follow_relation(tmp_path):
+    engine = make_engine(tmp_path, [{"name": "offer", "keywords": ["Offer"], "reply": "恭喜", "replies": {"粉丝": "恭喜粉丝"}}])
+    assert engine.choose_reply("拿到 OFFER 了", "") == "恭喜"
+    assert engine.choose_reply("拿到 offer 了", "粉丝") == "恭喜粉丝"
+    assert engine.choose_reply("没有命中", "粉丝") is None
+
+
+def test_invalid_file_keeps_previous_rules(tmp_path):
+    engine = make_engine(tmp_path)
+    path = tmp_path / 'rules.json'
+    path.write_text('[{"name": "坏规则"}]', encoding='utf-8')
+    assert engine.reload_if_changed() is False
+    assert engine.match("校招").name == "校招"
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Selenium 版本的扫描逻辑，使用基于 lxml 的回放 driver（src/bench/replay_selenium.py），不需要 Chrome；
+页面中的评论元素不带 data-rpid，与评论接口响应（带 rpid）混用时同一条评论的标识不同
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+from lxml import html as lxml_html
+from selenium.common.exceptions import WebDriverException
+
+import authreply
+from capture import parse_comment_records
+from cursor import Cursor
+from fake_server import make_comments
+from relations import RelationResolver
+from replay_selenium import END_PAGE, ReplayDriver
+from reply_queue import ReplyQueue
+from snapshot import get_record_identifiers
+from store import ReplyStore
+from supervisor import BrowserSupervisor
+
+RELATIONS = {1: '粉丝', 2: '已关注', 3: '已关注'}
+
+
+def render_page(comments, last=False):
+    """与评论管理页结构相同、但评论元素不带 data-rpid 的页面，最后一页的下一页按钮处于禁用状态"""
+    items = []
+    for c in comments:
+        relation = RELATIONS.get(c['relation'], '')
+        hidden = '' if relation else ' style="display: none;"'
+        reply_tag = '<span class="ci-title-split">回复</span>' if c.get('parent') else ''
+        items.append(
+            f'<div class="comment-list-item"><div class="ci-title">'
+            f'<a class="user-avatar" mid="{c["mid"]}" card="{c["replier"]}">{c["replier"]}</a>{reply_tag}'
+            f'<span class="relation-label"{hidden}>{relation}</span></div>'
+            f'<div class="ci-content">{c["content"]["message"]}</div>'
+            f'<div class="ci-action"><span class="date">{datetime.fromtimestamp(c["ctime"]):%Y-%m-%d %H:%M:%S}</span>'
+            f'<span class="reply action"><a>回复</a></span></div></div>'
+        )
+    return ('<html><body><div class="comment-list">' + "".join(items) + '</div>'
+            '<ul class="bcc-pagination"><li class="bcc-pagination-next' + (' bcc-pagination-disabled' if last else '')
+            + '"><a>下一页</a></li></ul></body></html>')
+
+
+def api_payload(comments):
+    return {'code': 0, 'data': {'list': comments}}
+
+
+class ShiftedFetcher:
+    """并行拉取的桩实现：按页码切分给定的评论列表"""
+    concurrency = 2
+
+    def __init__(self, comments):
+        self.comments = comments
+
+    def fetch(self, pages, ps):
+        return [(pn, parse_comment_records(api_payload(self.comments[(pn - 1) * ps:pn * ps]))) for pn in pages]
+
+
+class LiveDriver(ReplayDriver):
+    """按当前评论列表实时分页渲染的回放 driver，列表变化（发出回复、来了新评论）后页面随之变化"""
+
+    def __init__(self, comments, ps=10):
+        super().__init__([])
+        self.comments = comments
+        self.ps = ps
+
+    @property
+    def page(self):
+        comments = self.comments[self.page_index * self.ps:(self.page_index + 1) * self.ps]
+        last = len(self.comments) <= (self.page_index + 1) * self.ps
+        return {'url': '', 'html': render_page(comments, last) if comments else END_PAGE, 'responses': []}
+
+    @property
+    def tree(self):
+        return lxml_html.fromstring(self.page['html'])
+
+    def next_page(self):
+        if self.comments[(self.page_index + 1) * self.ps:]:
+            self.page_index += 1
+
+
+@pytest.fixture
+def comments():
+    comments = make_comments(40, newest=1742900000)
+    for c in comments:
+        c['parent'] = 0
+    return comments
+
+
+@pytest.fixture
+def bot(monkeypatch, tmp_path):
+    """以回放 driver 运行 authreply，记录提交的回复"""
+    submitted = []
+    store = ReplyStore(str(tmp_path / 'replied.db'))
+    for name, value in {
+        'exclude_username': None, 'rule_engine': None, 'relation_resolver': None, 'recorder': None,
+        'network_capture': None, 'snapshot_mode': True, 'reply_queue': None, 'page_fetcher': None,
+        'replied_comments': store,
+    }.items():
+        monkeypatch.setattr(authreply, name, value)
+    monkeypatch.setattr(authreply, 'submit_reply', lambda comment, content: submitted.append(content) or True)
+    yield submitted
+    store.close()
+
+
+def test_record_identifiers_put_rpid_first():
+    assert get_record_identifiers({'rpid': 7, 'mid': '1', 'date': '2025-01-01 00:00:00'}) == ['7', '1-2025-01-01 00:00:00']
+    assert get_record_identifiers({'rpid': None, 'mid': '1', 'date': '2025-01-01 00:00:00'}) == ['1-2025-01-01 00:00:00']
+    assert get_record_identifiers({'rpid': None, 'mid': None, 'date': ''}) == []
+
+
+def test_parallel_scan_replies_once_when_comment_crosses_page_boundary(monkeypatch, bot, comments):
+    # 第 1 页从页面读取（没有 rpid），之后来了一条新评论，接口返回的各页整体后移一条，
+    # 第 1 页最后一条评论又出现在第 2 页（带 rpid）
+    newer = dict(comments[0], id=99999, mid=4242, ctime=comments[0]['ctime'] + 5)
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([{'url': '', 'html': render_page(comments[:10]), 'responses': []}]))
+    monkeypatch.setattr(authreply, 'page_fetcher', ShiftedFetcher([newer] + comments))
+    monkeypatch.setattr(authreply, 'reply_queue', ReplyQueue('scan', max_size=100))
+    monkeypatch.setattr(authreply, 'locate_comment', lambda item: object())
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[25]['ctime'])))
+
+    assert authreply.process_session() == 25
+    assert len(bot) == 25
+
+
+def test_reply_recorded_under_fallback_id_is_not_repeated(monkeypatch, bot, comments):
+    # 上一轮从页面快照回复（按“用户mid-评论时间”记录），本轮网络抓取到同一条评论（带 rpid）
+    page = {'url': '', 'html': render_page(comments[:10]), 'responses': []}
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([page]))
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[10]['ctime'])))
+    assert authreply.process_session() == 10
+    assert len(bot) == 10
+
+    class Capture:
+        last_responses = []
+
+        def latest_comments(self):
+            return parse_comment_records(api_payload(comments[:10]))
+
+    monkeypatch.setattr(authreply, 'network_capture', Capture())
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([page]))
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[10]['ctime'])))
+    assert authreply.process_session() == 10
+    assert len(bot) == 10
+
+
+def test_queued_replies_are_relocated_after_earlier_replies_push_them_down(monkeypatch, bot, comments):
+    # 并行扫描 4 页后再统一回复：每发出一条回复（带回复标签）都出现在列表最前面，期间还不断有新评论，
+    # 后面的评论被推后多页，仍需各回复一次
+    driver = LiveDriver(list(comments))
+    newest = comments[0]['ctime']
+    targets = []
+
+    def submit_reply(comment, content):
+        targets.append(authreply.get_comment_identifier(comment))
+        arrived = dict(comments[0], id=50000 + len(targets), mid=9000 + len(targets), ctime=newest + 10 * len(targets))
+        reply = dict(arrived, id=60000 + len(targets), mid=8888, replier="我", parent=1, ctime=arrived['ctime'] + 1)
+        driver.comments[:0] = [reply] + ([arrived] if len(targets) % 5 == 0 else [])
+        return True
+
+    monkeypatch.setattr(authreply, 'submit_reply', submit_reply)
+    monkeypatch.setattr(authreply, 'driver', driver)
+    monkeypatch.setattr(authreply, 'page_fetcher', ShiftedFetcher(comments))
+    monkeypatch.setattr(authreply, 'reply_queue', ReplyQueue('fans_first', max_size=100))
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[35]['ctime'])))
+
+    assert authreply.process_session() == 35
+    expected = [f"{c['mid']}-{datetime.fromtimestamp(c['ctime']):%Y-%m-%d %H:%M:%S}" for c in comments[:35]]
+    assert sorted(targets) == sorted(expected)
+    assert authreply.cursor.time == datetime.fromtimestamp(comments[0]['ctime'])
+
+
+def test_unlocated_comment_is_not_left_behind_cursor(monkeypatch, bot, comments):
+    # 扫描后、回复前评论被删除，找不到的评论不能留在保存的游标之前
+    driver = LiveDriver(list(comments))
+    monkeypatch.setattr(authreply, 'driver', driver)
+    monkeypatch.setattr(authreply, 'page_fetcher', ShiftedFetcher(comments))
+    monkeypatch.setattr(authreply, 'reply_queue', ReplyQueue('scan', max_size=100))
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[30]['ctime'])))
+    deleted = comments[23]
+
+    def submit_reply(comment, content):
+        if deleted in driver.comments:
+            driver.comments.remove(deleted)
+        return True
+
+    monkeypatch.setattr(authreply, 'submit_reply', submit_reply)
+    assert authreply.process_session() == 30
+    assert not authreply.cursor.is_seen(datetime.fromtimestamp(deleted['ctime']), str(deleted['id']))
+    assert authreply.replied_comments.get_cursor(authreply.content_type).time < datetime.fromtimestamp(deleted['ctime'])
+
+
+class RelationSession:
+    """关注关系接口的桩实现，记录每次请求查询的用户"""
+
+    def __init__(self, following):
+        self.following = following
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        fids = params['fids'].split(',')
+        self.requests.append(fids)
+
+        class Response:
+            def json(_):
+                return {'code': 0, 'data': {fid: {'attribute': 2} for fid in fids if fid in self.following}}
+        return Response()
+
+
+def test_relations_are_resolved_in_batches_only_when_page_has_no_label(monkeypatch, tmp_path, bot, comments):
+    session = RelationSession(following={'1003'})
+    resolver = RelationResolver(session, batch_size=4)
+    monkeypatch.setattr(authreply, 'relation_resolver', resolver)
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[10]['ctime'])))
+
+    # 页面带关注标签元素：直接使用页面上的关注状态，不请求接口
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([{'url': '', 'html': render_page(comments[:10]), 'responses': []}]))
+    authreply.process_session()
+    assert session.requests == []
+
+    # 页面没有关注标签元素：整页用户分批查询，已关注的用户使用关注话术
+    html = re.sub(r'<span class="relation-label"[^>]*>[^<]*</span>', '', render_page(comments[:10]))
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([{'url': '', 'html': html, 'responses': []}]))
+    store = ReplyStore(str(tmp_path / 'relations.db'))
+    monkeypatch.setattr(authreply, 'replied_comments', store)
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[10]['ctime'])))
+    bot.clear()
+    authreply.process_session()
+    assert [len(fids) for fids in session.requests] == [4, 4, 2]
+    assert bot.count(authreply.follow_user_reply_template) == 1
+    store.close()
+
+
+class StubSupervisor(BrowserSupervisor):
+    """只记录重启请求的浏览器监督器"""
+
+    def __init__(self):
+        self.killed = False
+        self.restarts = []
+
+    def check(self):
+        return None
+
+    def restart(self, reason, detail):
+        self.restarts.append(reason)
+        return "restart"
+
+
+class StubScheduler:
+    def __init__(self, min_interval, max_interval):
+        pass
+
+    def record(self, new_count):
+        pass
+
+    def describe(self):
+        return ""
+
+    def wait(self):
+        pass
+
+
+def test_main_loop_restarts_browser_only_on_browser_errors(monkeypatch):
+    supervisor = StubSupervisor()
+    errors = iter([WebDriverException("chrome not reachable"), ValueError("解析错误")])
+
+    def run_session():
+        raise next(errors)
+
+    for name, value in {
+        'supervisor': supervisor, 'metrics_port': None, 'relation_resolver': None, 'run_session': run_session,
+        'reload_config': lambda: {}, 'AdaptiveScheduler': StubScheduler,
+    }.items():
+        monkeypatch.setattr(authreply, name, value)
+    with pytest.raises(ValueError):
+        authreply.main_loop()
+    assert supervisor.restarts == ["error"]
+
+
+def decision_count():
+    return dict(authreply.COMMENT_DECISION.samples()).get('autoreply_comment_decision_seconds_count{account="default"}', 0)
+
+
+@pytest.mark.parametrize('snapshot_mode', [True, False])
+def test_every_comment_decision_is_timed(monkeypatch, bot, comments, snapshot_mode):
+    # 与纯 HTTP 版本相同，已扫描过、跳过与需要回复的评论都记录判断耗时
+    monkeypatch.setattr(authreply, 'account', "default")
+    monkeypatch.setattr(authreply, 'snapshot_mode', snapshot_mode)
+    monkeypatch.setattr(authreply, 'driver', ReplayDriver([{'url': '', 'html': render_page(comments[:10]), 'responses': []}]))
+    monkeypatch.setattr(authreply, 'cursor', Cursor(datetime.fromtimestamp(comments[5]['ctime'])))
+    before = decision_count()
+    assert authreply.process_session() == 5
+    assert len(bot) == 5
+    assert decision_count() - before == 10
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+import transport
+from transport import CircuitBreaker, CircuitOpenError, ResilientAdapter, endpoint_of
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(transport.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(transport, 'breakers', {})
+    monkeypatch.setattr(transport.time, 'sleep', lambda seconds: None)
+
+
+def test_breaker_opens_after_threshold_and_recovers_through_half_open(clock):
+    breaker = CircuitBreaker('api.test', failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    clock.now += 30
+    breaker.before_request()
+    assert breaker.state == 'half_open'
+    # 半开状态只放行一个探测请求
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == ('closed', 0)
+    breaker.before_request()
+
+
+def test_failed_probe_reopens_and_lost_probe_is_retried(clock):
+    breaker = CircuitBreaker('api.test', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    # 探测请求没有结果（既未成功也未失败）时，再过一个冷却时间放行下一个
+    clock.now += 30
+    breaker.before_request()
+    clock.now += 30
+    breaker.before_request()
+    assert breaker.state == 'half_open'
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker('api.test', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_endpoint_folds_ids_and_signatures():
+    assert endpoint_of("https://api.bilibili.com/x/v2/reply/up/fulllist?pn=2") == "/x/v2/reply/up/fulllist"
+    assert endpoint_of("https://www.bilibili.com/correspond/1/0123456789abcdef0123") == "/correspond/{id}/{id}"
+    assert endpoint_of("https://api.bilibili.com") == "/"
+
+
+def scripted_send(monkeypatch, outcomes):
+    """HTTPAdapter.send 依次返回给定的状态码或抛出给定的异常，返回实际发送的 (方法, 超时) 列表"""
+    sent = []
+
+    def send(self, request, timeout=None, **kwargs):
+        sent.append((request.method, timeout))
+        outcome = outcomes[min(len(sent), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.url = request.url
+        response.raw = io.BytesIO(b'')
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, 'send', send)
+    return sent
+
+
+def make_session(**kwargs):
+    session = requests.Session()
+    transport.mount(session, **kwargs)
+    return session
+
+
+def test_get_retries_transient_statuses_with_default_timeout(monkeypatch):
+    sent = scripted_send(monkeypatch, [503, 429, 200])
+    response = make_session(timeout=(1, 2), retries=3).get("https://api.test/x/list")
+    assert response.status_code == 200
+    assert sent == [('GET', (1, 2))] * 3
+
+
+def test_get_gives_up_after_retries(monkeypatch):
+    sent = scripted_send(monkeypatch, [502])
+    assert make_session(retries=2).get("https://api.test/x/list").status_code == 502
+    assert len(sent) == 3
+
+
+def test_post_is_not_retried_after_it_may_have_been_sent(monkeypatch):
+    sent = scripted_send(monkeypatch, [503])
+    assert make_session().post("https://api.test/x/reply", data={'a': 1}).status_code == 503
+    assert len(sent) == 1
+
+    sent = scripted_send(monkeypatch, [requests.exceptions.ReadTimeout()])
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        make_session().post("https://api.test/x/reply", data={'a': 1})
+    assert len(sent) == 1
+
+
+def test_post_is_retried_on_connect_timeout(monkeypatch):
+    sent = scripted_send(monkeypatch, [requests.exceptions.ConnectTimeout(), 200])
+    assert make_session().post("https://api.test/x/reply", data={'a': 1}).status_code == 200
+    assert len(sent) == 2
+
+
+def test_open_breaker_fails_fast_without_sending(monkeypatch):
+    sent = scripted_send(monkeypatch, [requests.exceptions.ConnectionError()])
+    session = make_session(retries=0)
+    for _ in range(transport.get_breaker('api.test').failure_threshold):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get("https://api.test/x/list")
+    count = len(sent)
+    with pytest.raises(CircuitOpenError):
+        session.get("https://api.test/x/list")
+    assert len(sent) == count
+
+
+def test_adapter_is_pooled_per_session():
+    adapter = ResilientAdapter(pool_maxsize=7)
+    assert adapter._pool_maxsize == 7
+    assert make_session().get_adapter("http://x").__class__ is ResilientAdapter